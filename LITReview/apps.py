@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class LitreviewConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'LITReview'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .connection_stats import connection_opened
+        from .sqlite import apply_pragmas
+        connection_created.connect(apply_pragmas, dispatch_uid='LITReview.sqlite.apply_pragmas')
+        connection_created.connect(connection_opened, dispatch_uid='LITReview.connection_stats.connection_opened')
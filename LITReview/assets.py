@@ -0,0 +1,140 @@
+"""
+Bundling of the stylesheets into one minified, content-hashed file.
+
+base.html used to link every stylesheet separately, busted by a hand-maintained
+version number. `python manage.py build_assets` now concatenates the sources of
+each bundle of settings.ASSET_BUNDLES (in order), minifies them and writes the
+result as <name>.<hash>.<ext> in settings.ASSETS_BUILD_DIR, a subdirectory of the
+first static directory, with a manifest.json mapping each bundle to its file:
+
+    {"css/site.css": "dist/site.3f2a9c1b7d04.css"}
+
+The file name changes with the content, so it can be cached forever by the
+browser (Cache-Control: max-age=31536000, immutable). The {% stylesheet %} tag
+(templatetags/assets.py) links the bundle of the manifest; without a build
+(development, tests) it links the sources, each versioned by its own hash.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+MANIFEST = 'manifest.json'
+HASH_LENGTH = 12
+
+# Comments, then strings (kept as they are), then everything else
+CSS_TOKENS = re.compile(r'(/\*.*?\*/)|("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', re.S)
+CSS_SPACES = re.compile(r'\s+')
+CSS_PUNCTUATION = re.compile(r'\s*([{};,])\s*')
+
+
+def minify_css(text):
+    """Removes comments and the whitespace that does not separate tokens; strings are kept unchanged."""
+    parts = []
+    position = 0
+    for match in CSS_TOKENS.finditer(text):
+        parts.append(_squeeze(text[position:match.start()]))
+        if match.group(2):
+            parts.append(match.group(2))
+        position = match.end()
+    parts.append(_squeeze(text[position:]))
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+def _squeeze(code):
+    code = CSS_SPACES.sub(' ', code)
+    code = CSS_PUNCTUATION.sub(r'\1', code)
+    # 'color: red' -> 'color:red', but not 'a :hover' (descendant) -> 'a:hover'
+    return code.replace(': ', ':')
+
+
+def build_dir():
+    return os.path.join(settings.STATICFILES_DIRS[0], settings.ASSETS_BUILD_DIR)
+
+
+def source_path(name):
+    path = finders.find(name)
+    if path is None:
+        raise FileNotFoundError(f"Static file not found: {name}")
+    return path
+
+
+def short_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def build():
+    """
+    Writes every bundle of settings.ASSET_BUNDLES and the manifest, deletes the
+    outdated bundles. Returns the manifest ({bundle: static name of its file}).
+    """
+    directory = build_dir()
+    os.makedirs(directory, exist_ok=True)
+    manifest = {}
+    for bundle, sources in settings.ASSET_BUNDLES.items():
+        parts = []
+        for name in sources:
+            with open(source_path(name), encoding='utf-8') as file:
+                parts.append(minify_css(file.read()))
+        data = '\n'.join(parts).encode('utf-8')
+        stem, ext = os.path.splitext(os.path.basename(bundle))
+        filename = f'{stem}.{short_hash(data)}{ext}'
+        with open(os.path.join(directory, filename), 'wb') as file:
+            file.write(data)
+        manifest[bundle] = f'{settings.ASSETS_BUILD_DIR}/{filename}'
+
+    current = {os.path.basename(name) for name in manifest.values()} | {MANIFEST}
+    for entry in os.listdir(directory):
+        if entry not in current:
+            os.remove(os.path.join(directory, entry))
+    # Written last, through a rename: a reader never sees a manifest pointing to a missing bundle
+    temp = os.path.join(directory, MANIFEST + '.tmp')
+    with open(temp, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(temp, os.path.join(directory, MANIFEST))
+    return manifest
+
+
+_manifest_cache = {}
+
+
+def manifest():
+    """The manifest of the last build ({} without build), read again only when its file changes."""
+    path = os.path.join(build_dir(), MANIFEST)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if _manifest_cache.get('key') != (path, mtime):
+        with open(path, encoding='utf-8') as file:
+            _manifest_cache.update(key=(path, mtime), value=json.load(file))
+    return _manifest_cache['value']
+
+
+_source_versions = {}
+
+
+def source_version(name):
+    """Hash of the content of the static file name, cached until its modification time changes."""
+    path = source_path(name)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _source_versions.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as file:
+            cached = _source_versions[path] = (mtime, short_hash(file.read()))
+    return cached[1]
+
+
+def bundle_files(bundle):
+    """
+    Static names and version query strings to link for bundle: its built file
+    (versioned by its name) or, without build, its sources.
+    """
+    built = manifest().get(bundle)
+    if built:
+        return [(built, None)]
+    return [(name, source_version(name)) for name in settings.ASSET_BUNDLES[bundle]]
@@ -0,0 +1,61 @@
+"""
+Reference counting of the content-addressed ticket images (storage.py).
+
+Several tickets may share one blob, so deleting a ticket (or replacing its
+image) must only delete the file when no other ticket uses it. Each blob has a
+MediaBlob row counting the tickets whose image it is:
+
+- acquire: before the upload is written (Ticket pre_save), so that a concurrent
+  release of the same bytes either happens before (and the upload writes the
+  file again) or sees the new reference (and keeps the file),
+- release: when a ticket is deleted or changes its image; the last release
+  deletes the row, the blob and its variants.
+
+Counts are changed by F() expressions (single atomic UPDATEs). Files outside
+settings.MEDIA_BLOB_DIR (uploaded before content addressing) are not counted:
+gc_media takes care of them.
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Ticket, MediaBlob
+
+
+def storage():
+    return Ticket._meta.get_field('image').storage
+
+
+def acquire(name):
+    """Adds a reference to the blob name."""
+    if not name or not storage().is_blob(name):
+        return
+    with transaction.atomic():
+        blob, _ = MediaBlob.objects.get_or_create(name=name)
+        MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+
+
+def release(name):
+    """
+    Removes a reference to the blob name; deletes the blob and its variants from
+    the storage when it was the last one. Returns True when the blob was deleted.
+    """
+    if not name or not storage().is_blob(name):
+        return False
+    with transaction.atomic():
+        if not MediaBlob.objects.filter(name=name, refcount__gt=0).update(refcount=F('refcount') - 1):
+            return False
+        deleted, _ = MediaBlob.objects.filter(name=name, refcount=0).delete()
+        if deleted:
+            # Inside the transaction: a concurrent acquire waits for it, then writes the file again
+            for member in storage().family(name):
+                storage().delete(member)
+    return bool(deleted)
+
+
+def pending_upload_name(ticket):
+    """Content-addressed name of the image of ticket if it is a new, not yet stored upload."""
+    image = ticket.image
+    if not image or image._committed:
+        return None
+    return storage().blob_name(image.name, image.file)
@@ -0,0 +1,71 @@
+"""
+Precompressed variants of the text assets.
+
+collectstatic (storage.CompressedStaticFilesStorage) writes, next to every
+compressible file, the variants that are smaller than the file:
+
+    static/dist/site.3f2a9c1b7d04.css
+    static/dist/site.3f2a9c1b7d04.css.br    (when the brotli package is installed)
+    static/dist/site.3f2a9c1b7d04.css.gz
+
+They are compressed once, at the highest level, instead of on every request;
+serving.py picks one according to Accept-Encoding. Images are already
+compressed and get no variant.
+"""
+
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.mjs', '.html', '.htm', '.svg', '.txt', '.json', '.xml', '.map')
+
+
+def _gzip(data):
+    # mtime=0: the same input always gives the same bytes (stable ETag across deployments)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+# Content-Encoding -> (file suffix, compressor), by order of preference
+ENCODINGS = [('br', '.br', _brotli)] if brotli else []
+ENCODINGS.append(('gzip', '.gz', _gzip))
+
+
+def compressible(name):
+    return name.lower().endswith(COMPRESSIBLE)
+
+
+def write_variants(path):
+    """
+    Writes the compressed variants of the file path that are smaller than it,
+    deletes the outdated ones. Returns the encodings written.
+    """
+    written = []
+    stat = os.stat(path)
+    data = None
+    for encoding, suffix, compress in ENCODINGS:
+        variant = path + suffix
+        try:
+            if os.stat(variant).st_mtime_ns >= stat.st_mtime_ns:
+                written.append(encoding)
+                continue
+        except FileNotFoundError:
+            pass
+        if data is None:
+            with open(path, 'rb') as file:
+                data = file.read()
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            with open(variant, 'wb') as file:
+                file.write(compressed)
+            written.append(encoding)
+        elif os.path.exists(variant):
+            os.remove(variant)
+    return written
@@ -0,0 +1,50 @@
+"""
+Count of the database connections opened by the process.
+
+With CONN_MAX_AGE = 0 every request opens a connection (and runs the SQLite
+pragmas of sqlite.py) then closes it; with persistent connections
+(config/settings_production.py) a server thread keeps its connection between
+requests, and only reopens it once it is older than CONN_MAX_AGE or, with
+CONN_HEALTH_CHECKS, found unusable at the start of a request.
+
+connection_opened (connection_created receiver, connected in
+apps.LitreviewConfig.ready) counts the openings per database alias, for the
+process and for the current request; middleware.ConnectionStatsMiddleware
+reports them in the response headers.
+"""
+
+import contextvars
+import threading
+from collections import Counter
+
+_lock = threading.Lock()
+_totals = Counter()
+# Openings during the current request (ConnectionStatsMiddleware)
+_request = contextvars.ContextVar('connection_stats_request', default=None)
+
+
+def connection_opened(sender, connection, **kwargs):
+    """connection_created receiver: counts the opening for the process and the current request."""
+    with _lock:
+        _totals[connection.alias] += 1
+    opened = _request.get()
+    if opened is not None:
+        opened[connection.alias] += 1
+
+
+def totals():
+    """Connections opened by the process since it started, per alias."""
+    with _lock:
+        return Counter(_totals)
+
+
+def begin_request():
+    """Starts counting the openings of a request; returns a token for end_request."""
+    return _request.set(Counter())
+
+
+def end_request(token):
+    """Stops counting the request started with token; returns its openings per alias."""
+    opened = _request.get()
+    _request.reset(token)
+    return opened
@@ -0,0 +1,333 @@
+"""
+Feed engine for the LITReview 'flux' page.
+
+Builds one page of feed items displayed by feed/flux.html with a fixed number of
+queries, whatever the number of tickets or reviews visible to the user:
+
+1. page keys: visible tickets and orphan reviews merged by a UNION ALL ordered by
+   (time_created, kind, id) and cut after the page (keyset pagination),
+2. tickets of the page (with their author),
+3. non-blocked reviews on those tickets (with their author),
+4. orphan reviews of the page (with their author).
+
+Followed and blocked users are resolved through subqueries, so they never cost
+an extra round trip nor a growing list of SQL parameters.
+
+Pages are addressed by an opaque cursor encoding the key of the last item shown,
+so the cost of a page does not grow with the history of the user.
+
+settings.FEED_STRATEGY selects where the page keys come from:
+- 'read': computed at read time from UserFollows and BlockedUser (UNION above),
+- 'write': read from the FeedEntry timeline filled at write time (LITReview/timeline.py),
+  one indexed range scan per page,
+- 'hybrid': like 'write', except that the posts of popular authors (more than
+  settings.FEED_FANOUT_THRESHOLD followers) are not pushed at write time but
+  pulled at read time, then merged with the timeline in (time_created, kind, id) order.
+  The authors whose posts skipped the fan-out are recorded (PulledAuthor) and
+  pulled until rebuild_feed pushes their posts, even once they are no longer popular.
+
+Item structure (unchanged, consumed by feed/flux.html):
+- {'kind': 'ticket_block', 'ticket': Ticket, 'reviews': [Review, ...], 'time_created': datetime}
+- {'kind': 'orphan_review', 'review': Review, 'time_created': datetime}
+"""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import defaultdict
+from datetime import datetime
+from heapq import merge
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import CharField, Count, Q, Value
+from django.utils import timezone
+
+from .models import UserFollows, BlockedUser, Ticket, Review, FeedEntry, PulledAuthor
+
+# Kinds of feed keys, also used as the sort discriminator between equal timestamps.
+TICKET = FeedEntry.TICKET
+REVIEW = FeedEntry.REVIEW
+
+
+def followed_subquery(user):
+    """Subquery of the ids of the users followed by user."""
+    return UserFollows.objects.filter(user=user).values('followed_user')
+
+
+def blocked_subquery(user):
+    """Subquery of the ids of the users blocked by user."""
+    return BlockedUser.objects.filter(user=user).values('blocked_user')
+
+
+def visible_tickets(user):
+    """
+    Tickets visible in the feed of user: their own tickets and those of the users
+    they follow, excluding blocked users.
+    """
+    return Ticket.objects.filter(
+        Q(user=user) | Q(user__in=followed_subquery(user))
+    ).exclude(user__in=blocked_subquery(user))
+
+
+def orphan_reviews(user):
+    """
+    Reviews written by user or the users they follow (excluding blocked users)
+    on tickets that are not visible in their feed.
+    """
+    return Review.objects.filter(
+        Q(user=user) | Q(user__in=followed_subquery(user))
+    ).exclude(
+        user__in=blocked_subquery(user)
+    ).exclude(
+        ticket__in=visible_tickets(user)
+    )
+
+
+def _keyset_filter(kind, cursor):
+    """
+    Q object selecting the rows of one UNION branch (all of the same kind) that
+    come strictly after cursor in (time_created, kind, id) descending order.
+    """
+    time_created, cursor_kind, cursor_id = cursor
+    if kind < cursor_kind:
+        return Q(time_created__lte=time_created)
+    if kind == cursor_kind:
+        return Q(time_created__lt=time_created) | Q(time_created=time_created, id__lt=cursor_id)
+    return Q(time_created__lt=time_created)
+
+
+def _keyed(queryset, kind, cursor):
+    """(time_created, kind, id) rows of queryset, restricted to the rows after cursor."""
+    if cursor is not None:
+        queryset = queryset.filter(_keyset_filter(kind, cursor))
+    return queryset.annotate(
+        kind=Value(kind, output_field=CharField())
+    ).values_list('time_created', 'kind', 'id')
+
+
+def encode_cursor(key):
+    """Opaque, URL-safe representation of a (time_created, kind, id) feed key."""
+    time_created, kind, pk = key
+    raw = f"{time_created.isoformat()}|{kind}|{pk}"
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor built by encode_cursor.
+    Returns None for a missing or malformed cursor (the feed then starts at the top).
+    """
+    if not cursor:
+        return None
+    try:
+        raw = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        time_created, kind, pk = raw.split('|')
+        time_created = datetime.fromisoformat(time_created)
+        pk = int(pk)
+    except ValueError:
+        return None
+    if kind not in (TICKET, REVIEW) or timezone.is_naive(time_created):
+        return None
+    return time_created, kind, pk
+
+
+def popular_author_ids():
+    """
+    Set of the ids of the users followed by more than settings.FEED_FANOUT_THRESHOLD
+    users. Their posts are pulled at read time by the 'hybrid' strategy.
+
+    Computed by a single GROUP BY on UserFollows and cached for
+    settings.FEED_POPULAR_AUTHORS_TIMEOUT seconds. Only the write side uses it:
+    the read side pulls the recorded authors (pulled_authors), so a stale
+    classification never hides a post.
+    """
+    threshold = settings.FEED_FANOUT_THRESHOLD
+    key = f'feed:popular_authors:{threshold}'
+    ids = cache.get(key)
+    if ids is None:
+        ids = set(
+            UserFollows.objects.values('followed_user').annotate(
+                followers=Count('id')
+            ).filter(followers__gt=threshold).values_list('followed_user', flat=True)
+        )
+        cache.set(key, ids, settings.FEED_POPULAR_AUTHORS_TIMEOUT)
+    return ids
+
+
+def read_time_keys(user, cursor=None, authors=None, exclude_authors=None, involving=None):
+    """
+    Queryset of the (time_created, kind, id) keys of the feed of user, computed
+    at read time: visible tickets and orphan reviews merged by a UNION ALL.
+
+    authors / exclude_authors optionally restrict the keys to (or exclude) the
+    posts of the given user ids. involving restricts them to the keys that
+    depend on the relation of user with the user id involving: their tickets,
+    their reviews and the reviews on their tickets.
+    """
+    tickets, reviews = visible_tickets(user), orphan_reviews(user)
+    if authors is not None:
+        tickets, reviews = tickets.filter(user__in=authors), reviews.filter(user__in=authors)
+    if involving is not None:
+        tickets = tickets.filter(user=involving)
+        reviews = reviews.filter(Q(user=involving) | Q(ticket__user=involving))
+    if exclude_authors:
+        tickets, reviews = tickets.exclude(user__in=exclude_authors), reviews.exclude(user__in=exclude_authors)
+    return _keyed(tickets, TICKET, cursor).union(
+        _keyed(reviews, REVIEW, cursor), all=True
+    ).order_by('-time_created', '-kind', '-id')
+
+
+def pulled_authors(user):
+    """
+    Ids of the authors followed by user whose posts skipped the fan-out
+    (PulledAuthor): pulled at read time in 'hybrid' mode.
+    """
+    return set(PulledAuthor.objects.filter(author__in=followed_subquery(user)).values_list('author', flat=True))
+
+
+def timeline_keys(user, cursor=None):
+    """
+    Queryset of the (time_created, kind, id) keys of the feed of user, read from
+    the materialized FeedEntry timeline.
+    """
+    entries = FeedEntry.objects.filter(owner=user)
+    if cursor is not None:
+        time_created, kind, pk = cursor
+        entries = entries.filter(
+            Q(time_created__lt=time_created)
+            | Q(time_created=time_created, kind__lt=kind)
+            | Q(time_created=time_created, kind=kind, item_id__lt=pk)
+        )
+    return entries.order_by('-time_created', '-kind', '-item_id').values_list('time_created', 'kind', 'item_id')
+
+
+def page_keys(user, cursor=None, page_size=None):
+    """
+    Returns (keys, next_key) for one page of the feed of user.
+
+    Keys are ordered by the database and only page_size + 1 of them are
+    fetched. next_key is None on the last page.
+    """
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    if settings.FEED_STRATEGY == 'read':
+        keys = list(read_time_keys(user, cursor)[:page_size + 1])
+    elif settings.FEED_STRATEGY == 'write':
+        keys = list(timeline_keys(user, cursor)[:page_size + 1])
+    elif settings.FEED_STRATEGY == 'hybrid':
+        keys = list(timeline_keys(user, cursor)[:page_size + 1])
+        authors = pulled_authors(user)
+        if authors:
+            pulled = read_time_keys(user, cursor, authors=authors)[:page_size + 1]
+            # Both sources are sorted; the posts of an author pushed before they
+            # became popular (or since) appear in both, hence the de-duplication.
+            merged = merge(keys, pulled, reverse=True)
+            keys = list(islice(_unique(merged), page_size + 1))
+    else:
+        raise ImproperlyConfigured(f"Unknown FEED_STRATEGY: {settings.FEED_STRATEGY!r}")
+    if len(keys) > page_size:
+        return keys[:page_size], keys[page_size - 1]
+    return keys, None
+
+
+def _unique(keys):
+    """Drops consecutive duplicates from an ordered stream of keys."""
+    previous = None
+    for key in keys:
+        if key != previous:
+            yield key
+        previous = key
+
+
+def hydrate(user, keys):
+    """
+    Builds the feed items for a page of (time_created, kind, id) keys.
+
+    Runs at most three queries (tickets, reviews on those tickets, orphan
+    reviews). Each ticket is flagged with has_review_by_user (used to hide the
+    "Critiquer ce ticket" button).
+    """
+    ticket_ids = [pk for _, kind, pk in keys if kind == TICKET]
+    review_ids = [pk for _, kind, pk in keys if kind == REVIEW]
+
+    tickets = {}
+    reviews_by_ticket = defaultdict(list)
+    if ticket_ids:
+        tickets = Ticket.objects.select_related('user').in_bulk(ticket_ids)
+        reviews = Review.objects.filter(
+            ticket__in=ticket_ids
+        ).exclude(
+            user__in=blocked_subquery(user)
+        ).select_related('user').order_by('-time_created')
+        for review in reviews:
+            reviews_by_ticket[review.ticket_id].append(review)
+    orphans = Review.objects.select_related('user').in_bulk(review_ids) if review_ids else {}
+
+    items = []
+    for _, kind, pk in keys:
+        if kind == TICKET and pk in tickets:
+            ticket = tickets[pk]
+            ticket_reviews = reviews_by_ticket[pk]
+            ticket.has_review_by_user = any(r.user_id == user.id for r in ticket_reviews)
+            items.append({
+                'kind': 'ticket_block',
+                'ticket': ticket,
+                'reviews': ticket_reviews,
+                'time_created': ticket.time_created,
+            })
+        elif kind == REVIEW and pk in orphans:
+            items.append({
+                'kind': 'orphan_review',
+                'review': orphans[pk],
+                'time_created': orphans[pk].time_created,
+            })
+    return items
+
+
+def build_feed(user, cursor=None, page_size=None):
+    """
+    Returns (items, next_cursor) for one page of the feed of user, in reverse
+    chronological order.
+
+    cursor is the opaque value returned for the previous page (None for the
+    first page); next_cursor is None on the last page. The number of queries
+    does not depend on the page size or the history of the user: at most four
+    (the keys, then hydrate) with the 'read' and 'write' strategies; 'hybrid'
+    adds the lookup of the pulled authors and, when the user follows any, the
+    query of their posts (six at most).
+    """
+    keys, next_key = page_keys(user, decode_cursor(cursor), page_size)
+    next_cursor = encode_cursor(next_key) if next_key else None
+    return hydrate(user, keys), next_cursor
+
+
+def user_posts_keys(user):
+    """
+    Queryset of the (time_created, kind, id) keys of the posts written by user
+    (tickets and reviews), merged by a UNION ALL in reverse chronological order.
+    Suitable for Paginator: only the keys of the requested page are fetched.
+    """
+    return _keyed(Ticket.objects.filter(user=user), TICKET, None).union(
+        _keyed(Review.objects.filter(user=user), REVIEW, None), all=True
+    ).order_by('-time_created', '-kind', '-id')
+
+
+def hydrate_posts(keys):
+    """
+    Loads the tickets and reviews of a page of (time_created, kind, id) keys
+    (two queries, authors included), in the order of the keys. Each object is
+    annotated with content_type ('TICKET' / 'REVIEW') for feed/posts.html.
+    """
+    ticket_ids = [pk for _, kind, pk in keys if kind == TICKET]
+    review_ids = [pk for _, kind, pk in keys if kind == REVIEW]
+    objects = {
+        TICKET: Ticket.objects.select_related('user').in_bulk(ticket_ids) if ticket_ids else {},
+        REVIEW: Review.objects.select_related('user').in_bulk(review_ids) if review_ids else {},
+    }
+    posts = []
+    for _, kind, pk in keys:
+        post = objects[kind].get(pk)
+        if post is not None:
+            post.content_type = kind.upper()
+            posts.append(post)
+    return posts
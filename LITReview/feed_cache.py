@@ -0,0 +1,150 @@
+"""
+Per-user cache of the 'flux' page data.
+
+Versions (nanosecond timestamps) are stored in the cache, bumped by the signal
+handlers (signals.py) on every write:
+- one version per author, bumped by bump_audiences when one of their posts, or
+  a review on one of their tickets, is saved or deleted: O(1) whatever their
+  number of followers,
+- one version per user for their own follows and blocks, bumped by
+  bump_versions when they follow, unfollow, block or unblock someone (and when
+  the user is created: ids may be reused after a rollback).
+The versions are bumped once the transaction of the write is committed
+(transaction.on_commit; right away in autocommit mode).
+
+The feed of a user depends on the versions of the user, of themselves as an
+author and of the authors they follow: feed_tag combines them at read time
+(the followed ids are cached with the version of the user, so a cache hit runs
+no query). A feed page is cached under a key made of the user id, the tag and
+the cursor, so bumping any of these versions invalidates every cached page of
+the user at once, without having to know the keys. feed_version, the latest of
+these versions, dates the feed.
+
+A cache hit does not touch the database. Works with any Django cache backend
+(local-memory and file-based included).
+
+The feed tag is also the fingerprint used for conditional GET (ETag /
+Last-Modified) on the 'flux' and 'posts' pages: a client polling an unchanged
+feed gets a 304 before any query or template rendering.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .feed import build_feed, decode_cursor, encode_cursor
+from .models import UserFollows
+
+
+def _user_key(user_id):
+    return f'feed:version:{user_id}'
+
+
+def _author_key(author_id):
+    return f'feed:author:{author_id}'
+
+
+def _following_key(user_id):
+    return f'feed:following:{user_id}'
+
+
+def _versions(user_id):
+    """
+    Versions the feed of user_id depends on: the version of the user, then the
+    versions of the user and of the authors they follow (created on first use
+    or after eviction). Two cache round trips; a query only when the follows of
+    the user changed since their ids were cached.
+    """
+    user_key, following_key = _user_key(user_id), _following_key(user_id)
+    found = cache.get_many([user_key, following_key])
+    version = found.get(user_key)
+    if version is None:
+        version = time.time_ns()
+        cache.set(user_key, version, None)
+    following = found.get(following_key)
+    if following is None or following[0] != version:
+        following = (version, list(UserFollows.objects.filter(user=user_id).values_list('followed_user', flat=True)))
+        cache.set(following_key, following, None)
+    keys = [_author_key(author_id) for author_id in [user_id, *sorted(following[1])]]
+    authors = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in authors}
+    if missing:
+        cache.set_many(missing, None)
+        authors.update(missing)
+    return [version, *(authors[key] for key in keys)]
+
+
+def feed_version(user_id):
+    """Date (ns timestamp) of the latest write affecting the feed of user_id, as seen by the cache."""
+    return max(_versions(user_id))
+
+
+def feed_tag(user_id):
+    """Fingerprint of the versions the feed of user_id depends on (changes on every write affecting it)."""
+    versions = ','.join(map(str, _versions(user_id)))
+    return hashlib.md5(versions.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def _bump(keys):
+    # After COMMIT: bumped earlier, a concurrent reader could cache the rows
+    # before the write under the new version until the next write.
+    keys = list(keys)
+    transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, time.time_ns()), None))
+
+
+def bump_versions(user_ids):
+    """Invalidates the cached feed pages of every user in user_ids (their follows or blocks changed)."""
+    _bump(_user_key(user_id) for user_id in user_ids)
+
+
+def bump_audiences(*author_ids):
+    """Invalidates the cached feed pages of every reader of the given authors (one key per author)."""
+    _bump(_author_key(author_id) for author_id in set(author_ids))
+
+
+def cached_feed(user, cursor=None):
+    """
+    Returns (items, next_cursor) like feed.build_feed, from the cache when the
+    page was already built for the current feed version of user.
+    """
+    timeout = settings.FEED_CACHE_TIMEOUT
+    if not timeout:
+        return build_feed(user, cursor=cursor)
+    # Re-encoded so that arbitrary query strings never end up in cache keys
+    position = decode_cursor(cursor)
+    cursor = encode_cursor(position) if position else None
+    key = f'feed:page:{user.id}:{feed_tag(user.id)}:{cursor or ""}'
+    page = cache.get(key)
+    if page is None:
+        page = build_feed(user, cursor=cursor)
+        cache.set(key, page, timeout)
+    return page
+
+
+def _has_pending_messages(request):
+    """True when flash messages are waiting to be displayed (a 304 would swallow them)."""
+    return bool(request.COOKIES.get('messages')) or bool(request.session.get('_messages'))
+
+
+def feed_etag(request):
+    """
+    ETag of the 'flux' / 'posts' pages of request.user: the user id, the feed
+    tag (changed by every write affecting the user, follows and blocks
+    included) and the query string. Costs two cache lookups, no query.
+    Returns None (no conditional handling) when flash messages are pending.
+    """
+    if _has_pending_messages(request):
+        return None
+    query = hashlib.md5(request.GET.urlencode().encode(), usedforsecurity=False).hexdigest()[:8]
+    return f'{request.user.id}-{feed_tag(request.user.id)}-{query}'
+
+
+def feed_last_modified(request):
+    """Last-Modified of the 'flux' / 'posts' pages of request.user: date of the latest feed version."""
+    if _has_pending_messages(request):
+        return None
+    return datetime.fromtimestamp(feed_version(request.user.id) / 1e9, tz=timezone.utc)
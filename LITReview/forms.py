@@ -1,7 +1,14 @@
 from django import forms
+from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.urls import reverse
 
+from . import uploads
 from .models import Ticket, Review
 
 
@@ -58,10 +65,23 @@ class SignUpForm(BaseForm, UserCreationForm):
         model = User
         fields = ['username', 'email', 'password1', 'password2']
 
+    def clean_username(self):
+        """
+        Rejects usernames that differ only in case (same rule as UserCreationForm),
+        through the LOWER(username) index instead of a username__iexact scan.
+        """
+        username = self.cleaned_data.get('username')
+        if username and User.objects.filter(username__lower=Lower(Value(username))).exists():
+            self._update_errors(ValidationError({
+                'username': self.instance.unique_error_message(User, ['username'])
+            }))
+            return None
+        return username
+
     def clean_email(self):
         email = self.cleaned_data.get('email')
         # Cherche un autre User avec cet email
-        if User.objects.filter(email__iexact=email).exists():
+        if User.objects.filter(email__lower=Lower(Value(email))).exists():
             raise forms.ValidationError("This email is already used by another account.")
         return email
 
@@ -80,7 +100,7 @@ class ProfileUpdateForm(BaseModelForm):
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if User.objects.exclude(pk=self.instance.pk).filter(email__iexact=email).exists():
+        if User.objects.exclude(pk=self.instance.pk).filter(email__lower=Lower(Value(email))).exists():
             raise forms.ValidationError("This email is already used by another account.")
         return email
 
@@ -130,10 +150,52 @@ class BlockUserForm(forms.Form):
     )
 
 
-class TicketForm(forms.ModelForm):
+class UploadTokenMixin:
+    """
+    Adds the hidden field upload_token to a form with an image field: the token
+    of a chunked upload (see LITReview/uploads.py) sent by form_page.html instead
+    of the file. The finished upload of the user then becomes the image
+    (validated like an uploaded file) and is available as stored_upload, to be
+    released with uploads.finish once the ticket is saved. A file posted
+    directly in the image field is limited to settings.UPLOAD_MAX_BYTES too.
+    """
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.stored_upload = None
+        self.fields['upload_token'] = forms.CharField(required=False, widget=forms.HiddenInput(attrs={
+            'data-upload-url': reverse('upload_start'),
+            'data-max-bytes': settings.UPLOAD_MAX_BYTES,
+            'data-chunk-bytes': settings.UPLOAD_CHUNK_SIZE,
+        }))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        token = cleaned_data.get('upload_token')
+        if token:
+            stored = uploads.open_upload(self.user, token) if self.user else None
+            if stored is None:
+                self.add_error('image', "Envoi de l'image introuvable ou incomplet.")
+                return cleaned_data
+            try:
+                cleaned_data['image'] = forms.ImageField().clean(stored)
+            except ValidationError as error:
+                stored.close()
+                self.add_error('image', error)
+            else:
+                self.stored_upload = stored
+        elif isinstance(cleaned_data.get('image'), UploadedFile) and (
+            cleaned_data['image'].size > settings.UPLOAD_MAX_BYTES
+        ):
+            self.add_error('image', f"Image trop volumineuse (maximum {settings.UPLOAD_MAX_BYTES} octets).")
+        return cleaned_data
+
+
+class TicketForm(UploadTokenMixin, forms.ModelForm):
     """
     Form to create or update a Ticket.
-    Includes: title, description, image.
+    Includes: title, description, image (or upload_token, see UploadTokenMixin).
     """
 
     class Meta:
@@ -173,10 +235,10 @@ class ReviewForm(forms.ModelForm):
         })
 
 
-class TicketReviewForm(forms.Form):
+class TicketReviewForm(UploadTokenMixin, forms.Form):
     """
     Form to create Ticket AND Review.
-    Includes: title, description, image.
+    Includes: title, description, image (or upload_token, see UploadTokenMixin).
     Includes: headline (title), body (comment), rating (0 - 5).
     """
 
@@ -0,0 +1,140 @@
+"""
+Cache of the rendered ticket and review snippets (template fragment cache).
+
+The viewer-independent part of feed/partials/ticket_snippet.html (title,
+statistics, description, image) and of review_snippet.html (headline, stars,
+body) is wrapped in {% fragment obj %} (templatetags/fragments.py) and cached
+under a key made of the version token of the object (id and time_updated, see
+versions.py), a digest of its derived fields (DERIVED_FIELDS: review
+statistics, image variants, written by UPDATEs that leave time_updated alone),
+its fragment version and the language:
+
+    fragment:LITReview.ticket:42:<time_updated>:<derived>:<version>:fr
+
+An object holding stale derived fields (a ticket unpickled from a cached feed
+page, or read from a lagging replica) thus never stores its rendering under the
+key of the current state.
+
+The viewer-specific parts ("Par vous", edit / delete buttons, "Critiquer ce
+ticket" according to has_review_by_user) stay outside of the fragment and are
+rendered on every request: a few {% if %}, no loop, no filter chain.
+
+Each object has a fragment version (a nanosecond timestamp) stored in the cache,
+bumped by the signal handlers (signals.py) when the rendering changes:
+- Ticket saved: the ticket,
+- Review saved / deleted: the review and its ticket (statistics),
+- image processed (images.record), statistics repaired (ticket_stats.reconcile):
+  the ticket.
+Writes that bypass the signals (QuerySet.update, bulk_create, raw SQL) must call
+bump() themselves. The versions are bumped once the transaction of the write is
+committed (transaction.on_commit): bumped earlier, a concurrent request could
+cache the rendering of the rows before the write under the new version.
+
+prefetch() loads the versions and the fragments of a whole page in two cache
+round trips (get_many), so that a feed page rendered from the cache costs no
+cache access per item. Works with any Django cache backend.
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import translation
+
+from .versions import version_token
+
+
+def _version_key(label, pk):
+    return f'fragment:version:{label}:{pk}'
+
+
+def _derived_digest(obj):
+    """Digest of the derived fields of obj (DERIVED_FIELDS of its model), '' without any."""
+    fields = getattr(obj, 'DERIVED_FIELDS', ())
+    if not fields:
+        return ''
+    values = json.dumps([getattr(obj, name) for name in fields], sort_keys=True, default=str)
+    return hashlib.md5(values.encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+def _fragment_key(obj, version):
+    pk, time_updated = version_token(obj)
+    return (
+        f'fragment:{obj._meta.label_lower}:{pk}:{time_updated.timestamp()}:{_derived_digest(obj)}:{version}:'
+        f'{translation.get_language()}'
+    )
+
+
+def bump(model, *pks):
+    """Invalidates the cached fragments of the model instances pks (once the transaction is committed)."""
+    keys = [_version_key(model._meta.label_lower, pk) for pk in pks]
+    transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, time.time_ns()), None))
+
+
+def forget(model, pk):
+    """Deletes the fragment version of a deleted instance (once the transaction is committed)."""
+    key = _version_key(model._meta.label_lower, pk)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def fragment_version(obj):
+    """Fragment version of obj (prefetched, or read from the cache; created on first use or after eviction)."""
+    version = getattr(obj, '_fragment_version', None)
+    if version is None:
+        key = _version_key(obj._meta.label_lower, obj.pk)
+        version = cache.get(key)
+        if version is None:
+            version = time.time_ns()
+            cache.set(key, version, None)
+        obj._fragment_version = version
+    return version
+
+
+def prefetch(objects):
+    """Loads the fragment versions and the cached fragments of objects (two get_many)."""
+    if not settings.FRAGMENT_CACHE_TIMEOUT:
+        return
+    objects = [obj for obj in objects if obj is not None and obj.pk is not None]
+    keys = {obj: _version_key(obj._meta.label_lower, obj.pk) for obj in objects}
+    versions = cache.get_many(set(keys.values()))
+    missing = {key: time.time_ns() for key in set(keys.values()) - versions.keys()}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    for obj in objects:
+        obj._fragment_version = versions[keys[obj]]
+
+    keys = {obj: _fragment_key(obj, obj._fragment_version) for obj in objects}
+    found = cache.get_many(set(keys.values()))
+    for obj in objects:
+        if keys[obj] in found:
+            obj._fragment_html = found[keys[obj]]
+
+
+def feed_objects(items):
+    """Tickets and reviews of a page of feed.build_feed items."""
+    for item in items:
+        if item['kind'] == 'ticket_block':
+            yield item['ticket']
+            yield from item['reviews']
+        else:
+            yield item['review']
+
+
+def render(obj, render_fragment):
+    """The fragment of obj, from the cache or rendered by render_fragment() and cached."""
+    timeout = settings.FRAGMENT_CACHE_TIMEOUT
+    if not timeout or obj is None or obj.pk is None:
+        return render_fragment()
+    html = getattr(obj, '_fragment_html', None)
+    if html is None:
+        key = _fragment_key(obj, fragment_version(obj))
+        html = cache.get(key)
+        if html is None:
+            html = render_fragment()
+            cache.set(key, html, timeout)
+        obj._fragment_html = html
+    return html
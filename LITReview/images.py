@@ -0,0 +1,251 @@
+"""
+Responsive derivatives of the ticket images.
+
+The original upload (Ticket.image) is checked (decompression bombs) and stripped
+of its metadata (EXIF, GPS position...), but the feed never serves it: each
+image is resized to settings.IMAGE_VARIANT_WIDTHS and re-encoded in every
+format of settings.IMAGE_VARIANT_FORMATS, next to the original:
+
+    media/blobs/3f/a2/3fa2...c9.jpeg
+    media/blobs/3f/a2/3fa2...c9.120w.webp
+    media/blobs/3f/a2/3fa2...c9.120w.jpeg
+    media/blobs/3f/a2/3fa2...c9.240w.webp
+    ...
+
+The result is recorded in Ticket.image_variants, so that the snippets build
+their srcset / width / height without any query nor file access:
+
+    {'source': 'blobs/3f/a2/3fa2...c9.jpeg', 'width': 800, 'height': 1200,
+     'formats': {'webp': [['blobs/3f/a2/3fa2...c9.120w.webp', 120, 180], ...], 'jpeg': [...]}}
+
+While the image waits for a worker, image_variants is {'source': ..., 'status':
+'pending'} and the snippet shows a placeholder; an unsafe or unreadable image is
+recorded as 'failed' and never shown. Tickets uploaded before the pipeline
+(empty dict) keep serving their original file.
+
+Images are processed whenever the image of a ticket changes (Ticket signal
+handler, signals.py): off-request by the process_media worker when
+settings.MEDIA_QUEUE is enabled (see media_queue.py), in the request otherwise.
+"""
+
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from PIL import Image, ImageOps
+
+from . import blobs, feed_cache, fragments
+from .models import Ticket
+
+logger = logging.getLogger(__name__)
+
+# Pillow format name and MIME type of each variant format
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+
+def variant_name(name, width, fmt):
+    """Storage name of the fmt variant of name resized to width: 'a/b.jpg' -> 'a/b.240w.webp'."""
+    stem, _ = os.path.splitext(name)
+    return f'{stem}.{width}w.{fmt}'
+
+
+def needs_variants(ticket):
+    """True when the image of ticket changed since its variants were built (or queued)."""
+    source = ticket.image.name if ticket.image else None
+    return ticket.image_variants.get('source') != source
+
+
+class UnsafeImage(ValueError):
+    """Raised for images that must not be decoded (decompression bombs)."""
+
+
+def check_image(image):
+    """Raises UnsafeImage when the header of image announces more than settings.IMAGE_MAX_PIXELS."""
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise UnsafeImage(f"{width}x{height} pixels, more than IMAGE_MAX_PIXELS ({settings.IMAGE_MAX_PIXELS})")
+
+
+def _has_metadata(image):
+    """True when image carries EXIF / XMP / comment metadata (camera, GPS position...)."""
+    return any(key in image.info for key in ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment'))
+
+
+def _encode(image, fmt):
+    """Encodes a Pillow image in fmt, with the settings of the format."""
+    pil_format, _ = FORMATS[fmt]
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    if pil_format == 'JPEG':
+        image.save(buffer, pil_format, quality=settings.IMAGE_VARIANT_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, pil_format, quality=settings.IMAGE_VARIANT_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def _strip(storage, name, image):
+    """
+    Stores a copy of the original without its metadata (orientation applied to
+    the pixels). Returns the storage name of the copy: a new blob, the original
+    blob being released when the copy is recorded on the ticket.
+    """
+    buffer = BytesIO()
+    params = {'quality': 90} if image.format == 'JPEG' else {}
+    ImageOps.exif_transpose(image).save(buffer, image.format, **params)
+    return storage.save(os.path.basename(name), ContentFile(buffer.getvalue()))
+
+
+def _to_blob(storage, name, file):
+    """
+    Stores a content-addressed copy of an image uploaded before content
+    addressing (storage.py) and returns its name: the variants are named after
+    it, the ticket moving to it when they are recorded (the legacy file is left
+    to gc_media).
+    """
+    file.seek(0)
+    return storage.save(os.path.basename(name), File(file))
+
+
+def build_variants(storage, name, original):
+    """
+    Builds the variants of the image stored under name (decoded as original)
+    and saves them in storage. Returns the image_variants dict describing them.
+
+    Widths larger than the original are skipped (no upscaling), except that the
+    smallest width always exists (at the original size when it is smaller).
+    Variants already stored are reused: a blob never changes (storage.py), nor
+    do the variants named after it.
+    """
+    width, height = original.size
+    widths = sorted({min(w, width) for w in settings.IMAGE_VARIANT_WIDTHS})
+    formats = {fmt: [] for fmt in settings.IMAGE_VARIANT_FORMATS}
+    for target in widths:
+        resized = None
+        for fmt in formats:
+            variant = variant_name(name, target, fmt)
+            if storage.exists(variant):
+                with storage.open(variant, 'rb') as file, Image.open(file) as existing:
+                    formats[fmt].append([variant, *existing.size])
+                continue
+            if resized is None:
+                resized = original.copy()
+                resized.thumbnail((target, round(height * target / width) or 1), Image.Resampling.LANCZOS)
+            variant = storage.save(variant, ContentFile(_encode(resized, fmt)))
+            formats[fmt].append([variant, resized.width, resized.height])
+    return {'source': name, 'width': width, 'height': height, 'formats': formats}
+
+
+def process(storage, name):
+    """
+    Full processing of an uploaded image: decompression-bomb check, metadata
+    stripping and variants. Returns the image_variants dict, whose 'source' is
+    the name of the (possibly rewritten) original.
+
+    An image stored before content addressing is copied to a blob first, so
+    that its variants are named after the blob (storage.py stores any other
+    name under the hash of its content).
+
+    No database access: runs in the worker processes of process_media.
+    """
+    with storage.open(name, 'rb') as file:
+        with Image.open(file) as image:
+            check_image(image)
+            image.load()
+            if _has_metadata(image):
+                name = _strip(storage, name, image)
+            elif not storage.is_blob(name):
+                name = _to_blob(storage, name, file)
+            original = ImageOps.exif_transpose(image)
+    return build_variants(storage, name, original)
+
+
+def failed(name):
+    """image_variants of an image that cannot be processed (never served)."""
+    return {'source': name, 'status': 'failed'}
+
+
+def pending(name):
+    """image_variants of an image waiting for process_media (placeholder)."""
+    return {'source': name, 'status': 'pending'}
+
+
+def record(ticket_id, name, variants):
+    """
+    Records the variants of the image name on the ticket, unless its image was
+    replaced meanwhile (a single UPDATE of image / image_variants, which save()
+    never overwrites). Returns True when the ticket was updated.
+
+    When the original was rewritten (metadata stripped), the ticket moves to the
+    new blob: the reference is taken on the new blob and released on the old one.
+    The cached snippet of the ticket (fragments.py) and the cached feed pages and
+    ETags of the readers of its author (feed_cache.py) are invalidated.
+    """
+    source = variants['source']
+    if source != name:
+        blobs.acquire(source)
+    updated = bool(Ticket.objects.filter(pk=ticket_id, image=name).update(image=source, image_variants=variants))
+    if source != name:
+        blobs.release(name if updated else source)
+    if updated:
+        fragments.bump(Ticket, ticket_id)
+        feed_cache.bump_audiences(*Ticket.objects.filter(pk=ticket_id).values_list('user', flat=True))
+    return updated
+
+
+def generate_for(ticket):
+    """
+    Processes the image of ticket in the current process (settings.MEDIA_QUEUE
+    disabled) and records the result on the ticket.
+
+    An unsafe or unreadable image is logged and recorded as failed (so that it
+    is not retried on every save) and is never served.
+    """
+    name = ticket.image.name
+    try:
+        variants = process(ticket.image.storage, name)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.exception("Cannot process %s", name)
+        variants = failed(name)
+    record(ticket.pk, name, variants)
+    ticket.image.name, ticket.image_variants = variants['source'], variants
+    return variants
+
+
+def responsive(ticket):
+    """
+    Context of feed/partials/responsive_image.html for the image of ticket:
+    the fallback <img> (src, srcset, width, height, in the last, most compatible
+    format) and one <source> srcset per other format, {'placeholder': True}
+    while the image is being processed, None when there is nothing to show.
+    """
+    if not ticket.image:
+        return None
+    variants = ticket.image_variants
+    if not variants:
+        # Uploaded before the variants existed: the original file
+        return {'src': ticket.image.url, 'srcset': '', 'sources': [], 'width': None, 'height': None}
+    if variants.get('source') != ticket.image.name or variants.get('status') == 'pending':
+        return {'placeholder': True}
+    if 'formats' not in variants:
+        # Failed (unsafe or unreadable upload): never served
+        return None
+    storage = ticket.image.storage
+    srcsets = {
+        fmt: ', '.join(f'{storage.url(name)} {width}w' for name, width, _ in items)
+        for fmt, items in variants['formats'].items()
+    }
+    *others, fallback = variants['formats']
+    name, width, height = variants['formats'][fallback][0]
+    return {
+        'src': storage.url(name),
+        'srcset': srcsets[fallback],
+        'sources': [{'type': FORMATS[fmt][1], 'srcset': srcsets[fmt]} for fmt in others],
+        'width': width,
+        'height': height,
+    }
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from LITReview import assets
+
+
+class Command(BaseCommand):
+    """
+    Concatenates and minifies the stylesheet bundles of settings.ASSET_BUNDLES
+    into content-hashed files, and writes the manifest read by {% stylesheet %}
+    (LITReview/assets.py).
+
+    Usage:
+    - python manage.py build_assets
+    - python manage.py build_assets && python manage.py collectstatic    (deployment)
+
+    Run it again after every change of a stylesheet: until then, the pages keep
+    linking the previous bundle.
+    """
+
+    help = "Bundles and minifies the stylesheets into content-hashed files listed in a manifest."
+
+    def handle(self, *args, **options):
+        for bundle, name in assets.build().items():
+            self.stdout.write(f"{bundle} -> {name}")
+        self.stdout.write(self.style.SUCCESS(f"Manifest written to {assets.build_dir()}."))
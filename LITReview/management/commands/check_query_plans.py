@@ -0,0 +1,176 @@
+import random
+import re
+
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from LITReview import timeline, versions, views
+from LITReview.feed import build_feed
+from LITReview.models import Ticket, Review, UserFollows, BlockedUser
+
+# "SCAN LITReview_ticket" (full scan of a table or of a table alias such as U0), as opposed to
+# "SCAN ... USING [COVERING] INDEX ...", "SEARCH ..." or scans of subqueries ("SCAN subquery").
+SCAN = re.compile(r'^SCAN (\S+)$')
+TABLE_ALIAS = re.compile(r'^[A-Z]\d+$')
+
+
+class Rollback(Exception):
+    """Raised to roll back the seeded dataset."""
+
+
+class Command(BaseCommand):
+    """
+    Checks that the queries of the main views never scan a whole table.
+
+    Seeds a dataset inside a transaction (rolled back at the end), calls each view
+    (flux with every FEED_STRATEGY, posts, subscriptions, follow, sign-up and
+    profile email checks, review forms, incremental sync), captures
+    its queries and runs EXPLAIN QUERY PLAN on each of them. Exits with an error
+    listing the offending queries if any plan contains a full table scan.
+
+    Usage:
+    - python manage.py check_query_plans [--users 300] [--verbose]
+
+    SQLite only (EXPLAIN QUERY PLAN).
+    """
+
+    help = "Fails if a query of the main views does a full table scan on a seeded dataset (SQLite)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=300, help="Number of seeded users.")
+        parser.add_argument('--verbose', action='store_true', help="Print every query plan.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("check_query_plans only supports SQLite (EXPLAIN QUERY PLAN).")
+        self.verbose = options['verbose']
+        self.failures = []
+        try:
+            with transaction.atomic(), override_settings(FEED_CACHE_TIMEOUT=0):
+                user = self.seed(options['users'])
+                self.check_views(user)
+                raise Rollback
+        except Rollback:
+            pass
+        if self.failures:
+            for label, sql, detail in self.failures:
+                self.stderr.write(f"[{label}] {detail}\n    {sql}")
+            raise CommandError(f"{len(self.failures)} full table scan(s) found.")
+        self.stdout.write(self.style.SUCCESS("No full table scan."))
+
+    def seed(self, count):
+        """Creates count users following / reviewing each other, returns the user whose pages are checked."""
+        rng = random.Random(0)
+        User.objects.bulk_create(
+            [User(username=f'plan{i}', email=f'plan{i}@example.com', password='!') for i in range(count)]
+        )
+        users = list(User.objects.filter(username__startswith='plan'))
+        ids = [u.id for u in users]
+        UserFollows.objects.bulk_create(
+            [UserFollows(user_id=u, followed_user_id=f) for u in ids for f in rng.sample(ids, 10) if f != u],
+            ignore_conflicts=True,
+        )
+        BlockedUser.objects.bulk_create(
+            [BlockedUser(user_id=u, blocked_user_id=rng.choice(ids)) for u in ids[::10]], ignore_conflicts=True
+        )
+        Ticket.objects.bulk_create(
+            [Ticket(user_id=u, title=f'T{u}-{i}', description='-') for u in ids for i in range(5)]
+        )
+        ticket_ids = list(Ticket.objects.values_list('id', flat=True))
+        Review.objects.bulk_create([
+            Review(user_id=u, ticket_id=t, headline='-', body='-', rating=3)
+            for u in ids for t in rng.sample(ticket_ids, 5)
+        ])
+        # Planner statistics: on a too small dataset SQLite rightly prefers scans
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return users[0]
+
+    def check_views(self, user):
+        factory = RequestFactory()
+
+        def request(method, path, data=None):
+            req = getattr(factory, method)(path, data or {})
+            req.user = user
+            req.session = {}
+            req._messages = CookieStorage(req)
+            return req
+
+        for strategy in ('read', 'write', 'hybrid'):
+            with override_settings(FEED_STRATEGY=strategy, FEED_FANOUT_THRESHOLD=5):
+                if timeline.is_enabled():
+                    for u in User.objects.all():
+                        timeline.rebuild_for(u)
+                _, cursor = build_feed(user)
+                self.check_view(f'flux ({strategy})', views.flux_view, request('get', reverse('flux')))
+                self.check_view(
+                    f'flux ({strategy}, page 2)', views.flux_view,
+                    request('get', reverse('flux'), {'cursor': cursor}),
+                )
+        self.check_view('posts', views.user_posts_view, request('get', reverse('posts')))
+        self.check_view('posts (page 2)', views.user_posts_view, request('get', reverse('posts'), {'page': 2}))
+        self.check_view('subscriptions', views.subscriptions_view, request('get', reverse('subscriptions')))
+        self.check_view(
+            'subscriptions (follow)', views.subscriptions_view,
+            request('post', reverse('subscriptions'), {'username': 'PLAN1'}),
+        )
+        self.check_view(
+            'sign_up (email check)', views.signup_view,
+            request('post', reverse('sign_up'), {
+                'username': 'new', 'email': 'PLAN1@example.com', 'password1': 'a', 'password2': 'b',
+            }),
+        )
+        self.check_view(
+            'profile (email check)', views.profile_view,
+            request('post', reverse('profile'), {'username': '', 'email': 'plan1@EXAMPLE.com'}),
+        )
+        self.check_view(
+            'create_ticket_review (similar tickets)', views.create_ticket_and_review_view,
+            request('post', reverse('create_ticket_review'), {
+                'title': 't5-1', 'description': '-', 'headline': '-', 'body': '-', 'rating': 3,
+            }),
+        )
+        ticket = Ticket.objects.exclude(user=user).first()
+        self.check_view(
+            'create_review_response', views.create_review_response_view,
+            request('get', reverse('create_review_response', args=[ticket.id])), ticket.id,
+        )
+        for model in (Ticket, Review):
+            since = versions.version_token(model.objects.order_by('time_updated', 'pk')[100])
+            self.check_view(
+                f'sync ({model._meta.verbose_name_plural} changed since)',
+                lambda req, model=model, since=since: list(versions.changed_since(model.objects.all(), since)[:100]),
+                request('get', '/'),
+            )
+
+    def check_view(self, label, view, request, *args):
+        """Calls view, then runs EXPLAIN QUERY PLAN on every SELECT it executed."""
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with transaction.atomic():
+            with connection.execute_wrapper(capture):
+                view(request, *args)
+            transaction.set_rollback(True)
+
+        tables = set(connection.introspection.table_names())
+        with connection.cursor() as cursor:
+            for sql, params in queries:
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    if self.verbose:
+                        self.stdout.write(f"[{label}] {detail}")
+                    scan = SCAN.match(detail)
+                    if scan and (scan.group(1) in tables or TABLE_ALIAS.match(scan.group(1))):
+                        self.failures.append((label, sql, detail))
+        self.stdout.write(f"{label}: {len(queries)} queries checked.")
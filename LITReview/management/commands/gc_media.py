@@ -0,0 +1,144 @@
+import os
+import re
+import time
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from LITReview import uploads
+from LITReview.models import Ticket, MediaBlob
+
+# Variant of an image (images.variant_name): '<stem>.240w.webp' belongs to '<stem>.<ext>'
+VARIANT = re.compile(r'^(?P<stem>.+)\.\d+w\.[a-z0-9]+$')
+
+
+class Command(BaseCommand):
+    """
+    Deletes the media files that no ticket references any more.
+
+    Streams over the files of the image storage and checks them against the
+    Ticket.image column one batch at a time, so that memory use does not grow
+    with the number of files:
+    - a file is referenced when it is the image of a ticket,
+    - a variant (images.py) when the image it was built from is referenced,
+    - any file listed in the Ticket.image_variants of a ticket: the names that
+      the rule above does not cover (variants not named after the image of
+      their ticket, built before images.py copied pre-blob images to a blob)
+      are collected in one streamed pass before the walk.
+    Unreferenced files older than the grace period (uploads whose ticket is not
+    saved yet are younger) are deleted, with the MediaBlob row of a blob.
+    Chunked uploads left unfinished for settings.UPLOAD_EXPIRY seconds are
+    deleted too (LITReview/uploads.py).
+
+    Usage:
+    - python manage.py gc_media --dry-run             (reports what would be deleted)
+    - python manage.py gc_media [--grace 86400] [--batch-size 500] [--verbose]
+    """
+
+    help = "Deletes unreferenced media files older than a grace period (streams storage and database in batches)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report unreferenced files without deleting them.")
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GC_GRACE, help="Minimum age (seconds) of deleted files."
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help="Files checked per query.")
+        parser.add_argument('--verbose', action='store_true', help="Print every unreferenced file.")
+
+    def handle(self, *args, **options):
+        storage = Ticket._meta.get_field('image').storage
+        if not hasattr(storage, 'location'):
+            raise CommandError("gc_media only supports file system storages.")
+        self.options = options
+        self.storage = storage
+        self.scanned = self.scanned_bytes = self.garbage = self.garbage_bytes = 0
+        self.listed = self.listed_variants(options['batch_size'])
+        cutoff = time.time() - options['grace']
+        batch = []
+        for name, size, mtime in self.walk(storage.location):
+            self.scanned += 1
+            self.scanned_bytes += size
+            if mtime > cutoff:
+                continue
+            batch.append((name, size))
+            if len(batch) >= options['batch_size']:
+                self.collect(batch)
+                batch = []
+        self.collect(batch)
+
+        if not options['dry_run']:
+            count, freed = uploads.purge_expired()
+            self.stdout.write(f"{count} expired upload(s) deleted ({freed} bytes).")
+
+        verb = "would be deleted" if options['dry_run'] else "deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.scanned} file(s) scanned ({self.scanned_bytes} bytes), "
+            f"{self.garbage} unreferenced file(s) {verb} ({self.garbage_bytes} bytes)."
+        ))
+
+    def walk(self, root):
+        """Yields (storage name, size, mtime) of every file under root, one directory entry at a time."""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat()
+                        name = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                        yield name, stat.st_size, stat.st_mtime
+
+    def listed_variants(self, chunk_size):
+        """Names listed in Ticket.image_variants that are not variants named after the image of their ticket."""
+        listed = set()
+        rows = Ticket.objects.exclude(image_variants={}).values_list('image', 'image_variants')
+        for image, variants in rows.iterator(chunk_size=chunk_size):
+            stem = os.path.splitext(image)[0]
+            names = [variants.get('source')] + [
+                item[0] for items in variants.get('formats', {}).values() for item in items
+            ]
+            for name in names:
+                match = VARIANT.match(name or '')
+                if name and name != image and not (match and match.group('stem') == stem):
+                    listed.add(name)
+        return listed
+
+    def referenced(self, names):
+        """Subset of names referenced by a ticket (two indexed queries)."""
+        found = set(Ticket.objects.filter(image__in=names).values_list('image', flat=True))
+        found.update(name for name in names if name in self.listed)
+        stems = {VARIANT.match(n).group('stem') for n in names if n not in found and VARIANT.match(n)}
+        if stems:
+            if connection.vendor == 'postgresql':
+                # LIKE '<stem>.%', an index range with the varchar_pattern_ops index (migration 0015);
+                # the text ordering of the column depends on the collation
+                ranges = reduce(or_, (Q(image__startswith=f'{stem}.') for stem in stems))
+            else:
+                # '<stem>.' <= image < '<stem>/': every extension of the stem, as an index range
+                ranges = reduce(or_, (Q(image__gte=f'{stem}.', image__lt=f'{stem}/') for stem in stems))
+            owners = {
+                os.path.splitext(name)[0] for name in Ticket.objects.filter(ranges).values_list('image', flat=True)
+            }
+            found.update(n for n in names if VARIANT.match(n) and VARIANT.match(n).group('stem') in owners)
+        return found
+
+    def collect(self, batch):
+        if not batch:
+            return
+        referenced = self.referenced([name for name, _ in batch])
+        garbage = [(name, size) for name, size in batch if name not in referenced]
+        for name, size in garbage:
+            if self.options['verbose']:
+                self.stdout.write(f"{name} ({size} bytes)")
+            if not self.options['dry_run']:
+                self.storage.delete(name)
+        if garbage and not self.options['dry_run']:
+            MediaBlob.objects.filter(name__in=[name for name, _ in garbage]).delete()
+        self.garbage += len(garbage)
+        self.garbage_bytes += sum(size for _, size in garbage)
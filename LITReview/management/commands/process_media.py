@@ -0,0 +1,106 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from LITReview import media_queue
+
+
+class Command(BaseCommand):
+    """
+    Worker of the image processing queue (see LITReview/media_queue.py).
+
+    Claims the pending MediaJob rows and processes their images (decompression
+    bomb check, metadata stripping, WebP / JPEG variants) in a pool of processes,
+    then records the variants on the tickets.
+
+    Usage:
+    - python manage.py process_media                  (runs until interrupted, polls the queue)
+    - python manage.py process_media --once           (processes the backlog, then exits)
+    - python manage.py process_media --workers 0      (no pool: processes in the command process)
+    - python manage.py process_media --retry-failed   (puts the failed jobs back in the queue first)
+    """
+
+    help = "Processes the queued ticket images (variants, EXIF stripping, bomb checks) in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.MEDIA_WORKERS or os.cpu_count(),
+            help="Number of worker processes (0: no pool).",
+        )
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty.")
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds between two polls of an empty queue.")
+        parser.add_argument('--retry-failed', action='store_true', help="Queue the failed jobs again.")
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write(f"{media_queue.retry_failed()} failed job(s) queued again.")
+        requeued = media_queue.requeue_stale()
+        if requeued:
+            self.stdout.write(f"{requeued} stale job(s) queued again.")
+        workers = options['workers']
+        self.done = self.failed = 0
+        executor = self.executor(workers)
+        try:
+            while True:
+                jobs = media_queue.claim(max(workers, 1) * 2)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                if executor is None:
+                    self.run_inline(jobs)
+                elif not self.run_pool(executor, jobs):
+                    # A worker process died (out of memory...): start a new pool
+                    executor.shutdown(cancel_futures=True)
+                    executor = self.executor(workers)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        self.stdout.write(self.style.SUCCESS(f"{self.done} image(s) processed, {self.failed} failed."))
+
+    def executor(self, workers):
+        # django.setup: the worker processes need the apps (start methods other than fork)
+        return ProcessPoolExecutor(max_workers=workers, initializer=django.setup) if workers else None
+
+    def run_inline(self, jobs):
+        for job in jobs:
+            try:
+                variants = media_queue.run(job.source)
+            except Exception as exc:
+                self.record_failure(job, exc)
+            else:
+                self.record_success(job, variants)
+
+    def run_pool(self, executor, jobs):
+        """Runs jobs in the pool. Returns False if the pool broke."""
+        futures = {executor.submit(media_queue.run, job.source): job for job in jobs}
+        healthy = True
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                variants = future.result()
+            except BrokenProcessPool as exc:
+                healthy = False
+                self.record_failure(job, exc)
+            except Exception as exc:
+                self.record_failure(job, exc)
+            else:
+                self.record_success(job, variants)
+        return healthy
+
+    def record_success(self, job, variants):
+        media_queue.complete(job, variants)
+        self.done += 1
+
+    def record_failure(self, job, exc):
+        media_queue.fail(job, f"{type(exc).__name__}: {exc}")
+        self.failed += 1
+        self.stderr.write(f"{job.source}: {type(exc).__name__}: {exc}")
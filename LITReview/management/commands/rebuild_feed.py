@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from LITReview import timeline
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the materialized feeds (FeedEntry timeline) from scratch.
+
+    Usage:
+    - python manage.py rebuild_feed                  (every user)
+    - python manage.py rebuild_feed --user alice     (a single user)
+
+    Run it before switching settings.FEED_STRATEGY from 'read' to 'write'.
+    Without --user, the popular authors are first recorded as pulled at read
+    time ('hybrid'), and the recorded authors who are no longer popular are
+    released: their posts are pushed to their followers.
+    """
+
+    help = "Rebuilds the FeedEntry timeline of every user (or of --user) from follows and blocks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username of the only feed to rebuild.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"User {options['user']!r} does not exist.")
+        else:
+            released = timeline.settle_authors()
+            if released:
+                self.stdout.write(f"{released} author(s) no longer pulled at read time.")
+        count = 0
+        for user in users.iterator(chunk_size=timeline.BATCH_SIZE):
+            timeline.rebuild_for(user)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"{count} feed(s) rebuilt."))
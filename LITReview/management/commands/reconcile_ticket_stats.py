@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from LITReview import ticket_stats
+
+
+class Command(BaseCommand):
+    """
+    Repairs the denormalized review statistics of the tickets (review_count,
+    rating_sum, last_reviewed_at) from the Review rows.
+
+    Usage:
+    - python manage.py reconcile_ticket_stats              (rewrites the drifted tickets)
+    - python manage.py reconcile_ticket_stats --dry-run    (only counts them)
+
+    Run it after writes that bypass the signals (bulk_create, QuerySet.update or
+    delete, raw SQL, restored backups).
+    """
+
+    help = "Recomputes review_count, rating_sum and last_reviewed_at of the tickets that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted tickets without fixing them.")
+
+    def handle(self, *args, **options):
+        drifted = ticket_stats.reconcile(dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"{drifted} ticket(s) drifted.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{drifted} ticket(s) repaired."))
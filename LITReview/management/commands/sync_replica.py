@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from LITReview import replica
+
+
+class Command(BaseCommand):
+    """
+    Copies the SQLite database into the read replica file (LITReview/replica.py).
+
+    Uses the SQLite online backup API: the copy is a consistent snapshot taken
+    while the server keeps reading and writing, moved in place once complete.
+    The pages read from the replica (feed, posts, subscriptions lists) are as
+    fresh as the last copy: run it periodically, or with --interval.
+
+    Usage:
+    - python manage.py sync_replica                  (one copy)
+    - python manage.py sync_replica --interval 5     (a copy every 5 seconds, until interrupted)
+    """
+
+    help = "Copies the SQLite database into the read replica (online backup API), once or every --interval seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None, help="Seconds between two copies (loop).")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            try:
+                replica.sync()
+            except ValueError as error:
+                raise CommandError(str(error))
+            self.stdout.write(f"Replica synced in {(time.perf_counter() - started) * 1000:.0f} ms.")
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,107 @@
+"""
+DB-backed queue of the image processing jobs.
+
+Decoding, checking and resizing a camera photo takes hundreds of milliseconds
+in Pillow, so the views never do it: when settings.MEDIA_QUEUE is enabled, the
+Ticket signal handler (signals.py) only records a MediaJob and marks the image
+as pending (the snippet shows a placeholder, the ticket is visible right away).
+
+The process_media management command consumes the queue:
+
+1. claim: pending jobs are switched to 'running' one by one with a conditional
+   UPDATE, so that several workers never process the same job (on PostgreSQL:
+   SELECT ... FOR UPDATE SKIP LOCKED, workers claim distinct batches without
+   waiting for each other),
+2. run: images.process (bomb check, metadata stripping, variants) in a
+   ProcessPoolExecutor, without database access,
+3. record: the variants are written on the ticket (unless its image was
+   replaced meanwhile) and the job is deleted; failures stay in the table with
+   their error, the image being recorded as failed.
+
+Jobs left 'running' by a crashed worker are put back in the queue after
+settings.MEDIA_JOB_TIMEOUT seconds.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import images
+from .models import Ticket, MediaJob
+
+
+def submit(ticket):
+    """
+    Schedules the processing of the new image of ticket (processed in the current
+    process when settings.MEDIA_QUEUE is disabled), or forgets the variants of a
+    removed image.
+    """
+    ticket.media_jobs.filter(status=MediaJob.PENDING).delete()
+    if ticket.image and not settings.MEDIA_QUEUE:
+        images.generate_for(ticket)
+        return
+    variants = {}
+    if ticket.image:
+        MediaJob.objects.create(ticket=ticket, source=ticket.image.name)
+        variants = images.pending(ticket.image.name)
+    Ticket.objects.filter(pk=ticket.pk).update(image_variants=variants)
+    ticket.image_variants = variants
+
+
+def requeue_stale():
+    """Puts back in the queue the jobs claimed by a worker that died. Returns their number."""
+    limit = timezone.now() - timedelta(seconds=settings.MEDIA_JOB_TIMEOUT)
+    return MediaJob.objects.filter(status=MediaJob.RUNNING, time_started__lt=limit).update(status=MediaJob.PENDING)
+
+
+def retry_failed():
+    """Puts the failed jobs back in the queue. Returns their number."""
+    return MediaJob.objects.filter(status=MediaJob.FAILED).update(status=MediaJob.PENDING, error='')
+
+
+def claim(limit):
+    """Claims up to limit pending jobs, oldest first. Returns the claimed jobs."""
+    if connection.features.has_select_for_update_skip_locked:
+        # PostgreSQL: the rows locked by another worker are skipped, one UPDATE for the batch
+        with transaction.atomic():
+            claimed = list(
+                MediaJob.objects.select_for_update(skip_locked=True).filter(status=MediaJob.PENDING).order_by('id')[
+                    :limit
+                ]
+            )
+            MediaJob.objects.filter(pk__in=[job.pk for job in claimed]).update(
+                status=MediaJob.RUNNING, time_started=timezone.now()
+            )
+        return claimed
+    claimed = []
+    for job in MediaJob.objects.filter(status=MediaJob.PENDING).order_by('id')[:limit]:
+        # Conditional UPDATE: another worker may have claimed it since the SELECT
+        if MediaJob.objects.filter(pk=job.pk, status=MediaJob.PENDING).update(
+            status=MediaJob.RUNNING, time_started=timezone.now()
+        ):
+            claimed.append(job)
+    return claimed
+
+
+def run(name):
+    """Processes the image stored under name (in a worker process). Returns its image_variants."""
+    return images.process(Ticket._meta.get_field('image').storage, name)
+
+
+def complete(job, variants):
+    """Records the variants built by job and removes it from the queue."""
+    images.record(job.ticket_id, job.source, variants)
+    job.delete()
+
+
+def fail(job, error):
+    """
+    Records the image of job as failed (images.record: the snippet and the feeds
+    showing the placeholder are invalidated) and keeps the job with its error.
+    """
+    images.record(job.ticket_id, job.source, images.failed(job.source))
+    job.status = MediaJob.FAILED
+    job.error = error
+    job.save(update_fields=['status', 'error'])
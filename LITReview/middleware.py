@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+from . import connection_stats, replica
+
+
+class HtmlGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware restricted to the HTML pages (feed, forms), compressed on the
+    fly, chunk by chunk for streamed responses.
+
+    Files are left to serving.py: images and archives do not shrink, the text
+    assets have precompressed variants, and a compressed body would break their
+    byte ranges and strong ETags. GZipMiddleware pads the compressed pages with
+    random bytes against BREACH (the pages carry CSRF tokens).
+    """
+
+    def process_response(self, request, response):
+        if not response.get('Content-Type', '').startswith('text/html'):
+            return response
+        return super().process_response(request, response)
+
+
+class ReplicaMiddleware:
+    """
+    Read-your-writes for the read replica (replica.py): tracks the writes of
+    each request, and a request that wrote sets a cookie sending the reads of
+    the client to the primary for settings.REPLICA_STICKY_SECONDS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = replica.begin_request(sticky=replica.STICKY_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = replica.end_request(token)
+        if wrote:
+            response.set_cookie(
+                replica.STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class ConnectionStatsMiddleware:
+    """
+    Reports the database connections opened (connection_stats.py) when
+    settings.CONNECTION_STATS is enabled: X-DB-Connections-Opened, opened while
+    handling the request (0 when a persistent connection was reused), and
+    X-DB-Connections-Total, opened by the server process since it started.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.CONNECTION_STATS:
+            return self.get_response(request)
+        token = connection_stats.begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            opened = connection_stats.end_request(token)
+        response['X-DB-Connections-Opened'] = sum(opened.values())
+        response['X-DB-Connections-Total'] = sum(connection_stats.totals().values())
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 5.0 on 2026-10-17 00:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LITReview', '0004_alter_review_body'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ticket', 'Ticket'), ('review', 'Review')], max_length=6)),
+                ('item_id', models.PositiveBigIntegerField()),
+                ('time_created', models.DateTimeField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', '-time_created', '-kind', '-item_id'], name='feedentry_owner_page_idx'), models.Index(fields=['kind', 'item_id'], name='feedentry_item_idx')],
+                'unique_together': {('owner', 'kind', 'item_id')},
+            },
+        ),
+    ]
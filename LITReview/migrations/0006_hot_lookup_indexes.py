@@ -0,0 +1,39 @@
+# Generated by Django 5.0 on 2026-10-17 00:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LITReview', '0005_feedentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blockeduser',
+            index=models.Index(fields=['blocked_user', 'user'], name='blockeduser_blocked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', '-time_created'], name='review_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['ticket', '-time_created'], name='review_ticket_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', 'ticket'], name='review_user_ticket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['user', '-time_created'], name='ticket_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfollows',
+            index=models.Index(fields=['followed_user', 'user'], name='userfollows_followed_idx'),
+        ),
+    ]
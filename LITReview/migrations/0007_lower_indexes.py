@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-17 00:49
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LITReview', '0006_hot_lookup_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # auth.User belongs to django.contrib.auth: its functional indexes are created in raw SQL
+        # (supported as-is by SQLite and PostgreSQL).
+        migrations.RunSQL(
+            'CREATE INDEX auth_user_username_lower_idx ON auth_user (LOWER(username));',
+            reverse_sql='DROP INDEX auth_user_username_lower_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX auth_user_email_lower_idx ON auth_user (LOWER(email));',
+            reverse_sql='DROP INDEX auth_user_email_lower_idx;',
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(django.db.models.functions.text.Lower('title'), name='ticket_title_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0 on 2026-10-17 00:53
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_stats(apps, schema_editor):
+    """Computes the statistics of the existing tickets from their reviews (one UPDATE)."""
+    Ticket = apps.get_model('LITReview', 'Ticket')
+    Review = apps.get_model('LITReview', 'Review')
+    reviews = Review.objects.filter(ticket=OuterRef('pk')).order_by().values('ticket')
+    Ticket.objects.update(
+        review_count=Coalesce(
+            Subquery(reviews.annotate(n=Count('id')).values('n')), Value(0), output_field=IntegerField()
+        ),
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(s=Sum('rating')).values('s')), Value(0), output_field=IntegerField()
+        ),
+        last_reviewed_at=Subquery(reviews.annotate(m=Max('time_created')).values('m')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LITReview', '0007_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='last_reviewed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-17 01:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LITReview', '0009_ticket_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('failed', 'Failed')], default='pending', max_length=7)),
+                ('error', models.TextField(blank=True)),
+                ('time_created', models.DateTimeField(auto_now_add=True)),
+                ('time_started', models.DateTimeField(blank=True, null=True)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media_jobs', to='LITReview.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='mediajob_status_idx')],
+            },
+        ),
+    ]
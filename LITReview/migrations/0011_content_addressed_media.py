@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-17 01:05
+
+import LITReview.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LITReview', '0010_mediajob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('time_created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='image',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=LITReview.storage.ContentAddressedStorage(), upload_to=''),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-17 01:34
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_time_updated(apps, schema_editor):
+    """Existing tickets and reviews were last written when created (one UPDATE per table)."""
+    for model in ('Ticket', 'Review'):
+        apps.get_model('LITReview', model).objects.update(time_updated=F('time_created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LITReview', '0013_upload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='time_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='time_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_time_updated, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['time_updated', 'id'], name='review_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['time_updated', 'id'], name='ticket_updated_idx'),
+        ),
+    ]
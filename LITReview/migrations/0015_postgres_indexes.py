@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_pattern_index(apps, schema_editor):
+    """
+    PostgreSQL: image LIKE 'stem.%' (gc_media) uses a btree index only with the
+    varchar_pattern_ops operator class when the database collation is not C.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('LITReview', 'Ticket')._meta.db_table)
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS ticket_image_pattern_idx ON {table} (image varchar_pattern_ops)'
+    )
+
+
+def drop_pattern_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS ticket_image_pattern_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LITReview', '0014_time_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_pattern_index, drop_pattern_index),
+    ]
@@ -1,7 +1,17 @@
-from django.db import models
+import secrets
+
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .storage import ContentAddressedStorage
+
+# Case-insensitive lookups able to use the LOWER(...) functional indexes:
+# User.objects.filter(username__lower=Lower(Value(name))) -> WHERE LOWER(username) = LOWER(%s)
+# (username__iexact compiles to a LIKE / UPPER() comparison that no index can serve).
+models.CharField.register_lookup(Lower)
+
 
 class Ticket(models.Model):
     """
@@ -13,13 +23,60 @@ class Ticket(models.Model):
     - user: user who created the ticket.
     - image: optional associated image.
     - time_created: timestamp of ticket creation.
+    - time_updated: timestamp of the last save() (creation, edit), see LITReview/versions.py.
+    - review_count, rating_sum, last_reviewed_at: denormalized statistics of the
+      reviews of the ticket, maintained by signals (see LITReview/ticket_stats.py).
+    - image_variants: resized / re-encoded copies of the image (see LITReview/images.py).
+
+    Notes:
+    - save() never writes the derived fields of an existing ticket (only their own
+      UPDATEs do), so that editing a ticket cannot overwrite a review counted or
+      variants built in the meantime.
     """
 
+    # Maintained by ticket_stats.py only
+    STATS_FIELDS = ['review_count', 'rating_sum', 'last_reviewed_at']
+    # Written by their own UPDATEs, never by save() on an existing ticket
+    DERIVED_FIELDS = STATS_FIELDS + ['image_variants']
+
     title = models.CharField(max_length=128)
     description = models.TextField(max_length=2048)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    image = models.ImageField(blank=True, null=True)
+    # Content-addressed and deduplicated (see LITReview/storage.py, LITReview/blobs.py)
+    image = models.ImageField(blank=True, null=True, max_length=255, storage=ContentAddressedStorage())
     time_created = models.DateTimeField(auto_now_add=True)
+    time_updated = models.DateTimeField(auto_now=True)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    last_reviewed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Feed and posts: WHERE user = ? ORDER BY time_created DESC
+            models.Index(fields=['user', '-time_created'], name='ticket_user_time_idx'),
+            # Similar tickets: WHERE LOWER(title) = LOWER(?)
+            models.Index(Lower('title'), name='ticket_title_lower_idx'),
+            # Blob references (gc_media, variants): WHERE image IN (...) / image BETWEEN ? AND ?
+            models.Index(fields=['image'], name='ticket_image_idx'),
+            # Incremental sync: WHERE (time_updated, id) > (?, ?) ORDER BY time_updated, id
+            models.Index(fields=['time_updated', 'id'], name='ticket_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def average_rating(self):
+        """Average rating of the reviews of the ticket (None without review)."""
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
 
 
 class Review(models.Model):
@@ -33,6 +90,7 @@ class Review(models.Model):
     - user: user who wrote the review.
     - ticket: ticket associated with this review.
     - time_created: timestamp of review creation.
+    - time_updated: timestamp of the last save() (creation, edit), see LITReview/versions.py.
     """
 
     rating = models.PositiveSmallIntegerField(
@@ -46,6 +104,19 @@ class Review(models.Model):
     # Allows direct access to the Ticket object via review.ticket.
     # To retrieve all reviews associated with a ticket, use ticket.review_set.
     time_created = models.DateTimeField(auto_now_add=True)
+    time_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Feed (orphan reviews) and posts: WHERE user = ? ORDER BY time_created DESC
+            models.Index(fields=['user', '-time_created'], name='review_user_time_idx'),
+            # Feed (reviews of a ticket block): WHERE ticket IN (...) ORDER BY time_created DESC
+            models.Index(fields=['ticket', '-time_created'], name='review_ticket_time_idx'),
+            # "Already reviewed" checks: WHERE user = ? AND ticket = ?
+            models.Index(fields=['user', 'ticket'], name='review_user_ticket_idx'),
+            # Incremental sync: WHERE (time_updated, id) > (?, ?) ORDER BY time_updated, id
+            models.Index(fields=['time_updated', 'id'], name='review_updated_idx'),
+        ]
 
 
 class UserFollows(models.Model):
@@ -84,6 +155,10 @@ class UserFollows(models.Model):
         unique_together = ('user', 'followed_user')
         # Constraint: Cannot follow another user more than once / IntegrityError.
         # SQL: UNIQUE (user_id, followed_user_id)
+        indexes = [
+            # Reverse lookups (followers of a user, fan-out): WHERE followed_user = ?
+            models.Index(fields=['followed_user', 'user'], name='userfollows_followed_idx'),
+        ]
 
 
 class BlockedUser(models.Model):
@@ -120,6 +195,10 @@ class BlockedUser(models.Model):
 
     class Meta:
         unique_together = ('user', 'blocked_user')
+        indexes = [
+            # Reverse lookups (users who blocked someone, fan-out): WHERE blocked_user = ?
+            models.Index(fields=['blocked_user', 'user'], name='blockeduser_blocked_idx'),
+        ]
 
     def __str__(self):
         return (
@@ -132,6 +211,172 @@ class BlockedUser(models.Model):
         Blocks target_user on behalf of user by removing any mutual follows
         and creating the block relation.
         """
-        UserFollows.objects.filter(user=user, followed_user=target_user).delete()
-        UserFollows.objects.filter(user=target_user, followed_user=user).delete()
-        cls.objects.get_or_create(user=user, blocked_user=target_user)
+        # Imported here: timeline imports the models. The feeds of the two users
+        # are resynced once, after the three writes.
+        from .timeline import batched
+
+        with transaction.atomic(), batched():
+            UserFollows.objects.filter(user=user, followed_user=target_user).delete()
+            UserFollows.objects.filter(user=target_user, followed_user=user).delete()
+            cls.objects.get_or_create(user=user, blocked_user=target_user)
+
+
+class FeedEntry(models.Model):
+    """
+    Model representing one line of a materialized feed (fan-out-on-write timeline).
+
+    Fields:
+    - owner: user whose feed contains the entry.
+    - kind: 'ticket' (ticket block) or 'review' (orphan review).
+    - item_id: ID of the Ticket or Review.
+    - time_created: copy of the item timestamp, used to order and paginate the feed.
+
+    Notes:
+    - Only used when settings.FEED_STRATEGY is not 'read' (see LITReview/timeline.py).
+    - Reviews shown inside a ticket block have no entry: they are loaded with the ticket.
+
+    Constraints:
+    - An item appears only once in a given feed (unique_together).
+    """
+
+    TICKET = 'ticket'
+    REVIEW = 'review'
+    KIND_CHOICES = [
+        (TICKET, 'Ticket'),
+        (REVIEW, 'Review'),
+    ]
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    kind = models.CharField(max_length=6, choices=KIND_CHOICES)
+    item_id = models.PositiveBigIntegerField()
+    time_created = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'kind', 'item_id')
+        indexes = [
+            # One range scan per feed page: WHERE owner = ? ORDER BY time_created, kind, item_id DESC
+            models.Index(fields=['owner', '-time_created', '-kind', '-item_id'], name='feedentry_owner_page_idx'),
+            # Removal of an item from every feed on delete
+            models.Index(fields=['kind', 'item_id'], name='feedentry_item_idx'),
+        ]
+
+
+class PulledAuthor(models.Model):
+    """
+    Model representing an author whose posts are pulled at read time ('hybrid' feed strategy).
+
+    Fields:
+    - author: user who wrote posts while popular, not pushed to the timelines of their followers.
+    - time_created: timestamp of the first post not pushed.
+
+    Notes:
+    - Recorded by LITReview/timeline.py before a post skips the fan-out. The feed
+      engine pulls the posts of every followed author recorded here, whatever
+      their current number of followers: the posts do not vanish from the feeds
+      when the author is no longer popular.
+    - Deleted by rebuild_feed once the posts of an author who is no longer
+      popular are pushed to the timelines of their followers.
+    """
+
+    author = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='pulled_feed')
+    time_created = models.DateTimeField(auto_now_add=True)
+
+
+class MediaJob(models.Model):
+    """
+    Model representing a pending image processing job (DB-backed queue).
+
+    Fields:
+    - ticket: ticket whose image must be processed.
+    - source: storage name of the image to process (the ticket may change it meanwhile).
+    - status: 'pending' (waiting for a worker), 'running' (claimed) or 'failed'.
+    - error: reason of the failure.
+    - time_created: timestamp of the upload.
+    - time_started: timestamp of the claim by a worker.
+
+    Notes:
+    - Jobs are created by the Ticket signal handler and consumed by the
+      process_media management command (see LITReview/media_queue.py).
+    - Successful jobs are deleted: the table only holds the backlog and the failures.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+
+    ticket = models.ForeignKey('Ticket', on_delete=models.CASCADE, related_name='media_jobs')
+    source = models.CharField(max_length=255)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+    time_created = models.DateTimeField(auto_now_add=True)
+    time_started = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claim of the oldest jobs: WHERE status = 'pending' ORDER BY id
+            models.Index(fields=['status', 'id'], name='mediajob_status_idx'),
+        ]
+
+
+class MediaBlob(models.Model):
+    """
+    Model representing the reference count of a content-addressed media file.
+
+    Fields:
+    - name: storage name of the blob (see LITReview/storage.py).
+    - refcount: number of tickets whose image is the blob.
+    - time_created: timestamp of the first reference.
+
+    Notes:
+    - Maintained by the Ticket signal handlers (see LITReview/blobs.py): when the
+      last ticket using a blob is deleted or changes its image, the blob and its
+      variants are deleted from the storage.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.PositiveIntegerField(default=0)
+    time_created = models.DateTimeField(auto_now_add=True)
+
+
+def new_upload_token():
+    return secrets.token_urlsafe(24)
+
+
+class Upload(models.Model):
+    """
+    Model representing a chunked, resumable image upload (see LITReview/uploads.py).
+
+    Fields:
+    - token: secret identifying the upload (URL of the chunks, hidden field of the ticket forms).
+    - user: user who uploads the file (the only one who can send chunks or attach it).
+    - filename: original file name.
+    - size: total size announced by the client, in bytes.
+    - received: bytes received so far (offset of the next chunk).
+    - time_created / time_updated: timestamps of the start and of the last chunk.
+
+    Notes:
+    - The bytes are written to settings.UPLOAD_TEMP_DIR, outside MEDIA_ROOT.
+    - The upload is deleted once attached to a ticket; expired uploads are
+      deleted by gc_media.
+    """
+
+    token = models.CharField(max_length=32, unique=True, default=new_upload_token, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    time_created = models.DateTimeField(auto_now_add=True)
+    time_updated = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self):
+        return self.received == self.size
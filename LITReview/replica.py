@@ -0,0 +1,198 @@
+"""
+Read replica: routing of the read-heavy pages to a copy of the database.
+
+The reads of the block `with replica.reads():` (the 'flux' and 'posts' pages,
+the lists of the subscriptions page) go to the database settings.REPLICA_DATABASE
+instead of 'default'; every other query, and every write, goes to 'default'
+(ReplicaRouter, settings.DATABASE_ROUTERS).
+
+The replica is used only when it can serve the reads:
+- it exists (for SQLite: the copy written by `python manage.py sync_replica`),
+- the request has not written, and the client has not written in the last
+  REPLICA_STICKY_SECONDS (cookie set by middleware.ReplicaMiddleware): a user
+  reads their own writes,
+- when reads(fresh_since=...) is given a feed version (feed_cache.feed_version,
+  bumped on every write affecting the feed of the user): the copy was taken
+  after it. A cached feed page is thus never built from a copy older than the
+  version in its key,
+- the copy is not older than settings.REPLICA_MAX_AGE seconds (when sync_replica
+  stopped running, the reads go back to the primary).
+
+The SQLite replica is a copy of the primary made with the online backup API
+(sync_replica), opened read-only (NAME 'file:...?mode=ro'); its date of copy is
+the modification time of the file. A persistent connection to the replica is
+reopened once the file is replaced by a newer copy. A replica of another
+backend (a PostgreSQL standby, DJANGO_DB_REPLICA_HOST) has an unknown lag: it is
+only used for reads without freshness requirement. A replica that is the
+primary itself (same NAME, HOST and PORT: test mirror, TEST['MIRROR']) is not
+used.
+"""
+
+import contextvars
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'primary_reads'
+# Always read from the primary: a session created since the last copy would be missing from the replica
+PRIMARY_APPS = {'sessions'}
+
+# Per request (ReplicaMiddleware): {'sticky': client wrote recently, 'wrote': the request wrote}
+_request = contextvars.ContextVar('replica_request', default=None)
+# Inside reads(): alias the reads are routed to
+_reads = contextvars.ContextVar('replica_reads', default=None)
+
+
+def replica_alias():
+    """Alias of the replica, None when no replica is configured."""
+    alias = settings.REPLICA_DATABASE
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def sqlite_path(name):
+    """File path of the SQLite database name (a path or a 'file:' URI)."""
+    name = str(name)
+    if name.startswith('file:'):
+        return unquote(urlsplit(name).path)
+    return name
+
+
+def is_primary(alias):
+    """True if the database alias is the primary database itself (test mirror)."""
+    replica, primary = connections[alias].settings_dict, connections[DEFAULT_DB_ALIAS].settings_dict
+    return all(replica.get(key) == primary.get(key) for key in ('NAME', 'HOST', 'PORT'))
+
+
+def synced_at(alias):
+    """
+    Date (ns timestamp) up to which the SQLite replica alias holds the writes of
+    the primary, None if unknown (other backends) or not synced yet.
+    """
+    replica = connections[alias].settings_dict
+    if connections[alias].vendor != 'sqlite':
+        return None
+    try:
+        return os.stat(sqlite_path(replica['NAME'])).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _reopen_if_replaced(alias, synced):
+    """
+    Closes a persistent connection (CONN_MAX_AGE) to the SQLite replica alias
+    opened on an older copy: sync() replaces the file, and an open connection
+    keeps reading the file it opened.
+    """
+    connection = connections[alias]
+    if connection.connection is not None and getattr(connection, 'replica_synced_at', None) != synced:
+        connection.close()
+    connection.replica_synced_at = synced
+
+
+def available(fresh_since=None):
+    """Alias of the replica if it can serve the reads of the current request, else None."""
+    alias = replica_alias()
+    state = _request.get()
+    if alias is None or is_primary(alias) or (state and (state['sticky'] or state['wrote'])):
+        return None
+    synced = synced_at(alias)
+    _reopen_if_replaced(alias, synced)
+    if fresh_since is None:
+        fresh = synced is not None or connections[alias].vendor != 'sqlite'
+    else:
+        fresh = synced is not None and synced >= fresh_since
+    if fresh and synced is not None and settings.REPLICA_MAX_AGE is not None:
+        fresh = time.time_ns() - synced <= settings.REPLICA_MAX_AGE * 1_000_000_000
+    return alias if fresh else None
+
+
+def sync(path=None):
+    """
+    Copies the primary (SQLite) into the replica file path (by default the one
+    of the replica alias) with the online backup API: consistent snapshot taken
+    while the primary keeps serving, written to a temporary file then moved in
+    place, so readers never see a partial copy. Returns the date of the copy.
+    """
+    primary = connections[DEFAULT_DB_ALIAS]
+    if primary.vendor != 'sqlite':
+        raise ValueError("sync only copies a SQLite primary.")
+    if path is None:
+        alias = replica_alias()
+        if alias is None or is_primary(alias):
+            raise ValueError("No replica distinct from the primary is configured.")
+        path = sqlite_path(connections[alias].settings_dict['NAME'])
+    temporary = f'{path}.tmp'
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    started = time.time_ns()
+    primary.ensure_connection()
+    if primary.connection.in_transaction:
+        # The backup would wait for the end of the transaction of its own connection
+        raise ValueError("sync cannot copy the primary inside a transaction.")
+    copy = sqlite3.connect(temporary)
+    try:
+        primary.connection.backup(copy)
+        # Read-only readers cannot open a WAL database without its -wal / -shm files
+        copy.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        copy.close()
+    # Dated from before the snapshot: feed versions are bumped after the commit
+    # of their write (transaction.on_commit), so a version older than the copy
+    # belongs to a write the copy holds
+    os.utime(temporary, ns=(started, started))
+    os.replace(temporary, path)
+    return started
+
+
+@contextmanager
+def reads(fresh_since=None):
+    """Routes the reads of the block to the replica when available(fresh_since)."""
+    token = _reads.set(available(fresh_since))
+    try:
+        yield
+    finally:
+        _reads.reset(token)
+
+
+def begin_request(sticky):
+    """Starts tracking the writes of a request (sticky: the client wrote recently); returns a token."""
+    return _request.set({'sticky': sticky, 'wrote': False})
+
+
+def end_request(token):
+    """Stops tracking the request started with token; returns True if it wrote."""
+    wrote = _request.get()['wrote']
+    _request.reset(token)
+    return wrote
+
+
+class ReplicaRouter:
+    """Database router: reads inside replica.reads() to the replica, everything else to 'default'."""
+
+    def db_for_read(self, model, **hints):
+        state = _request.get()
+        if (state and state['wrote']) or model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return _reads.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None:
+            state['wrote'] = True
+        # Explicit: an instance read from the replica is saved on the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica is a copy of the primary, migrated with it
+        if db == replica_alias():
+            return False
+        return None
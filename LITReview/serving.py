@@ -0,0 +1,191 @@
+"""
+Serving of the static and media files without a front server (settings.SERVE_FILES).
+
+django.views.static.serve, used before, sends every file uncompressed, with a
+weak validator and no cache lifetime. static_view and media_view:
+
+- send the precompressed variant (compression.py) of a text file accepted by
+  Accept-Encoding (br, then gzip), with Vary: Accept-Encoding,
+- set a strong ETag per representation (size and modification time of the
+  file sent) and answer 304 to a matching If-None-Match,
+- mark the content-hashed files (bundles of settings.ASSETS_BUILD_DIR, blobs of
+  settings.MEDIA_BLOB_DIR and their variants) immutable for a year; the other
+  files are revalidated on each use (cheap 304),
+- answer a single byte range (Range, If-Range) of an uncompressed file with 206
+  (416 when out of the file), so that large images can be resumed.
+"""
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+from . import compression
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, no-cache'
+CHUNK_SIZE = 64 * 1024
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ACCEPT_CODING = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def accepted_encodings(header):
+    """Content codings accepted by an Accept-Encoding header (q > 0)."""
+    accepted = set()
+    for item in header.split(','):
+        match = ACCEPT_CODING.match(item)
+        if not match:
+            continue
+        try:
+            if float(match.group(2) or 1) > 0:
+                accepted.add(match.group(1).lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+def byte_range(header, size):
+    """
+    (start, end) inclusive of a single-range Range header on a file of size bytes,
+    None when the header is to be ignored (absent, invalid or several ranges).
+    Raises RangeNotSatisfiable when the range starts after the end of the file.
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Suffix range: the last `end` bytes
+        if int(end) == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - int(end)), size - 1
+    start, end = int(start), int(end) if end else None
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def _etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _read(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            data = file.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _set_headers(response, headers):
+    for name, value in headers.items():
+        response[name] = value
+
+
+def serve_file(request, path, immutable=False):
+    """Response for the file path (see the module docstring)."""
+    content_type, _ = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml'):
+        content_type += '; charset=utf-8'
+
+    encoding = None
+    compressible = compression.compressible(path)
+    if compressible:
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        for name, suffix, _ in compression.ENCODINGS:
+            if name in accepted and os.path.isfile(path + suffix):
+                encoding, path = name, path + suffix
+                break
+    stat = os.stat(path)
+    etag = _etag(stat)
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': IMMUTABLE if immutable else REVALIDATE,
+    }
+    if compressible:
+        headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    else:
+        headers['Accept-Ranges'] = 'bytes'
+
+    # Weak comparison, as for every If-None-Match
+    if_none_match = [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]
+    if '*' in if_none_match or etag in if_none_match:
+        response = HttpResponseNotModified()
+        _set_headers(response, headers)
+        return response
+
+    span = None
+    if not encoding and request.headers.get('If-Range', etag) == etag:
+        try:
+            span = byte_range(request.headers.get('Range'), stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416, content_type=content_type)
+            _set_headers(response, headers)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    if span is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response.headers.pop('Content-Disposition', None)
+    else:
+        start, end = span
+        response = StreamingHttpResponse(
+            _read(open(path, 'rb'), start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    _set_headers(response, headers)
+    return response
+
+
+def _path(root, name):
+    try:
+        path = safe_join(root, name)
+    except SuspiciousFileOperation:
+        raise Http404("File not found.")
+    return path if os.path.isfile(path) else None
+
+
+@require_safe
+def static_view(request, path):
+    """
+    A file of settings.STATIC_ROOT (collected, with its compressed variants);
+    in DEBUG, falls back to the static files finders (sources, not compressed).
+    """
+    full_path = _path(settings.STATIC_ROOT, path) if settings.STATIC_ROOT else None
+    if full_path is None and settings.DEBUG:
+        full_path = finders.find(path)
+    if full_path is None:
+        raise Http404("File not found.")
+    return serve_file(request, full_path, immutable=path.startswith(settings.ASSETS_BUILD_DIR + '/'))
+
+
+@require_safe
+def media_view(request, path):
+    """A file of settings.MEDIA_ROOT (ticket images and their variants)."""
+    full_path = _path(settings.MEDIA_ROOT, path)
+    if full_path is None:
+        raise Http404("File not found.")
+    return serve_file(request, full_path, immutable=path.startswith(settings.MEDIA_BLOB_DIR + '/'))
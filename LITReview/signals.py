@@ -0,0 +1,137 @@
+"""
+Signal handlers of the LITReview app (connected in apps.LitreviewConfig.ready).
+
+- Ticket / Review created or deleted: fan-out of the FeedEntry timeline.
+- Ticket image uploaded or replaced: processing job (media_queue.py, images.py).
+- Ticket image stored, replaced or deleted: reference counts of the blobs (blobs.py).
+- Review created, edited or deleted: review statistics of its ticket (ticket_stats.py).
+- UserFollows / BlockedUser changed: entries of the feed of the user concerned
+  involving the other user (timeline.py).
+- Any of them saved or deleted: invalidation of the cached feed pages of the
+  users concerned (feed_cache.py).
+- User renamed: invalidation of the cached feed pages of their readers.
+- Ticket / Review saved or deleted: invalidation of their cached snippets, and
+  of the snippet of the ticket of a review (statistics) (fragments.py).
+  Both invalidations run once the transaction of the write is committed.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import blobs, feed_cache, fragments, images, media_queue, ticket_stats, timeline
+from .models import Ticket, Review, UserFollows, BlockedUser, FeedEntry
+
+
+@receiver(pre_save, sender=Ticket)
+def ticket_saving(sender, instance, **kwargs):
+    # Image before the save (released in ticket_saved when replaced); a new
+    # upload is acquired before the storage writes it
+    instance._image_before = None
+    if not instance._state.adding:
+        instance._image_before = Ticket.objects.filter(pk=instance.pk).values_list('image', flat=True).first()
+    instance._image_acquired = blobs.pending_upload_name(instance)
+    blobs.acquire(instance._image_acquired)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    before = getattr(instance, '_image_before', None) or None
+    acquired = getattr(instance, '_image_acquired', None)
+    name = instance.image.name or None
+    if name != acquired and name != before:
+        # Existing blob assigned by name
+        blobs.acquire(name)
+    if before and (before != name or acquired):
+        # Replaced image (or the same bytes uploaded again: referenced twice)
+        blobs.release(before)
+    if images.needs_variants(instance):
+        media_queue.submit(instance)
+    if created and timeline.is_enabled():
+        timeline.push_ticket(instance)
+    feed_cache.bump_audiences(instance.user_id)
+    fragments.bump(Ticket, instance.pk)
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, **kwargs):
+    # Rating and ticket before the edit, to apply the difference in review_saved
+    instance._stats_before = None
+    if not instance._state.adding:
+        instance._stats_before = Review.objects.filter(pk=instance.pk).values_list('ticket', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    before = getattr(instance, '_stats_before', None)
+    ticket_ids = {instance.ticket_id}
+    if created or before is None:
+        ticket_stats.review_added(instance)
+    elif before[0] != instance.ticket_id:
+        ticket_ids.add(before[0])
+        ticket_stats.review_removed(*before)
+        ticket_stats.review_added(instance)
+    else:
+        ticket_stats.review_changed(instance, before[1])
+    if created and timeline.is_enabled():
+        timeline.push_review(instance)
+    feed_cache.bump_audiences(instance.user_id, instance.ticket.user_id)
+    fragments.bump(Review, instance.pk)
+    fragments.bump(Ticket, *ticket_ids)
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    blobs.release(instance.image.name)
+    if timeline.is_enabled():
+        timeline.remove_item(FeedEntry.TICKET, instance.id)
+    feed_cache.bump_audiences(instance.user_id)
+    fragments.forget(Ticket, instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    ticket_stats.review_removed(instance.ticket_id, instance.rating)
+    if timeline.is_enabled():
+        timeline.remove_item(FeedEntry.REVIEW, instance.id)
+    # The ticket may already be deleted (cascade): its own handler then covers its readers
+    ticket_author_ids = Ticket.objects.filter(pk=instance.ticket_id).values_list('user', flat=True)
+    feed_cache.bump_audiences(instance.user_id, *ticket_author_ids)
+    fragments.forget(Review, instance.pk)
+    fragments.bump(Ticket, instance.ticket_id)
+
+
+@receiver(post_save, sender=UserFollows)
+@receiver(post_delete, sender=UserFollows)
+@receiver(post_save, sender=BlockedUser)
+@receiver(post_delete, sender=BlockedUser)
+def relation_changed(sender, instance, origin=None, **kwargs):
+    # Follows and blocks only change the feed of the user who made them
+    # (BlockedUser.block also deletes the follows of the blocked user, which
+    # triggers this handler for them).
+    feed_cache.bump_versions([instance.user_id])
+    if not timeline.is_enabled():
+        return
+    if isinstance(origin, get_user_model()) and origin.pk == instance.user_id:
+        # Account deletion: the feed is deleted with its owner.
+        return
+    other_id = instance.followed_user_id if sender is UserFollows else instance.blocked_user_id
+    timeline.relation_changed(instance.user_id, other_id)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    # Username before the save (shown on the posts of the user in the feeds);
+    # saves limited to other fields (last_login on every login) skip the query
+    instance._username_before = None
+    if not instance._state.adding and (update_fields is None or 'username' in update_fields):
+        instance._username_before = sender.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        feed_cache.bump_versions([instance.pk])
+    elif getattr(instance, '_username_before', None) not in (None, instance.username):
+        feed_cache.bump_audiences(instance.pk)
@@ -0,0 +1,66 @@
+"""
+Connection setup of the SQLite databases.
+
+Every new SQLite connection (connection_created signal, connected in
+apps.LitreviewConfig.ready) runs the PRAGMA statements of
+settings.SQLITE_PRAGMAS, in order:
+
+- journal_mode=WAL: readers no longer wait for a writer (and a writer no longer
+  waits for readers); only writers are serialized. Stored in the database file,
+- synchronous=NORMAL: in WAL mode, fsync at checkpoints only; a power loss may
+  drop the last transactions but never corrupts the database,
+- busy_timeout: milliseconds a connection waits for a lock before raising
+  "database is locked",
+- mmap_size: bytes of the file read through memory mapping instead of read(),
+- cache_size: page cache of the connection (negative: KiB),
+- temp_store=MEMORY: temporary tables and indexes (sorts, GROUP BY) in memory.
+
+The setting is per settings module (config/settings.py, settings_production.py),
+an empty dict keeps the SQLite defaults. Other database backends are left alone.
+journal_mode is not applied to read-only databases (NAME 'file:...?mode=ro', the
+replica of replica.py): they cannot change it.
+"""
+
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+_NAME = re.compile(r'^[a-z_]+$')
+_VALUE = re.compile(r'^(-?\d+|[A-Za-z]+)$')
+
+
+def pragma_statements(pragmas):
+    """PRAGMA statements for pragmas ({name: value}), validated (they cannot be bound as parameters)."""
+    statements = []
+    for name, value in pragmas.items():
+        if not _NAME.match(name) or not _VALUE.match(str(value)):
+            raise ImproperlyConfigured(f"SQLITE_PRAGMAS: invalid pragma {name!r} = {value!r}")
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """connection_created receiver: runs settings.SQLITE_PRAGMAS on a new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(getattr(settings, 'SQLITE_PRAGMAS', {}))
+    if 'mode=ro' in str(connection.settings_dict['NAME']):
+        pragmas.pop('journal_mode', None)
+    statements = pragma_statements(pragmas)
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def current_pragmas(connection, names):
+    """Values of the pragmas names on connection, as returned by SQLite."""
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            if not _NAME.match(name):
+                raise ValueError(name)
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    return values
@@ -0,0 +1,109 @@
+"""
+Content-addressed storage of the ticket images.
+
+An uploaded file is stored under the SHA-256 of its bytes, sharded by the first
+characters of the hash, whatever its original name:
+
+    media/blobs/3f/a2/3fa2...c9.jpeg
+
+Identical uploads (the same book cover posted by several users) are stored
+once and share their URL, hence their browser / proxy cache entries. A blob
+never changes once written, so its variants (images.py), named after it
+(3fa2...c9.240w.webp), are never rebuilt either.
+
+Names already under settings.MEDIA_BLOB_DIR (the variants of a blob) are
+stored as is. The storage itself has no database access: the blobs are
+reference-counted by blobs.py.
+
+CompressedStaticFilesStorage, the storage of collectstatic, writes the
+precompressed variants of the static text files (compression.py).
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from . import compression
+
+EXTENSION = re.compile(r'^\.[a-z0-9]{1,5}$')
+CHUNK_SIZE = 64 * 1024
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage naming the uploaded files after the hash of their content."""
+
+    def is_blob(self, name):
+        """True when name is a content-addressed name (or the variant of one)."""
+        return name.replace('\\', '/').startswith(settings.MEDIA_BLOB_DIR + '/')
+
+    def blob_name(self, name, content):
+        """Content-addressed name of content, keeping the (normalized) extension of name."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        if not EXTENSION.match(extension):
+            extension = ''
+        return f'{settings.MEDIA_BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def get_available_name(self, name, max_length=None):
+        # Content-addressed names are never suffixed: the same name means the same bytes
+        if self.is_blob(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if not self.is_blob(name):
+            name = self.blob_name(name, content)
+        if self.exists(name):
+            # Deduplicated: the bytes are already stored
+            return name
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside then moved: readers never see a partial blob, and two
+        # concurrent uploads of the same bytes just replace each other.
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    temp.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            file_move_safe(temp_path, path, allow_overwrite=True)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+    def family(self, name):
+        """Names of the blob name and of its variants (files of the shard starting with its hash)."""
+        directory, filename = os.path.split(name)
+        stem = os.path.splitext(filename)[0]
+        if not self.exists(directory):
+            return []
+        _, files = self.listdir(directory)
+        return [f'{directory}/{f}' for f in files if f == filename or f.startswith(stem + '.')]
+
+
+class CompressedStaticFilesStorage(StaticFilesStorage):
+    """
+    StaticFilesStorage writing the gzip / brotli variants of the text files at
+    collectstatic time (compression.py), served by serving.static_view.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        for name in paths:
+            if compression.compressible(name) and compression.write_variants(self.path(name)):
+                yield name, name, True
@@ -0,0 +1,21 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from LITReview import assets
+
+register = template.Library()
+
+
+@register.simple_tag
+def stylesheet(bundle):
+    """
+    Links the stylesheet bundle: the minified, content-hashed file of the
+    manifest after `python manage.py build_assets`, its sources otherwise.
+
+    Usage: {% load assets %} {% stylesheet 'css/site.css' %}
+    """
+    return format_html_join('\n    ', '{}', (
+        (format_html('<link rel="stylesheet" href="{}">', static(name) + (f'?v={version}' if version else '')),)
+        for name, version in assets.bundle_files(bundle)
+    ))
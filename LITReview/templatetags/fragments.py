@@ -0,0 +1,31 @@
+from django import template
+
+from LITReview import fragments
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, obj):
+        self.nodelist = nodelist
+        self.obj = obj
+
+    def render(self, context):
+        return fragments.render(self.obj.resolve(context), lambda: self.nodelist.render(context))
+
+
+@register.tag
+def fragment(parser, token):
+    """
+    Caches the enclosed, viewer-independent part of the snippet of obj until obj
+    changes (LITReview/fragments.py). Nothing depending on request.user may be
+    rendered inside.
+
+    Usage: {% load fragments %} {% fragment ticket %} ... {% endfragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes one argument: the ticket or review.")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]))
@@ -0,0 +1,16 @@
+from django import template
+
+from LITReview import images
+
+register = template.Library()
+
+
+@register.inclusion_tag('feed/partials/responsive_image.html')
+def responsive_image(ticket, alt=''):
+    """
+    Renders the image of ticket as a <picture> (WebP + JPEG srcset, explicit
+    width / height, lazy loading), or the original file when it has no variants yet.
+
+    Usage: {% load ticket_images %} {% responsive_image ticket alt="Image du ticket" %}
+    """
+    return {'image': images.responsive(ticket), 'alt': alt}
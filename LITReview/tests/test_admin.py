@@ -0,0 +1,45 @@
+"""Export CSV de l'administration (lecture par lots avec .iterator(chunk_size=...))."""
+
+import csv
+import io
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from LITReview.models import Ticket
+
+
+class ExportCsvTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='testpass')
+        self.client.force_login(self.admin)
+        self.tickets = [
+            Ticket.objects.create(user=self.admin, title=f"Livre {i}", description="Avec, virgule") for i in range(3)
+        ]
+
+    def test_export_selected_tickets(self):
+        """Réponse en flux : en-tête puis une ligne par ticket sélectionné, par ordre de clé."""
+        response = self.client.post(reverse('admin:LITReview_ticket_changelist'), {
+            'action': 'export_csv',
+            '_selected_action': [self.tickets[2].pk, self.tickets[0].pk],
+        })
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="ticket.csv"')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:4], ['id', 'title', 'description', 'user__username'])
+        self.assertEqual([row[:4] for row in rows[1:]], [
+            [str(self.tickets[0].pk), "Livre 0", "Avec, virgule", 'admin'],
+            [str(self.tickets[2].pk), "Livre 2", "Avec, virgule", 'admin'],
+        ])
+
+    def test_formulas_neutralized(self):
+        """Les textes commençant par =, +, -, @ sont préfixés d'une apostrophe (pas de formule dans le tableur)."""
+        ticket = Ticket.objects.create(user=self.admin, title='=HYPERLINK("http://x")', description="-1+1")
+        response = self.client.post(reverse('admin:LITReview_ticket_changelist'), {
+            'action': 'export_csv',
+            '_selected_action': [ticket.pk, self.tickets[0].pk],
+        })
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[1][1:3], ["Livre 0", "Avec, virgule"])
+        self.assertEqual(rows[2][:3], [str(ticket.pk), '\'=HYPERLINK("http://x")', "'-1+1"])
@@ -0,0 +1,63 @@
+"""Feuilles de style regroupées, minifiées et nommées selon leur contenu (build_assets + manifeste)."""
+
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from LITReview import assets
+
+
+class AssetBundleTests(TestCase):
+    def setUp(self):
+        self.static = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static, ignore_errors=True)
+        shutil.copytree(os.path.join(settings.STATICFILES_DIRS[0], 'css'), os.path.join(self.static, 'css'))
+        overrides = override_settings(STATICFILES_DIRS=[self.static], FEED_CACHE_TIMEOUT=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        User.objects.create_user(username="alice", password="Pass1234!")
+        self.client.login(username="alice", password="Pass1234!")
+
+    def build(self):
+        call_command('build_assets', stdout=StringIO())
+        return assets.manifest()['css/site.css']
+
+    def test_minify_css(self):
+        """Commentaires et espaces inutiles supprimés ; chaînes, requêtes média et combinateurs conservés."""
+        css = '/* titre */\n.a  :hover ,\n.b > .c {\n  content: "a  ;  b";\n  color: red;\n}\n' \
+              '@media (min-width: 768px) and (max-width: 1024px) {\n  .d { margin: 0 auto; }\n}\n'
+        self.assertEqual(
+            assets.minify_css(css),
+            '.a :hover,.b > .c{content:"a  ;  b";color:red}'
+            '@media (min-width:768px) and (max-width:1024px){.d{margin:0 auto}}',
+        )
+
+    def test_one_hashed_stylesheet_linked(self):
+        """Après build_assets, la page ne lie qu'un fichier, dont le nom change avec le contenu."""
+        name = self.build()
+        self.assertRegex(name, r'^dist/site\.[0-9a-f]{12}\.css$')
+        html = self.client.get(reverse('flux')).content.decode()
+        self.assertEqual(html.count('rel="stylesheet"'), 1)
+        self.assertIn(f'href="/static/{name}"', html)
+
+        with open(os.path.join(self.static, 'css', 'divers.css'), 'a') as file:
+            file.write('.nouveau { color: blue; }\n')
+        new_name = self.build()
+        self.assertNotEqual(new_name, name)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.static, 'dist'))), ['manifest.json', os.path.basename(new_name)]
+        )
+        self.assertIn(f'href="/static/{new_name}"', self.client.get(reverse('flux')).content.decode())
+
+    def test_sources_linked_without_build(self):
+        """Sans build, chaque feuille de style est liée séparément, versionnée par le haché de son contenu."""
+        html = self.client.get(reverse('flux')).content.decode()
+        self.assertEqual(html.count('rel="stylesheet"'), len(settings.ASSET_BUNDLES['css/site.css']))
+        self.assertIn(f'href="/static/css/snippets.css?v={assets.source_version("css/snippets.css")}"', html)
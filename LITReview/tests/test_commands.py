@@ -0,0 +1,155 @@
+"""Commandes de gestion : vérification des plans de requêtes, maintenance."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from LITReview.models import Ticket, MediaBlob
+
+
+class CheckQueryPlansTests(TestCase):
+    @unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN (SQLite)")
+    def test_no_full_table_scan(self):
+        """Les requêtes des vues principales utilisent toutes un index sur le jeu de données généré."""
+        out = StringIO()
+        # Vérifications système actives, comme avec « python manage.py check_query_plans »
+        call_command('check_query_plans', skip_checks=False, stdout=out, stderr=StringIO())
+        self.assertIn("No full table scan.", out.getvalue())
+        # Le jeu de données est annulé (rollback)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_indexes_exist(self):
+        """Les index composites des lookups fréquents sont créés par les migrations."""
+        with connection.cursor() as cursor:
+            indexes = {
+                name
+                for table in ('LITReview_ticket', 'LITReview_review', 'LITReview_userfollows', 'LITReview_blockeduser')
+                for name in connection.introspection.get_constraints(cursor, table)
+            }
+        for name in ('ticket_user_time_idx', 'review_user_time_idx', 'review_ticket_time_idx',
+                     'review_user_ticket_idx', 'userfollows_followed_idx', 'blockeduser_blocked_idx'):
+            self.assertIn(name, indexes)
+
+    def test_lower_indexes_exist(self):
+        """Les index fonctionnels LOWER() des recherches insensibles à la casse sont créés."""
+        with connection.cursor() as cursor:
+            indexes = {
+                name
+                for table in ('LITReview_ticket', 'auth_user')
+                for name in connection.introspection.get_constraints(cursor, table)
+            }
+        for name in ('ticket_title_lower_idx', 'auth_user_username_lower_idx', 'auth_user_email_lower_idx'):
+            self.assertIn(name, indexes)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', "Classe d'opérateurs PostgreSQL")
+    def test_image_pattern_index_exists(self):
+        """PostgreSQL : index varchar_pattern_ops pour image LIKE 'stem.%' (gc_media)."""
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, 'LITReview_ticket')
+        self.assertIn('ticket_image_pattern_idx', indexes)
+
+
+class GcMediaTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=self.media, MEDIA_QUEUE=False, FEED_CACHE_TIMEOUT=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.alice = User.objects.create_user(username="alice", password="Pass1234!")
+
+    def file(self, name, data=b'x' * 10, age=2 * 86400):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        os.utime(path, (time.time() - age, time.time() - age))
+        return path
+
+    def age_all(self):
+        for directory, _, files in os.walk(self.media):
+            for f in files:
+                os.utime(os.path.join(directory, f), (time.time() - 2 * 86400,) * 2)
+
+    def test_deletes_unreferenced_files_only(self):
+        """gc_media supprime les fichiers non référencés et anciens ; garde images, variantes et envois récents."""
+        buffer = BytesIO()
+        Image.new('RGB', (300, 450), 'navy').save(buffer, 'JPEG')
+        ticket = Ticket.objects.create(
+            user=self.alice, title="Dune", description="-",
+            image=SimpleUploadedFile('dune.jpg', buffer.getvalue(), content_type='image/jpeg'),
+        )
+        kept = [ticket.image.path] + [
+            ticket.image.storage.path(item[0]) for items in ticket.image_variants['formats'].values() for item in items
+        ]
+        self.age_all()
+        orphans = [
+            self.file('Silmarillion_05QhdHo.jpeg'),
+            self.file('Silmarillion_05QhdHo.120w.webp'),
+            self.file('blobs/00/11/0011aa.jpeg'),
+        ]
+        MediaBlob.objects.create(name='blobs/00/11/0011aa.jpeg', refcount=1)
+        recent = self.file('blobs/22/33/2233bb.jpeg', age=0)
+
+        out = StringIO()
+        call_command('gc_media', '--dry-run', '--batch-size', '2', stdout=out)
+        self.assertIn("3 unreferenced file(s) would be deleted (30 bytes).", out.getvalue())
+        self.assertTrue(all(os.path.exists(p) for p in orphans))
+
+        out = StringIO()
+        call_command('gc_media', '--batch-size', '2', stdout=out)
+        self.assertIn(f"{len(kept) + 4} file(s) scanned", out.getvalue())
+        self.assertIn("3 unreferenced file(s) deleted (30 bytes).", out.getvalue())
+        self.assertFalse(any(os.path.exists(p) for p in orphans))
+        self.assertTrue(all(os.path.exists(p) for p in kept + [recent]))
+        self.assertFalse(MediaBlob.objects.filter(name='blobs/00/11/0011aa.jpeg').exists())
+
+    def test_variants_listed_on_ticket_kept(self):
+        """Une variante listée dans image_variants est gardée même si son nom ne suit pas celui de l'image."""
+        listed = self.file('blobs/aa/bb/aabb.120w.webp')
+        Ticket.objects.create(user=self.alice, title="Dune", description="-", image='tickets/dune.jpg', image_variants={
+            'source': 'tickets/dune.jpg', 'width': 120, 'height': 180,
+            'formats': {'webp': [['blobs/aa/bb/aabb.120w.webp', 120, 180]]},
+        })
+        orphan = self.file('blobs/cc/dd/ccdd.120w.webp')
+
+        out = StringIO()
+        call_command('gc_media', stdout=out)
+        self.assertIn("1 unreferenced file(s) deleted (10 bytes).", out.getvalue())
+        self.assertTrue(os.path.exists(listed))
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_legacy_image_variants_kept(self):
+        """Image antérieure aux blobs : copiée en blob, variantes nommées d'après lui et gardées par gc_media."""
+        buffer = BytesIO()
+        Image.new('RGB', (300, 450), 'navy').save(buffer, 'JPEG')
+        legacy = self.file('tickets/dune.jpg', buffer.getvalue())
+        ticket = Ticket.objects.create(user=self.alice, title="Dune", description="-", image='tickets/dune.jpg')
+        ticket.refresh_from_db()
+        storage = ticket.image.storage
+        self.assertTrue(storage.is_blob(ticket.image.name))
+        stem = os.path.splitext(ticket.image.name)[0]
+        variants = [item[0] for items in ticket.image_variants['formats'].values() for item in items]
+        self.assertTrue(variants and all(name.startswith(stem + '.') for name in variants))
+
+        # Nouvel enregistrement : pas de nouveau traitement
+        variants_before = ticket.image_variants
+        ticket.save()
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).image_variants, variants_before)
+
+        self.age_all()
+        out = StringIO()
+        call_command('gc_media', stdout=out)
+        self.assertIn(f"1 unreferenced file(s) deleted ({len(buffer.getvalue())} bytes).", out.getvalue())
+        self.assertFalse(os.path.exists(legacy))
+        self.assertTrue(all(storage.exists(name) for name in [ticket.image.name] + variants))
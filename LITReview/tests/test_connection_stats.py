@@ -0,0 +1,45 @@
+"""Comptage des connexions ouvertes (connection_stats) et en-têtes de ConnectionStatsMiddleware."""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from LITReview import connection_stats
+from LITReview.middleware import ConnectionStatsMiddleware
+
+
+class ConnectionStatsTests(SimpleTestCase):
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': directory / 'db.sqlite3'}, alias='stats')
+        self.addCleanup(self.wrapper.close)
+
+    def view(self, request):
+        # Connexion ouverte si elle n'est pas déjà ouverte (réutilisée comme avec CONN_MAX_AGE)
+        self.wrapper.ensure_connection()
+        return HttpResponse()
+
+    @override_settings(CONNECTION_STATS=True)
+    def test_headers_count_openings(self):
+        """Première requête : une ouverture ; connexion gardée : aucune ; le total du processus augmente."""
+        middleware = ConnectionStatsMiddleware(self.view)
+        before = connection_stats.totals()['stats']
+        first = middleware(RequestFactory().get('/'))
+        self.assertEqual(first['X-DB-Connections-Opened'], '1')
+        self.assertEqual(connection_stats.totals()['stats'], before + 1)
+
+        second = middleware(RequestFactory().get('/'))
+        self.assertEqual(second['X-DB-Connections-Opened'], '0')
+        self.assertEqual(int(second['X-DB-Connections-Total']), int(first['X-DB-Connections-Total']))
+
+    @override_settings(CONNECTION_STATS=False)
+    def test_disabled(self):
+        """Désactivé (production) : pas d'en-tête."""
+        response = ConnectionStatsMiddleware(self.view)(RequestFactory().get('/'))
+        self.assertNotIn('X-DB-Connections-Opened', response)
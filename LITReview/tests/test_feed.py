@@ -1,9 +1,15 @@
 """Tests du flux utilisateur : affichage, filtrage abonnements/bloqués, tri antéchronologique, bouton critique."""
 
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
+from LITReview.feed import build_feed
+from LITReview.feed_cache import feed_version
 from LITReview.models import Ticket, Review, UserFollows, BlockedUser
 
 
@@ -11,6 +17,7 @@ class FeedTests(TestCase):
     """Tests du flux principal utilisateur (vue 'flux')."""
 
     def setUp(self):
+        cache.clear()
         # Création des utilisateurs
         self.u1 = User.objects.create_user(username='alice', password='testpass')
         self.u2 = User.objects.create_user(username='bob', password='testpass')
@@ -110,3 +117,139 @@ class FeedTests(TestCase):
                         self.assertTrue(ticket.has_review_by_user)
                     if ticket == self.t3:
                         self.assertFalse(ticket.has_review_by_user)
+
+
+class FeedQueryCountTests(TestCase):
+    """Le moteur de flux (feed.build_feed) exécute un nombre de requêtes constant et pagine par curseur."""
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+        self.zoe = User.objects.create_user(username='zoe', password='testpass')
+        UserFollows.objects.create(user=self.alice, followed_user=self.bob)
+        BlockedUser.objects.create(user=self.alice, blocked_user=self.zoe)
+
+    def _add_posts(self, count):
+        """Ajoute count tickets de bob, chacun critiqué par alice et zoe, plus une orpheline de bob."""
+        for i in range(count):
+            ticket = Ticket.objects.create(user=self.bob, title=f"T{i}", description="D")
+            Review.objects.create(user=self.alice, ticket=ticket, headline="A", body="B", rating=3)
+            Review.objects.create(user=self.zoe, ticket=ticket, headline="Z", body="B", rating=1)
+            hidden = Ticket.objects.create(user=self.zoe, title=f"H{i}", description="D")
+            Review.objects.create(user=self.bob, ticket=hidden, headline="O", body="B", rating=5)
+
+    def test_build_feed_query_ceiling(self):
+        """build_feed fait au plus 4 requêtes, quel que soit le volume (auteurs et flags inclus)."""
+        for count in (1, 25):
+            self._add_posts(count)
+            with self.assertNumQueries(4):
+                items, _ = build_feed(self.alice)
+                for item in items:
+                    if item['kind'] == 'ticket_block':
+                        item['ticket'].user.username
+                        self.assertTrue(item['ticket'].has_review_by_user)
+                        self.assertEqual([r.user.username for r in item['reviews']], ['alice'])
+                    else:
+                        self.assertEqual(item['review'].user.username, 'bob')
+
+    def test_flux_view_query_count_does_not_grow(self):
+        """Le rendu complet de la page flux ne dépend pas du nombre d'éléments affichés."""
+        self.client.login(username='alice', password='testpass')
+        self._add_posts(2)
+        # Abonnements mis en cache avec la version de l'utilisateur (feed_cache) à la première lecture
+        feed_version(self.alice.id)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('flux'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self._add_posts(20)
+        with CaptureQueriesContext(connection) as large:
+            resp = self.client.get(reverse('flux'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context['all_items']), settings.FEED_PAGE_SIZE)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_cursor_pagination_walks_whole_feed_in_order(self):
+        """Les pages successives couvrent tout le flux, sans doublon, en ordre antéchronologique."""
+        self._add_posts(7)
+        seen, cursor, pages = [], None, 0
+        while True:
+            items, cursor = build_feed(self.alice, cursor=cursor, page_size=4)
+            pages += 1
+            seen.extend(items)
+            if cursor is None:
+                break
+        self.assertEqual(pages, 4)
+        keys = [(it['kind'], (it.get('ticket') or it.get('review')).id) for it in seen]
+        self.assertEqual(len(keys), 14)
+        self.assertEqual(len(set(keys)), 14)
+        times = [it['time_created'] for it in seen]
+        self.assertEqual(times, sorted(times, reverse=True))
+
+    def test_cursor_ties_on_time_created(self):
+        """Deux éléments de même date ne sont ni perdus ni dupliqués entre deux pages."""
+        self._add_posts(3)
+        same_time = Ticket.objects.first().time_created
+        Ticket.objects.update(time_created=same_time)
+        Review.objects.update(time_created=same_time)
+        first, cursor = build_feed(self.alice, page_size=2)
+        rest, _ = build_feed(self.alice, cursor=cursor, page_size=10)
+        ids = [(it['kind'], (it.get('ticket') or it.get('review')).id) for it in first + rest]
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(len(set(ids)), 6)
+
+    def test_flux_renders_load_more_link_and_ignores_bad_cursor(self):
+        """La page flux affiche 'Voir plus' s'il reste des éléments ; un curseur invalide renvoie la 1re page."""
+        self.client.login(username='alice', password='testpass')
+        self._add_posts(15)
+        resp = self.client.get(reverse('flux'))
+        self.assertContains(resp, '?cursor=' + resp.context['next_cursor'])
+        resp = self.client.get(reverse('flux'), {'cursor': resp.context['next_cursor']})
+        self.assertEqual(len(resp.context['all_items']), 10)
+        self.assertIsNone(resp.context['next_cursor'])
+        self.assertNotContains(resp, 'Voir plus')
+        resp = self.client.get(reverse('flux'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context['all_items']), settings.FEED_PAGE_SIZE)
+
+
+class PostsPaginationTests(TestCase):
+    """Page 'posts' : UNION tickets/critiques en base, paginée, seuls les objets de la page sont chargés."""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+        self.client.login(username='alice', password='testpass')
+
+    def _add_posts(self, count):
+        for i in range(count):
+            ticket = Ticket.objects.create(user=self.bob, title=f"T{i}", description="D")
+            Review.objects.create(user=self.alice, ticket=ticket, headline=f"R{i}", body="B", rating=3)
+            Ticket.objects.create(user=self.alice, title=f"A{i}", description="D")
+
+    def test_posts_are_paginated_in_reverse_chronological_order(self):
+        """Page 1 : POSTS_PAGE_SIZE posts triés ; la dernière page contient le reste ; rien d'autre que ses posts."""
+        self._add_posts(12)
+        resp = self.client.get(reverse('posts'))
+        posts = resp.context['posts']
+        self.assertEqual(len(posts), settings.POSTS_PAGE_SIZE)
+        self.assertEqual(resp.context['page_obj'].paginator.count, 24)
+        times = [p.time_created for p in posts]
+        self.assertEqual(times, sorted(times, reverse=True))
+        self.assertTrue(all(p.user == self.alice for p in posts))
+        self.assertEqual({p.content_type for p in posts}, {'TICKET', 'REVIEW'})
+        self.assertContains(resp, '?page=2')
+
+        resp = self.client.get(reverse('posts'), {'page': 2})
+        self.assertEqual(len(resp.context['posts']), 24 - settings.POSTS_PAGE_SIZE)
+
+    def test_posts_query_count_does_not_grow(self):
+        """Le nombre de requêtes de la page posts ne dépend pas du nombre de publications."""
+        self._add_posts(2)
+        feed_version(self.alice.id)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('posts'))
+        self._add_posts(20)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse('posts'))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
@@ -0,0 +1,199 @@
+"""Cache des pages du flux par utilisateur : hit sans requête, invalidation par signaux, backends locmem et fichier."""
+
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from LITReview.feed_cache import bump_audiences, cached_feed
+from LITReview.models import Ticket, Review, UserFollows, BlockedUser
+
+
+class FeedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+        self.carl = User.objects.create_user(username='carl', password='testpass')
+        UserFollows.objects.create(user=self.alice, followed_user=self.bob)
+        self.ticket = Ticket.objects.create(user=self.bob, title="T", description="D")
+
+    def assertCached(self):
+        """La page est servie par le cache, sans aucune requête."""
+        cached_feed(self.alice)
+        with self.assertNumQueries(0):
+            return cached_feed(self.alice)
+
+    def assertInvalidated(self):
+        """La page suivante est reconstruite depuis la base."""
+        with CaptureQueriesContext(connection) as queries:
+            cached_feed(self.alice)
+        self.assertGreater(len(queries), 0)
+
+    def test_cache_hit_skips_database(self):
+        """Deuxième lecture : aucune requête, mêmes éléments."""
+        items, _ = self.assertCached()
+        self.assertEqual([it['ticket'] for it in items], [self.ticket])
+
+    def test_writes_invalidate_affected_feeds(self):
+        """Ticket, critique (y compris d'un non-suivi sur un ticket visible), édition, suppression, suivi, blocage."""
+        self.assertCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(user=self.bob, title="T2", description="D")
+        self.assertInvalidated()
+
+        self.assertCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(user=self.carl, ticket=self.ticket, headline="H", body="B", rating=2)
+        self.assertInvalidated()
+
+        self.assertCached()
+        review.rating = 4
+        with self.captureOnCommitCallbacks(execute=True):
+            review.save()
+        self.assertInvalidated()
+
+        self.assertCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+        self.assertInvalidated()
+
+        self.assertCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            UserFollows.objects.create(user=self.alice, followed_user=self.carl)
+        self.assertInvalidated()
+
+        self.assertCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            BlockedUser.block(self.alice, self.carl)
+        self.assertInvalidated()
+
+    def test_invalidation_waits_for_commit(self):
+        """Avant le COMMIT, une lecture concurrente sert encore la page en cache : la version change après."""
+        self.assertCached()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Ticket.objects.create(user=self.bob, title="T2", description="D")
+        with self.assertNumQueries(0):
+            cached_feed(self.alice)
+        for callback in callbacks:
+            callback()
+        self.assertInvalidated()
+
+    def test_author_write_bumps_one_version(self):
+        """Écriture d'un auteur suivi : seule sa version change, sans requête, quel que soit le nombre d'abonnés."""
+        for i in range(5):
+            UserFollows.objects.create(user=User.objects.create_user(username=f'fan{i}'), followed_user=self.bob)
+        self.assertCached()
+        with self.assertNumQueries(0), mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            with self.captureOnCommitCallbacks(execute=True):
+                bump_audiences(self.bob.id)
+        self.assertEqual(list(set_many.call_args.args[0]), [f'feed:author:{self.bob.id}'])
+        self.assertInvalidated()
+
+    def test_author_rename_invalidates_feed(self):
+        """Un auteur suivi change de nom : la page en cache est reconstruite avec le nouveau nom."""
+        self.client.login(username='alice', password='testpass')
+        self.assertContains(self.client.get(reverse('flux')), "Par bob")
+        self.bob.username = 'robert'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.save()
+        resp = self.client.get(reverse('flux'))
+        self.assertContains(resp, "Par robert")
+        self.assertNotContains(resp, "Par bob")
+
+    def test_unrelated_writes_keep_cache(self):
+        """Un ticket d'un utilisateur non suivi ne vide pas le cache du flux d'alice."""
+        self.assertCached()
+        Ticket.objects.create(user=self.carl, title="T", description="D")
+        with self.assertNumQueries(0):
+            cached_feed(self.alice)
+
+    def test_flux_view_uses_cache(self):
+        """La vue flux ne fait plus que les requêtes de session / authentification sur un hit."""
+        self.client.login(username='alice', password='testpass')
+        self.client.get(reverse('flux'))
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('flux'))
+        self.assertContains(resp, "T")
+
+
+class ConditionalGetTests(TestCase):
+    """ETag / Last-Modified sur les pages flux et posts : 304 tant que rien n'a changé."""
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+        UserFollows.objects.create(user=self.alice, followed_user=self.bob)
+        Ticket.objects.create(user=self.bob, title="T", description="D")
+        self.client.login(username='alice', password='testpass')
+
+    def test_flux_not_modified_until_feed_changes(self):
+        """If-None-Match identique : 304 sans requête de flux ; nouveau ticket d'un suivi : 200 et nouvel ETag."""
+        resp = self.client.get(reverse('flux'))
+        etag = resp['ETag']
+        self.assertIn('Last-Modified', resp)
+        self.assertIn('private', resp['Cache-Control'])
+        with self.assertNumQueries(2):  # session + utilisateur
+            resp = self.client.get(reverse('flux'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(user=self.bob, title="T2", description="D")
+        resp = self.client.get(reverse('flux'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_author_rename_changes_etag(self):
+        """Un auteur suivi change de nom : l'ancien ETag ne répond plus 304, la page montre le nouveau nom."""
+        etag = self.client.get(reverse('flux'))['ETag']
+        bob = User.objects.get(username='bob')
+        bob.username = 'robert'
+        with self.captureOnCommitCallbacks(execute=True):
+            bob.save()
+        resp = self.client.get(reverse('flux'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Par robert")
+
+    def test_posts_not_modified_and_cursor_in_etag(self):
+        """La page posts répond 304 ; l'ETag dépend de la query string (page / curseur)."""
+        etag = self.client.get(reverse('posts'))['ETag']
+        self.assertEqual(self.client.get(reverse('posts'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        resp = self.client.get(reverse('flux'), {'cursor': 'x'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_pending_messages_disable_conditional_get(self):
+        """Un message flash en attente force un rendu complet (sinon il serait perdu)."""
+        ticket = Ticket.objects.get(title="T")
+        Review.objects.create(user=self.alice, ticket=ticket, headline="H", body="B", rating=3)
+        etag = self.client.get(reverse('flux'))['ETag']
+        # Redirection vers le flux avec un avertissement, sans aucune écriture
+        self.client.get(reverse('create_review_response', args=[ticket.id]))
+        resp = self.client.get(reverse('flux'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "déjà rédigé une critique")
+        resp = self.client.get(reverse('flux'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+
+class FileBasedFeedCacheTests(FeedCacheTests):
+    """Mêmes tests avec le backend de cache fichier."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': self.cache_dir,
+            }
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        super().setUp()
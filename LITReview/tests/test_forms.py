@@ -33,6 +33,19 @@ class SignUpFormTests(TestCase):
         self.assertFalse(form.is_valid())
         self.assertIn('username', form.errors)
 
+    def test_username_and_email_case_insensitive(self):
+        """SignUpForm → invalide si username / email ne diffèrent que par la casse."""
+        User.objects.create_user(username='alice', email='alice@test.com', password='pass')
+        form = SignUpForm(data={
+            'username': 'ALICE',
+            'email': 'Alice@Test.com',
+            'password1': 'ComplexPwd123',
+            'password2': 'ComplexPwd123'
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('username', form.errors)
+        self.assertIn('email', form.errors)
+
 
 class LoginFormTests(TestCase):
     def setUp(self):
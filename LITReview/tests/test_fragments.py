@@ -0,0 +1,93 @@
+"""Cache des snippets de tickets et critiques : rendu depuis le cache, parties propres au lecteur, invalidation."""
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from LITReview import fragments
+from LITReview.feed import build_feed
+from LITReview.models import Ticket, Review, UserFollows
+
+
+@override_settings(FEED_CACHE_TIMEOUT=0)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+        UserFollows.objects.create(user=self.bob, followed_user=self.alice)
+        self.ticket = Ticket.objects.create(user=self.alice, title="Dune", description="Herbert")
+
+    def flux(self, user):
+        self.client.force_login(user)
+        return self.client.get(reverse('flux')).content.decode()
+
+    def test_feed_page_rendered_from_cache(self):
+        """Deuxième affichage d'une page de 50 éléments : chaque snippet vient du cache, sans nouveau rendu."""
+        for i in range(25):
+            ticket = Ticket.objects.create(user=self.alice, title=f"T{i}", description="-")
+            Review.objects.create(user=self.alice, ticket=ticket, headline=f"H{i}", body="-", rating=3)
+        with self.settings(FEED_PAGE_SIZE=50):
+            first = self.flux(self.bob)
+            items, _ = build_feed(self.bob)
+            objects = list(fragments.feed_objects(items))
+            fragments.prefetch(objects)
+            self.assertGreaterEqual(len(objects), 50)
+            self.assertTrue(all(hasattr(obj, '_fragment_html') for obj in objects))
+            with mock.patch('LITReview.templatetags.fragments.FragmentNode.render', autospec=True,
+                            side_effect=lambda node, context: fragments.render(node.obj.resolve(context), None)):
+                self.assertEqual(self.flux(self.bob), first)
+
+    def test_viewer_specific_parts_not_cached(self):
+        """Même fragment pour tous ; « Par vous », les boutons et « Critiquer ce ticket » dépendent du lecteur."""
+        alice_page, bob_page = self.flux(self.alice), self.flux(self.bob)
+        self.assertIn("Par vous", alice_page)
+        self.assertIn("Modifier", alice_page)
+        self.assertNotIn("Par vous", bob_page)
+        self.assertIn("Par alice", bob_page)
+        self.assertNotIn("Modifier", bob_page)
+        self.assertIn("Critiquer ce ticket", bob_page)
+
+        Review.objects.create(user=self.bob, ticket=self.ticket, headline="Culte", body="-", rating=5)
+        bob_page = self.flux(self.bob)
+        self.assertNotIn("Critiquer ce ticket", bob_page)
+        self.assertIn("Vous avez publié une critique", bob_page)
+        self.assertIn("bob a posté une critique", self.flux(self.alice))
+
+    def test_writes_invalidate_fragments(self):
+        """Ticket modifié, critique ajoutée / modifiée / supprimée : le snippet rendu suit."""
+        self.flux(self.bob)
+        self.ticket.title = "Dune (édition révisée)"
+        self.ticket.save()
+        self.assertIn("Dune (édition révisée)", self.flux(self.bob))
+
+        review = Review.objects.create(user=self.alice, ticket=self.ticket, headline="Culte", body="-", rating=4)
+        page = self.flux(self.bob)
+        self.assertIn("1 critique, moyenne 4,0", page)
+
+        review.headline, review.rating = "Daté", 2
+        review.save()
+        page = self.flux(self.bob)
+        self.assertIn("Daté", page)
+        self.assertIn("moyenne 2,0", page)
+
+        review.delete()
+        self.assertNotIn("moyenne", self.flux(self.bob))
+
+    def test_stale_derived_fields_not_cached_under_current_key(self):
+        """Un ticket aux statistiques périmées (page du flux en cache) ne remplace pas le snippet à jour."""
+        stale = Ticket.objects.get(pk=self.ticket.pk)
+        Review.objects.create(user=self.alice, ticket=self.ticket, headline="Culte", body="-", rating=4)
+        self.assertEqual(fragments.render(stale, lambda: "périmé"), "périmé")
+        fresh = Ticket.objects.get(pk=self.ticket.pk)
+        self.assertEqual(fragments.render(fresh, lambda: "à jour"), "à jour")
+
+    @override_settings(FRAGMENT_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        """FRAGMENT_CACHE_TIMEOUT = 0 : snippets rendus à chaque affichage (même après une écriture sans signal)."""
+        self.flux(self.bob)
+        Ticket.objects.filter(pk=self.ticket.pk).update(title="Les Enfants de Dune")
+        self.assertIn("Les Enfants de Dune", self.flux(self.bob))
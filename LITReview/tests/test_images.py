@@ -0,0 +1,173 @@
+"""Images de tickets : file de traitement (process_media), variantes responsives, EXIF, bombes de décompression."""
+
+import multiprocessing
+import shutil
+import tempfile
+import unittest
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from LITReview.models import Ticket, MediaJob
+
+
+def jpeg(width=800, height=1200, name='cover.jpg', exif=None):
+    buffer = BytesIO()
+    image = Image.new('RGB', (width, height), 'navy')
+    image.save(buffer, 'JPEG', **({'exif': exif} if exif else {}))
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+def process_media(*args):
+    out = StringIO()
+    call_command('process_media', '--once', *args, stdout=out, stderr=StringIO())
+    return out.getvalue()
+
+
+class ImageVariantsTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=self.media, MEDIA_QUEUE=True, FEED_CACHE_TIMEOUT=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.alice = User.objects.create_user(username="alice", password="Pass1234!")
+        self.client.login(username="alice", password="Pass1234!")
+
+    def test_variants_built_by_worker(self):
+        """Un ticket avec image → job en attente, puis variantes WebP et JPEG sans agrandissement."""
+        ticket = Ticket.objects.create(user=self.alice, title="Dune", description="-", image=jpeg(300, 450))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.image_variants, {'source': ticket.image.name, 'status': 'pending'})
+        self.assertEqual(MediaJob.objects.get().source, ticket.image.name)
+
+        self.assertIn("1 image(s) processed, 0 failed.", process_media('--workers', '0'))
+        self.assertFalse(MediaJob.objects.exists())
+        ticket.refresh_from_db()
+        variants = ticket.image_variants
+        self.assertEqual(variants['source'], ticket.image.name)
+        self.assertEqual((variants['width'], variants['height']), (300, 450))
+        self.assertEqual([w for _, w, _ in variants['formats']['webp']], [120, 240, 300])
+        self.assertEqual(variants['formats']['jpeg'][0][1:], [120, 180])
+        name = variants['formats']['webp'][0][0]
+        self.assertTrue(name.endswith('.120w.webp'))
+        with ticket.image.storage.open(name) as file, Image.open(file) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (120, 180)))
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', "MEDIA_ROOT surchargé dans le parent")
+    def test_process_pool(self):
+        """process_media traite les images dans un pool de processus."""
+        for title in ("Dune", "Hypérion"):
+            Ticket.objects.create(user=self.alice, title=title, description="-", image=jpeg())
+        self.assertIn("2 image(s) processed, 0 failed.", process_media('--workers', '2'))
+        self.assertTrue(all('formats' in t.image_variants for t in Ticket.objects.all()))
+
+    def test_flux_placeholder_then_srcset(self):
+        """Le flux montre un espace réservé, puis un <picture> (srcset WebP + JPEG, dimensions, chargement différé)."""
+        ticket = Ticket.objects.create(user=self.alice, title="Dune", description="-", image=jpeg())
+        resp = self.client.get(reverse("flux"))
+        self.assertContains(resp, 'class="image-placeholder"')
+        self.assertNotContains(resp, ticket.image.url)
+
+        process_media('--workers', '0')
+        resp = self.client.get(reverse("flux"))
+        self.assertContains(resp, 'type="image/webp"')
+        self.assertContains(resp, '.240w.webp 240w')
+        self.assertContains(resp, 'width="120" height="180"')
+        self.assertContains(resp, 'loading="lazy"')
+        self.assertNotContains(resp, f'src="{ticket.image.url}"')
+
+    def test_processed_image_changes_flux_etag(self):
+        """Variantes enregistrées (ou échec) : l'ancien ETag du flux ne répond plus 304."""
+        Ticket.objects.create(user=self.alice, title="Dune", description="-", image=jpeg())
+        etag = self.client.get(reverse("flux"))['ETag']
+        self.assertEqual(self.client.get(reverse("flux"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            process_media('--workers', '0')
+        resp = self.client.get(reverse("flux"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'type="image/webp"')
+
+        Ticket.objects.create(user=self.alice, title="Bombe", description="-", image=jpeg(100, 100))
+        etag = self.client.get(reverse("flux"))['ETag']
+        with override_settings(IMAGE_MAX_PIXELS=100), self.captureOnCommitCallbacks(execute=True):
+            self.assertIn("1 failed", process_media('--workers', '0'))
+        self.assertEqual(self.client.get(reverse("flux"), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_replace_image_and_edit_title(self):
+        """Remplacer l'image reconstruit les variantes ; modifier le titre les conserve."""
+        ticket = Ticket.objects.create(user=self.alice, title="Dune", description="-", image=jpeg())
+        resp = self.client.post(reverse("edit_ticket", args=[ticket.id]), {
+            "title": "Dune", "description": "-", "image": jpeg(200, 200, 'new.jpg'),
+        })
+        self.assertEqual(resp.status_code, 302)
+        # Le job de la première image, jamais traité, est remplacé
+        self.assertEqual(MediaJob.objects.count(), 1)
+        process_media('--workers', '0')
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.image_variants['source'], ticket.image.name)
+        self.assertEqual(ticket.image_variants['width'], 200)
+
+        resp = self.client.post(reverse("edit_ticket", args=[ticket.id]), {"title": "Dune 2", "description": "-"})
+        self.assertEqual(resp.status_code, 302)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.title, "Dune 2")
+        self.assertEqual(ticket.image_variants['width'], 200)
+
+    def test_exif_stripped(self):
+        """Les métadonnées EXIF (position GPS...) de l'original sont supprimées."""
+        exif = Image.Exif()
+        exif[0x010F] = "Camera"
+        exif[0x0112] = 6  # Orientation : rotation de 90°
+        ticket = Ticket.objects.create(user=self.alice, title="Dune", description="-", image=jpeg(300, 200, exif=exif))
+        process_media('--workers', '0')
+        ticket.refresh_from_db()
+        with ticket.image.open() as file, Image.open(file) as image:
+            self.assertNotIn('exif', image.info)
+            self.assertEqual(image.size, (200, 300))
+        self.assertEqual((ticket.image_variants['width'], ticket.image_variants['height']), (200, 300))
+
+    def test_decompression_bomb_rejected(self):
+        """Une image de plus de IMAGE_MAX_PIXELS n'est pas décodée : job en échec, image jamais servie."""
+        ticket = Ticket.objects.create(user=self.alice, title="Dune", description="-", image=jpeg(100, 100))
+        with self.settings(IMAGE_MAX_PIXELS=5000):
+            self.assertIn("0 image(s) processed, 1 failed.", process_media('--workers', '0'))
+        job = MediaJob.objects.get()
+        self.assertEqual(job.status, MediaJob.FAILED)
+        self.assertIn("UnsafeImage", job.error)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.image_variants, {'source': ticket.image.name, 'status': 'failed'})
+        resp = self.client.get(reverse("flux"))
+        self.assertNotContains(resp, ticket.image.url)
+        self.assertNotContains(resp, 'class="image-placeholder"')
+
+        self.assertIn("1 image(s) processed", process_media('--workers', '0', '--retry-failed'))
+        self.assertFalse(MediaJob.objects.exists())
+
+    @override_settings(MEDIA_QUEUE=False)
+    def test_inline_processing(self):
+        """Sans file d'attente, l'image est traitée dans la requête ; un fichier illisible est en échec."""
+        ticket = Ticket.objects.create(user=self.alice, title="Dune", description="-", image=jpeg())
+        self.assertIn('formats', Ticket.objects.get(pk=ticket.pk).image_variants)
+        self.assertFalse(MediaJob.objects.exists())
+
+        broken = Ticket(user=self.alice, title="Dune", description="-")
+        broken.image.save('broken.jpg', ContentFile(b'not an image'), save=False)
+        with self.assertLogs('LITReview.images', 'ERROR'):
+            broken.save()
+        broken.refresh_from_db()
+        self.assertEqual(broken.image_variants['status'], 'failed')
+
+    def test_legacy_image_served_as_is(self):
+        """Une image antérieure au traitement (sans variantes) est servie telle quelle."""
+        ticket = Ticket.objects.create(user=self.alice, title="Dune", description="-", image=jpeg())
+        Ticket.objects.filter(pk=ticket.pk).update(image_variants={})
+        MediaJob.objects.all().delete()
+        resp = self.client.get(reverse("flux"))
+        self.assertContains(resp, f'src="{ticket.image.url}"')
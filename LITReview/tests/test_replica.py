@@ -0,0 +1,103 @@
+"""Réplique en lecture : copie par l'API de sauvegarde SQLite, routage du flux, lecture de ses propres écritures."""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from LITReview import replica
+from LITReview.feed_cache import bump_versions, feed_version
+from LITReview.models import Ticket, UserFollows
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "Réplique SQLite copiée par sync_replica")
+@override_settings(FEED_CACHE_TIMEOUT=0, FRAGMENT_CACHE_TIMEOUT=0)
+class ReplicaTests(TransactionTestCase):
+    # Copie hors transaction : l'API de sauvegarde attend la fin de celle de la connexion copiée
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        # La réplique de test (miroir de 'default') remplacée par un vrai fichier
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = directory / 'replica.sqlite3'
+        settings_dict = connections['replica'].settings_dict
+        mirror_name = settings_dict['NAME']
+        connections['replica'].close()
+        settings_dict['NAME'] = self.path.as_uri() + '?mode=ro'
+        self.addCleanup(settings_dict.__setitem__, 'NAME', mirror_name)
+        self.addCleanup(connections['replica'].close)
+
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.ticket = Ticket.objects.create(user=self.alice, title="Copié", description="-")
+        self.client.force_login(self.alice)
+        self.client.get(reverse('flux'))  # version du flux créée avant la copie
+
+    def test_sync_is_readonly_snapshot(self):
+        """Copie cohérente (journal classique, lisible sans -wal / -shm), ouverte en lecture seule."""
+        self.assertIsNone(replica.available())
+        replica.sync()
+        self.assertEqual(replica.available(), 'replica')
+        self.assertEqual(Ticket.objects.using('replica').get().title, "Copié")
+        with sqlite3.connect(self.path) as copy:
+            self.assertEqual(copy.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+        with self.assertRaisesMessage(Exception, 'readonly'):
+            Ticket.objects.using('replica').update(title="x")
+
+    def test_flux_read_from_fresh_replica(self):
+        """Flux lu sur la réplique à jour ; sur le primaire si la version du flux est plus récente que la copie."""
+        replica.sync()
+        # Modification sans signal : seul le primaire la voit
+        Ticket.objects.update(title="Primaire")
+        self.assertContains(self.client.get(reverse('flux')), "Copié")
+        self.assertContains(self.client.get(reverse('posts')), "Copié")
+
+        bump_versions([self.alice.id])
+        self.assertContains(self.client.get(reverse('flux')), "Primaire")
+
+    def test_writer_sticks_to_primary(self):
+        """Après une écriture, le client lit sur le primaire (cookie) ; une requête sans écriture ne le pose pas."""
+        bob = User.objects.create_user(username='bob', password='testpass')
+        replica.sync()
+        response = self.client.get(reverse('subscriptions'))
+        self.assertNotIn(replica.STICKY_COOKIE, response.cookies)
+
+        response = self.client.post(reverse('subscriptions'), {'username': 'bob'})
+        self.assertTrue(UserFollows.objects.filter(user=self.alice, followed_user=bob).exists())
+        self.assertEqual(response.cookies[replica.STICKY_COOKIE]['max-age'], 10)
+        self.assertContains(self.client.get(reverse('subscriptions')), "bob")
+
+        # Sans le cookie : la copie est plus ancienne que le suivi (version du flux d'alice)
+        del self.client.cookies[replica.STICKY_COOKIE]
+        self.assertContains(self.client.get(reverse('subscriptions')), "bob")
+        replica.sync()
+        self.assertEqual(replica.available(fresh_since=feed_version(self.alice.id)), 'replica')
+
+    def test_old_copy_not_used(self):
+        """Une copie plus ancienne que REPLICA_MAX_AGE n'est plus servie, même sans exigence de fraîcheur."""
+        replica.sync()
+        self.assertEqual(replica.available(), 'replica')
+        old = time.time_ns() - 120 * 1_000_000_000
+        os.utime(self.path, ns=(old, old))
+        self.assertIsNone(replica.available())
+        with override_settings(REPLICA_MAX_AGE=None):
+            self.assertEqual(replica.available(), 'replica')
+
+    def test_persistent_connection_reopened_after_sync(self):
+        """Une connexion persistante à la réplique est rouverte sur la nouvelle copie (sinon : ancien fichier)."""
+        replica.sync()
+        with replica.reads():
+            self.assertEqual(Ticket.objects.get().title, "Copié")
+        Ticket.objects.update(title="Recopié")
+        replica.sync()
+        self.assertEqual(Ticket.objects.using('replica').get().title, "Copié")
+        with replica.reads():
+            self.assertEqual(Ticket.objects.get().title, "Recopié")
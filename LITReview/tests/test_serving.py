@@ -0,0 +1,108 @@
+"""Fichiers statiques et médias : variantes précompressées, ETag fort, Cache-Control, requêtes Range, pages gzip."""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+class FileServingTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.static = os.path.join(self.root, 'src')
+        shutil.copytree(os.path.join(settings.STATICFILES_DIRS[0], 'css'), os.path.join(self.static, 'css'))
+        overrides = override_settings(
+            STATICFILES_DIRS=[self.static], STATIC_ROOT=os.path.join(self.root, 'static'),
+            MEDIA_ROOT=os.path.join(self.root, 'media'), FEED_CACHE_TIMEOUT=0,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def collect(self):
+        call_command('build_assets', stdout=StringIO())
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(self.static, 'dist', 'manifest.json')) as file:
+            return '/static/' + json.load(file)['css/site.css']
+
+    def media(self, name, data):
+        path = os.path.join(self.root, 'media', name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return '/media/' + name
+
+    def test_precompressed_variant_negotiated(self):
+        """collectstatic écrit la variante .gz ; elle est servie si Accept-Encoding l'accepte, l'original sinon."""
+        url = self.collect()
+        with open(os.path.join(self.root, 'static', url.removeprefix('/static/')), 'rb') as file:
+            original = file.read()
+
+        resp = self.client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        self.assertEqual(resp['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(gzip.decompress(b''.join(resp.streaming_content)), original)
+
+        resp = self.client.get(url, headers={'Accept-Encoding': 'gzip;q=0'})
+        self.assertNotIn('Content-Encoding', resp)
+        self.assertEqual(b''.join(resp.streaming_content), original)
+
+    def test_strong_etag_not_modified(self):
+        """ETag fort par représentation ; If-None-Match correspondant → 304 sans corps."""
+        url = self.collect()
+        gzipped = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        identity = self.client.get(url)
+        self.assertRegex(gzipped['ETag'], r'^"[0-9a-f]+-[0-9a-f]+"$')
+        self.assertNotEqual(gzipped['ETag'], identity['ETag'])
+        resp = self.client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': gzipped['ETag']})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b'')
+
+    def test_cache_lifetime_by_name(self):
+        """Seuls les fichiers nommés selon leur contenu (bundle, blobs) sont immutables."""
+        self.collect()
+        self.assertEqual(self.client.get('/static/css/base.css')['Cache-Control'], 'public, no-cache')
+        self.assertIn('immutable', self.client.get(self.media('blobs/ab/cd/abcd.jpeg', b'x' * 10))['Cache-Control'])
+        self.assertEqual(self.client.get(self.media('old.jpeg', b'x' * 10))['Cache-Control'], 'public, no-cache')
+
+    def test_image_byte_ranges(self):
+        """Range sur une image : 206 et la tranche demandée, 416 hors du fichier, If-Range périmé → fichier entier."""
+        data = bytes(range(256)) * 40
+        url = self.media('blobs/ab/cd/abcd.jpeg', data)
+        resp = self.client.get(url, headers={'Range': 'bytes=100-199'})
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], f'bytes 100-199/{len(data)}')
+        self.assertEqual(b''.join(resp.streaming_content), data[100:200])
+
+        resp = self.client.get(url, headers={'Range': 'bytes=-10'})
+        self.assertEqual(b''.join(resp.streaming_content), data[-10:])
+
+        resp = self.client.get(url, headers={'Range': f'bytes={len(data)}-'})
+        self.assertEqual((resp.status_code, resp['Content-Range']), (416, f'bytes */{len(data)}'))
+
+        resp = self.client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(b''.join(resp.streaming_content), data)
+
+    def test_outside_root_not_served(self):
+        """Un chemin qui sort du dossier des médias → 404."""
+        self.media('a.jpeg', b'x')
+        self.assertEqual(self.client.get('/media/../src/css/base.css').status_code, 404)
+        self.assertEqual(self.client.get('/media/missing.jpeg').status_code, 404)
+
+    def test_feed_html_gzipped(self):
+        """Les pages HTML du flux sont compressées à la volée."""
+        User.objects.create_user(username="alice", password="Pass1234!")
+        self.client.login(username="alice", password="Pass1234!")
+        resp = self.client.get(reverse('flux'), headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn(b'LITReview', gzip.decompress(resp.content))
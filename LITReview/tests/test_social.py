@@ -22,7 +22,7 @@ class SocialTests(TestCase):
     def test_follow_success(self):
         """Alice suit Bob (username exact ou insensible à la casse)."""
         resp = self.client.post(reverse("subscriptions"), {
-            "username": "BoB",  # __iexact dans la vue
+            "username": "BoB",  # __lower dans la vue (index LOWER(username))
         })
         # Succès -> redirection vers subscriptions et relation créée
         self.assertEqual(resp.status_code, 302)
@@ -0,0 +1,55 @@
+"""Réglages des connexions SQLite (SQLITE_PRAGMAS) appliqués à chaque nouvelle connexion."""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+from LITReview.sqlite import current_pragmas, pragma_statements
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 2500,
+    'cache_size': -8192,
+    'temp_store': 'MEMORY',
+}
+
+
+class SqlitePragmaTests(SimpleTestCase):
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = directory / 'db.sqlite3'
+
+    def connect(self):
+        """Nouvelle connexion (signal connection_created) à une base fichier temporaire."""
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': self.path}, alias='pragmas')
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    @override_settings(SQLITE_PRAGMAS=PRAGMAS)
+    def test_pragmas_applied_on_connect(self):
+        """journal WAL, synchronous NORMAL (1), attente de verrou, cache et tables temporaires en mémoire (2)."""
+        values = current_pragmas(self.connect(), PRAGMAS)
+        self.assertEqual(values, {
+            'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 2500, 'cache_size': -8192, 'temp_store': 2,
+        })
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_empty_setting_keeps_defaults(self):
+        """Sans réglage : journal de rollback, synchronous FULL (2)."""
+        values = current_pragmas(self.connect(), ['journal_mode', 'synchronous'])
+        self.assertEqual(values, {'journal_mode': 'delete', 'synchronous': 2})
+
+    def test_invalid_pragma_refused(self):
+        """Noms et valeurs interpolés dans le SQL : tout ce qui n'est ni un mot ni un entier est refusé."""
+        self.assertEqual(pragma_statements({'busy_timeout': 100}), ['PRAGMA busy_timeout = 100'])
+        for pragmas in ({'journal_mode': 'WAL; DROP TABLE x'}, {'cache size': 1}):
+            with self.assertRaises(ImproperlyConfigured):
+                pragma_statements(pragmas)
@@ -0,0 +1,103 @@
+"""Stockage adressé par contenu des images : déduplication, sharding, compteurs de références."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from LITReview.models import Ticket, MediaBlob
+
+
+def cover(color='navy', exif=None):
+    buffer = BytesIO()
+    Image.new('RGB', (300, 450), color).save(buffer, 'JPEG', **({'exif': exif} if exif else {}))
+    return buffer.getvalue()
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=self.media, MEDIA_QUEUE=True, FEED_CACHE_TIMEOUT=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.alice = User.objects.create_user(username="alice", password="Pass1234!")
+        self.bob = User.objects.create_user(username="bob", password="Pass1234!")
+
+    def ticket(self, user, data, name='Silmarillion.JPEG'):
+        return Ticket.objects.create(
+            user=user, title="Le Silmarillion", description="-",
+            image=SimpleUploadedFile(name, data, content_type='image/jpeg'),
+        )
+
+    def refcount(self, name):
+        return MediaBlob.objects.get(name=name).refcount
+
+    def process(self):
+        call_command('process_media', '--once', '--workers', '0', stdout=StringIO(), stderr=StringIO())
+
+    def test_same_bytes_stored_once(self):
+        """Deux envois identiques → un seul fichier, nommé et réparti selon son SHA-256."""
+        data = cover()
+        first = self.ticket(self.alice, data)
+        second = self.ticket(self.bob, data, name='copie.jpeg')
+        digest = hashlib.sha256(data).hexdigest()
+        self.assertEqual(first.image.name, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpeg')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(os.listdir(os.path.dirname(first.image.path)), [f'{digest}.jpeg'])
+        self.assertEqual(self.refcount(first.image.name), 2)
+
+    def test_blob_deleted_with_last_reference(self):
+        """Supprimer un ticket ne libère le fichier (et ses variantes) que s'il n'est plus utilisé."""
+        data = cover()
+        first, second = self.ticket(self.alice, data), self.ticket(self.bob, data)
+        self.process()
+        first.refresh_from_db()
+        name, path = first.image.name, first.image.path
+        variants = [item[0] for items in first.image_variants['formats'].values() for item in items]
+
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(self.refcount(name), 1)
+
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(any(first.image.storage.exists(v) for v in variants))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_replace_image_releases_old_blob(self):
+        """Remplacer l'image libère l'ancien fichier ; renvoyer les mêmes octets ne compte pas deux fois."""
+        ticket = self.ticket(self.alice, cover('navy'))
+        old_path = ticket.image.path
+        ticket.image = SimpleUploadedFile('new.jpg', cover('red'), content_type='image/jpeg')
+        ticket.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(self.refcount(ticket.image.name), 1)
+
+        ticket.image = SimpleUploadedFile('same.jpg', cover('red'), content_type='image/jpeg')
+        ticket.save()
+        self.assertEqual(self.refcount(ticket.image.name), 1)
+
+        ticket.image = None
+        ticket.save()
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_stripped_copy_replaces_original_blob(self):
+        """Le traitement (suppression des EXIF) déplace le ticket sur un nouveau blob et libère l'original."""
+        exif = Image.Exif()
+        exif[0x010F] = "Camera"
+        ticket = self.ticket(self.alice, cover(exif=exif))
+        original = ticket.image.path
+        self.process()
+        ticket.refresh_from_db()
+        self.assertFalse(os.path.exists(original))
+        self.assertTrue(ticket.image.name.startswith('blobs/'))
+        self.assertEqual(self.refcount(ticket.image.name), 1)
+        self.assertEqual(MediaBlob.objects.count(), 1)
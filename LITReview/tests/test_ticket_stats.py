@@ -0,0 +1,96 @@
+"""Statistiques dénormalisées des tickets : nombre de critiques, somme des notes, dernière critique."""
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from LITReview.models import Ticket, Review
+
+
+@override_settings(FEED_CACHE_TIMEOUT=0)
+class TicketStatsTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="Pass1234!")
+        self.bob = User.objects.create_user(username="bob", password="Pass1234!")
+        self.ticket = Ticket.objects.create(title="Dune", description="-", user=self.alice)
+
+    def review(self, user, rating):
+        return Review.objects.create(user=user, ticket=self.ticket, headline="-", body="-", rating=rating)
+
+    def test_create_edit_delete(self):
+        """Création, modification de la note et suppression mettent à jour le ticket."""
+        first = self.review(self.alice, 4)
+        second = self.review(self.bob, 3)
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.review_count, self.ticket.rating_sum), (2, 7))
+        self.assertEqual(self.ticket.last_reviewed_at, second.time_created)
+        self.assertEqual(self.ticket.average_rating, 3.5)
+
+        second.rating = 5
+        second.save()
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.review_count, self.ticket.rating_sum), (2, 9))
+
+        second.delete()
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.review_count, self.ticket.rating_sum), (1, 4))
+        self.assertEqual(self.ticket.last_reviewed_at, first.time_created)
+
+        first.delete()
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.review_count, self.ticket.rating_sum), (0, 0))
+        self.assertIsNone(self.ticket.last_reviewed_at)
+        self.assertIsNone(self.ticket.average_rating)
+
+    def test_ticket_save_keeps_stats(self):
+        """Enregistrer un ticket chargé avant une critique n'écrase pas les compteurs."""
+        stale = Ticket.objects.get(pk=self.ticket.pk)
+        self.review(self.bob, 2)
+        stale.title = "Dune (édition)"
+        stale.save()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.title, "Dune (édition)")
+        self.assertEqual((self.ticket.review_count, self.ticket.rating_sum), (1, 2))
+
+    def test_reconcile_command(self):
+        """reconcile_ticket_stats répare les compteurs modifiés hors signaux."""
+        self.review(self.bob, 4)
+        Review.objects.bulk_create([Review(user=self.alice, ticket=self.ticket, headline="-", body="-", rating=1)])
+        Ticket.objects.filter(pk=self.ticket.pk).update(last_reviewed_at=None)
+
+        out = StringIO()
+        call_command('reconcile_ticket_stats', '--dry-run', stdout=out)
+        self.assertIn("1 ticket(s) drifted.", out.getvalue())
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.review_count, 1)
+
+        out = StringIO()
+        call_command('reconcile_ticket_stats', stdout=out)
+        self.assertIn("1 ticket(s) repaired.", out.getvalue())
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.review_count, self.ticket.rating_sum), (2, 5))
+        self.assertEqual(self.ticket.last_reviewed_at, Review.objects.latest('time_created').time_created)
+
+    def test_flux_shows_stats(self):
+        """Le flux affiche le nombre de critiques et la moyenne du ticket."""
+        self.review(self.alice, 4)
+        self.review(self.bob, 3)
+        self.client.login(username="alice", password="Pass1234!")
+        resp = self.client.get(reverse("flux"))
+        self.assertContains(resp, "2 critiques, moyenne 3,5 ★")
+
+    @override_settings(FEED_CACHE_TIMEOUT=300)
+    def test_reconcile_refreshes_cached_flux(self):
+        """Compteurs réparés : la page du flux en cache et le snippet du ticket sont reconstruits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.review(self.bob, 4)
+        self.client.login(username="alice", password="Pass1234!")
+        self.assertContains(self.client.get(reverse("flux")), "1 critique, moyenne 4,0 ★")
+        Review.objects.bulk_create([Review(user=self.alice, ticket=self.ticket, headline="-", body="-", rating=2)])
+        self.assertContains(self.client.get(reverse("flux")), "1 critique, moyenne 4,0 ★")
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_ticket_stats', stdout=StringIO())
+        self.assertContains(self.client.get(reverse("flux")), "2 critiques, moyenne 3,0 ★")
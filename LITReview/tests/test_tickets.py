@@ -1,5 +1,6 @@
 """CRUD Tickets: creation, edition, deletion, permissions and integration in feed/posts."""
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -9,6 +10,7 @@ from LITReview.models import Ticket, Review
 
 class TicketTests(TestCase):
     def setUp(self):
+        cache.clear()
         # Utilisateurs
         self.alice = User.objects.create_user(
             username="alice", email="alice@test.com", password="Pass1234!"
@@ -0,0 +1,187 @@
+"""Timeline matérialisée (FeedEntry) : fan-out à l'écriture, suppression, reconstruction."""
+
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from LITReview import timeline
+from LITReview.feed import build_feed, read_time_keys, timeline_keys, page_keys
+from LITReview.models import Ticket, Review, UserFollows, BlockedUser, FeedEntry, PulledAuthor
+
+
+@override_settings(FEED_STRATEGY='write', FEED_CACHE_TIMEOUT=0)
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+        self.carl = User.objects.create_user(username='carl', password='testpass')
+        self.zoe = User.objects.create_user(username='zoe', password='testpass')
+        UserFollows.objects.create(user=self.alice, followed_user=self.bob)
+        UserFollows.objects.create(user=self.alice, followed_user=self.carl)
+        UserFollows.objects.create(user=self.carl, followed_user=self.zoe)
+
+    def assertTimelineMatchesReadTime(self):
+        """Pour chaque utilisateur, la timeline matérialisée == le flux calculé à la lecture."""
+        for user in User.objects.all():
+            self.assertEqual(list(timeline_keys(user)), list(read_time_keys(user)), user.username)
+
+    def _post(self, author, reviewer=None):
+        ticket = Ticket.objects.create(user=author, title="T", description="D")
+        review = None
+        if reviewer:
+            review = Review.objects.create(user=reviewer, ticket=ticket, headline="H", body="B", rating=3)
+        return ticket, review
+
+    def test_fan_out_on_create(self):
+        """Tickets poussés à l'auteur et ses abonnés ; critiques poussées comme orphelines seulement si besoin."""
+        ticket, review = self._post(self.bob, reviewer=self.carl)
+        self.assertTrue(FeedEntry.objects.filter(owner=self.alice, kind='ticket', item_id=ticket.id).exists())
+        self.assertTrue(FeedEntry.objects.filter(owner=self.bob, kind='ticket', item_id=ticket.id).exists())
+        # alice voit le ticket de bob : la critique de carl est dans le bloc, pas d'entrée orpheline pour elle
+        self.assertFalse(FeedEntry.objects.filter(owner=self.alice, kind='review', item_id=review.id).exists())
+        # carl ne suit pas bob : la critique est orpheline dans son flux
+        self.assertTrue(FeedEntry.objects.filter(owner=self.carl, kind='review', item_id=review.id).exists())
+        self._post(self.zoe, reviewer=self.alice)
+        self.assertTimelineMatchesReadTime()
+
+    def test_delete_unfollow_and_block_keep_timeline_in_sync(self):
+        """Suppression, désabonnement et blocage retirent les entrées concernées."""
+        ticket, _ = self._post(self.bob, reviewer=self.alice)
+        _, review = self._post(self.zoe, reviewer=self.carl)
+        self.assertTimelineMatchesReadTime()
+
+        review.delete()
+        self.assertFalse(FeedEntry.objects.filter(kind='review', item_id=review.id).exists())
+        ticket.delete()
+        self.assertFalse(FeedEntry.objects.filter(kind='ticket', item_id=ticket.id).exists())
+        self.assertTimelineMatchesReadTime()
+
+        self._post(self.carl, reviewer=self.zoe)
+        UserFollows.objects.filter(user=self.alice, followed_user=self.carl).delete()
+        self.assertFalse(FeedEntry.objects.filter(owner=self.alice, kind='ticket').exists())
+        self.assertTimelineMatchesReadTime()
+
+        BlockedUser.block(self.carl, self.zoe)
+        self.assertTimelineMatchesReadTime()
+
+        self.zoe.delete()
+        self.assertTimelineMatchesReadTime()
+
+    def test_relation_changes_are_incremental(self):
+        """Suivi / désabonnement : seules les entrées liées à l'autre utilisateur ; blocage : une fois par paire."""
+        ticket, review = self._post(self.bob, reviewer=self.carl)
+        self._post(self.zoe, reviewer=self.bob)
+        with mock.patch('LITReview.timeline.rebuild_for') as rebuild:
+            # La critique de carl sur le ticket de bob devient orpheline pour alice, puis revient dans le bloc
+            UserFollows.objects.filter(user=self.alice, followed_user=self.bob).delete()
+            self.assertTrue(FeedEntry.objects.filter(owner=self.alice, kind='review', item_id=review.id).exists())
+            self.assertTimelineMatchesReadTime()
+            UserFollows.objects.create(user=self.alice, followed_user=self.bob)
+            self.assertFalse(FeedEntry.objects.filter(owner=self.alice, kind='review', item_id=review.id).exists())
+            self.assertTimelineMatchesReadTime()
+        rebuild.assert_not_called()
+
+        UserFollows.objects.create(user=self.bob, followed_user=self.alice)
+        with mock.patch('LITReview.timeline.resync_relation', wraps=timeline.resync_relation) as resync:
+            BlockedUser.block(self.alice, self.bob)
+        self.assertEqual(sorted(call.args for call in resync.call_args_list),
+                         [(self.alice.id, self.bob.id), (self.bob.id, self.alice.id)])
+        self.assertTimelineMatchesReadTime()
+
+    def test_rebuild_feed_command(self):
+        """La commande rebuild_feed reconstruit toutes les timelines depuis zéro."""
+        self._post(self.bob, reviewer=self.carl)
+        self._post(self.zoe, reviewer=self.alice)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feed', stdout=StringIO())
+        self.assertTimelineMatchesReadTime()
+
+    def test_flux_view_reads_timeline(self):
+        """La vue flux lit la timeline (un ticket absent de FeedEntry n'est pas affiché)."""
+        ticket, _ = self._post(self.bob)
+        self.client.login(username='alice', password='testpass')
+        resp = self.client.get(reverse('flux'))
+        self.assertEqual([item['ticket'] for item in resp.context['all_items']], [ticket])
+        FeedEntry.objects.filter(owner=self.alice).delete()
+        resp = self.client.get(reverse('flux'))
+        self.assertEqual(resp.context['all_items'], [])
+
+
+@override_settings(FEED_STRATEGY='hybrid', FEED_FANOUT_THRESHOLD=1)
+class HybridTimelineTests(TestCase):
+    """Stratégie hybride : les auteurs populaires (> 1 abonné ici) sont lus à la demande."""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+        self.carl = User.objects.create_user(username='carl', password='testpass')
+        # bob a 2 abonnés (populaire), carl en a 1 (poussé à l'écriture)
+        UserFollows.objects.create(user=self.alice, followed_user=self.bob)
+        UserFollows.objects.create(user=self.carl, followed_user=self.bob)
+        UserFollows.objects.create(user=self.alice, followed_user=self.carl)
+        # La liste des auteurs populaires est mise en cache : on repart de l'état final des abonnements
+        cache.clear()
+
+    def test_popular_author_is_not_fanned_out(self):
+        """Un ticket d'un auteur populaire n'est écrit que dans sa propre timeline."""
+        ticket = Ticket.objects.create(user=self.bob, title="T", description="D")
+        owners = set(FeedEntry.objects.filter(kind='ticket', item_id=ticket.id).values_list('owner', flat=True))
+        self.assertEqual(owners, {self.bob.id})
+        ticket = Ticket.objects.create(user=self.carl, title="T", description="D")
+        owners = set(FeedEntry.objects.filter(kind='ticket', item_id=ticket.id).values_list('owner', flat=True))
+        self.assertEqual(owners, {self.carl.id, self.alice.id})
+
+    def test_pulled_and_pushed_posts_are_interleaved(self):
+        """Le flux fusionne timeline et posts populaires dans l'ordre, page par page, comme à la lecture."""
+        for author in (self.bob, self.carl, self.alice, self.bob, self.carl, self.bob):
+            ticket = Ticket.objects.create(user=author, title="T", description="D")
+        Review.objects.create(user=self.bob, ticket=ticket, headline="H", body="B", rating=3)
+        hidden = Ticket.objects.create(user=User.objects.create_user(username='dan'), title="T", description="D")
+        Review.objects.create(user=self.bob, ticket=hidden, headline="H", body="B", rating=3)
+        expected = list(read_time_keys(self.alice))
+        self.assertEqual(len(expected), 7)
+
+        keys, cursor = [], None
+        while True:
+            page, next_key = page_keys(self.alice, cursor, page_size=3)
+            keys.extend(page)
+            if next_key is None:
+                break
+            cursor = next_key
+        self.assertEqual(keys, expected)
+
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feed', stdout=StringIO())
+        self.assertFalse(FeedEntry.objects.filter(owner=self.alice, kind='ticket', item_id=ticket.id).exists())
+        self.assertEqual(page_keys(self.alice, page_size=10)[0], expected)
+
+    def test_build_feed_query_ceiling(self):
+        """Stratégie hybride : au plus six requêtes (auteurs lus à la demande et leurs posts en plus)."""
+        for author in (self.bob, self.carl):
+            ticket = Ticket.objects.create(user=author, title="T", description="D")
+            Review.objects.create(user=self.alice, ticket=ticket, headline="H", body="B", rating=3)
+        hidden = Ticket.objects.create(user=User.objects.create_user(username='dan'), title="T", description="D")
+        Review.objects.create(user=self.bob, ticket=hidden, headline="H", body="B", rating=3)
+        with self.assertNumQueries(6):
+            items, _ = build_feed(self.alice)
+        self.assertEqual([item['kind'] for item in items], ['orphan_review', 'ticket_block', 'ticket_block'])
+
+    def test_posts_kept_when_author_is_no_longer_popular(self):
+        """Un auteur qui perd des abonnés reste lu à la demande ; rebuild_feed pousse ensuite ses posts."""
+        ticket = Ticket.objects.create(user=self.bob, title="T", description="D")
+        self.assertTrue(PulledAuthor.objects.filter(author=self.bob).exists())
+        UserFollows.objects.filter(user=self.carl, followed_user=self.bob).delete()
+        cache.clear()
+        self.assertIn((ticket.time_created, 'ticket', ticket.id), page_keys(self.alice)[0])
+
+        out = StringIO()
+        call_command('rebuild_feed', stdout=out)
+        self.assertIn("1 author(s) no longer pulled", out.getvalue())
+        self.assertFalse(PulledAuthor.objects.exists())
+        self.assertTrue(FeedEntry.objects.filter(owner=self.alice, kind='ticket', item_id=ticket.id).exists())
+        self.assertEqual(list(page_keys(self.alice)[0]), list(read_time_keys(self.alice)))
@@ -0,0 +1,141 @@
+"""Envoi des images par morceaux : refus précoces (taille, format), reprise, rattachement au ticket par jeton."""
+
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from LITReview import uploads
+from LITReview.models import Ticket, Upload
+
+
+def jpeg_bytes():
+    buffer = BytesIO()
+    Image.new('RGB', (300, 450), 'navy').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        overrides = override_settings(
+            MEDIA_ROOT=os.path.join(self.media, 'media'), UPLOAD_TEMP_DIR=os.path.join(self.media, 'uploads'),
+            UPLOAD_MAX_BYTES=100_000, FEED_CACHE_TIMEOUT=0,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.alice = User.objects.create_user(username="alice", password="Pass1234!")
+        self.bob = User.objects.create_user(username="bob", password="Pass1234!")
+        self.client.login(username="alice", password="Pass1234!")
+
+    def start(self, size, filename='cover.jpg'):
+        return self.client.post(reverse('upload_start'), {'filename': filename, 'size': size})
+
+    def chunk(self, url, offset, data):
+        return self.client.patch(url, data, content_type='application/octet-stream', headers={'Upload-Offset': offset})
+
+    def upload(self, data):
+        url = self.start(len(data)).json()['url']
+        for offset in range(0, len(data), 1000):
+            self.assertEqual(self.chunk(url, offset, data[offset:offset + 1000]).status_code, 200)
+        return url
+
+    def test_too_large_rejected_at_start(self):
+        """Une taille annoncée au-delà de UPLOAD_MAX_BYTES est refusée avant tout envoi."""
+        resp = self.start(100_001)
+        self.assertEqual(resp.status_code, 413)
+        self.assertFalse(Upload.objects.exists())
+
+    def test_not_an_image_rejected_on_first_chunk(self):
+        """Un premier morceau qui n'est pas une image (octets magiques) est refusé et l'envoi supprimé."""
+        url = self.start(1000).json()['url']
+        resp = self.chunk(url, 0, b'%PDF-1.4' + b'x' * 992)
+        self.assertEqual(resp.status_code, 415)
+        self.assertFalse(Upload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media, 'uploads')), [])
+
+    def test_chunk_past_announced_size_rejected(self):
+        """Un morceau qui dépasse la taille annoncée est refusé sans être lu."""
+        data = jpeg_bytes()
+        url = self.start(len(data)).json()['url']
+        resp = self.chunk(url, 0, data + b'x')
+        self.assertEqual(resp.status_code, 413)
+        self.assertEqual(Upload.objects.get().received, 0)
+
+    def test_resume_after_interruption(self):
+        """Un morceau au mauvais décalage → 409 et décalage attendu ; GET indique où reprendre."""
+        data = jpeg_bytes()
+        url = self.start(len(data)).json()['url']
+        self.chunk(url, 0, data[:1000])
+        resp = self.chunk(url, 2000, data[2000:3000])
+        self.assertEqual((resp.status_code, resp.json()['offset']), (409, 1000))
+        self.assertEqual(self.client.get(url).json(), {'offset': 1000, 'size': len(data), 'complete': False})
+        for offset in range(1000, len(data), 1000):
+            self.chunk(url, offset, data[offset:offset + 1000])
+        self.assertTrue(self.client.get(url).json()['complete'])
+
+    def test_direct_upload_limited_too(self):
+        """Une image envoyée directement dans le formulaire (multipart) est limitée à UPLOAD_MAX_BYTES."""
+        data = jpeg_bytes()
+        review = {'headline': "H", 'body': "B", 'rating': 3}
+        for name, extra in (('create_ticket', {}), ('create_ticket_review', review)):
+            with self.settings(UPLOAD_MAX_BYTES=len(data) - 1):
+                resp = self.client.post(reverse(name), {
+                    'title': "Dune", 'description': "-", 'image': SimpleUploadedFile('cover.jpg', data), **extra,
+                })
+            self.assertEqual(resp.status_code, 200)
+            self.assertContains(resp, "Image trop volumineuse")
+        self.assertFalse(Ticket.objects.exists())
+        resp = self.client.post(reverse('create_ticket'), {
+            'title': "Dune", 'description': "-", 'image': SimpleUploadedFile('cover.jpg', data),
+        })
+        self.assertEqual(resp.status_code, 302)
+
+    def test_upload_attached_to_ticket_by_token(self):
+        """Le formulaire du ticket envoie le jeton : l'envoi terminé devient l'image, puis est supprimé."""
+        data = jpeg_bytes()
+        self.upload(data)
+        token = Upload.objects.get().token
+        resp = self.client.post(reverse('create_ticket'), {
+            'title': "Dune", 'description': "-", 'upload_token': token,
+        })
+        self.assertEqual(resp.status_code, 302)
+        ticket = Ticket.objects.get()
+        with ticket.image.open() as file:
+            self.assertEqual(file.read(), data)
+        self.assertFalse(Upload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media, 'uploads')), [])
+
+    def test_token_private_to_its_user(self):
+        """Le jeton d'un autre utilisateur ne permet ni d'envoyer des morceaux ni de rattacher l'image."""
+        url = self.upload(jpeg_bytes())
+        token = Upload.objects.get().token
+        self.client.login(username="bob", password="Pass1234!")
+        self.assertEqual(self.client.get(url).status_code, 404)
+        resp = self.client.post(reverse('create_ticket'), {
+            'title': "Dune", 'description': "-", 'upload_token': token,
+        })
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_expired_uploads_purged(self):
+        """gc_media supprime les envois inachevés depuis plus de UPLOAD_EXPIRY."""
+        url = self.start(5000).json()['url']
+        self.chunk(url, 0, jpeg_bytes()[:1000])
+        Upload.objects.update(time_updated=timezone.now() - timedelta(days=2))
+        self.assertEqual(uploads.purge_expired(), (1, 1000))
+        os.makedirs(os.path.join(self.media, 'media'))
+        out = StringIO()
+        call_command('gc_media', stdout=out)
+        self.assertIn("0 expired upload(s) deleted", out.getvalue())
+        self.assertFalse(Upload.objects.exists())
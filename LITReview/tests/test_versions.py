@@ -0,0 +1,65 @@
+"""Champs time_updated et jetons de version (id, time_updated) : édition, synchronisation incrémentale."""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from LITReview import versions
+from LITReview.models import Ticket, Review
+
+
+@override_settings(FEED_CACHE_TIMEOUT=0)
+class VersionTokenTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.client.force_login(self.alice)
+        self.ticket = Ticket.objects.create(user=self.alice, title="Dune", description="-")
+        self.review = Review.objects.create(user=self.alice, ticket=self.ticket, headline="H", body="B", rating=3)
+        # Dates anciennes : une écriture pendant le test est forcément plus récente
+        past = self.ticket.time_created - timedelta(days=1)
+        Ticket.objects.update(time_updated=past)
+        Review.objects.update(time_updated=past)
+        self.ticket.refresh_from_db()
+        self.review.refresh_from_db()
+
+    def test_edit_views_update_time_updated(self):
+        """Modifier un ticket ou une critique change son jeton de version."""
+        token = versions.version_token(self.ticket)
+        self.client.post(reverse('edit_ticket', args=[self.ticket.id]), {'title': "Dune II", 'description': "-"})
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.title, "Dune II")
+        self.assertGreater(self.ticket.time_updated, token[1])
+
+        before = self.review.time_updated
+        self.client.post(reverse('edit_review', args=[self.review.id]), {'headline': "H2", 'body': "B", 'rating': 4})
+        self.review.refresh_from_db()
+        self.assertGreater(self.review.time_updated, before)
+
+    def test_derived_fields_keep_time_updated(self):
+        """Les statistiques (mises à jour F()) ne changent pas time_updated du ticket."""
+        bob = User.objects.create_user(username='bob', password='testpass')
+        Review.objects.create(user=bob, ticket=self.ticket, headline="H", body="B", rating=5)
+        before = self.ticket.time_updated
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.review_count, 2)
+        self.assertEqual(self.ticket.time_updated, before)
+
+    def test_changed_since_pages_through_ties(self):
+        """Synchronisation : ordre (time_updated, id), reprise après le dernier jeton reçu, égalités comprises."""
+        tickets = [self.ticket] + [
+            Ticket.objects.create(user=self.alice, title=f"T{i}", description="-") for i in range(4)
+        ]
+        Ticket.objects.filter(pk__in=[t.pk for t in tickets[1:3]]).update(time_updated=self.ticket.time_updated)
+        received, token = [], None
+        while True:
+            page = list(versions.changed_since(Ticket.objects.all(), token)[:2])
+            if not page:
+                break
+            received += page
+            token = versions.version_token(page[-1])
+        self.assertEqual([t.pk for t in received], [t.pk for t in tickets])
+
+        tickets[1].save()
+        self.assertEqual(list(versions.changed_since(Ticket.objects.all(), token)), [tickets[1]])
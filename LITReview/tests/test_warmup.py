@@ -0,0 +1,52 @@
+"""Chargeur de templates en cache et compilation au démarrage (warm_templates)."""
+
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.template.loaders.filesystem import Loader
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from LITReview.models import Ticket, Review
+from LITReview.warmup import template_names, warm_templates
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ])],
+    },
+}]
+
+
+class TemplateWarmupTests(TestCase):
+    def setUp(self):
+        # Activé par test : moteur de templates (et cache du chargeur) neuf pour chacun
+        overrides = override_settings(TEMPLATES=CACHED_TEMPLATES, FEED_CACHE_TIMEOUT=0, FRAGMENT_CACHE_TIMEOUT=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_includes_followed(self):
+        """Depuis flux.html : le template parent et les snippets inclus sont compilés aussi."""
+        with mock.patch.object(Loader, 'get_contents', autospec=True, side_effect=Loader.get_contents) as read:
+            self.assertEqual(warm_templates(['feed/flux.html']), 4)
+        self.assertEqual(
+            sorted(call.args[1].template_name for call in read.call_args_list),
+            ['base.html', 'feed/flux.html', 'feed/partials/review_snippet.html', 'feed/partials/ticket_snippet.html'],
+        )
+
+    def test_no_template_read_after_warmup(self):
+        """Après la compilation au démarrage, afficher le flux ne lit plus aucun fichier de template."""
+        self.assertEqual(warm_templates(), len(list(template_names())))
+        alice = User.objects.create_user(username='alice', password='testpass')
+        ticket = Ticket.objects.create(user=alice, title="Dune", description="-")
+        Review.objects.create(user=alice, ticket=ticket, headline="H", body="B", rating=4)
+        self.client.force_login(alice)
+        with mock.patch.object(Loader, 'get_contents', side_effect=AssertionError("template read from disk")):
+            resp = self.client.get(reverse('flux'))
+        self.assertContains(resp, "Dune")
@@ -0,0 +1,98 @@
+"""File d'écriture des vues (writes.run) : transaction unique, nouvel essai sur « database is locked »."""
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from LITReview import writes
+from LITReview.models import Ticket, Review, UserFollows
+
+
+class WriteTransactionTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+
+    def test_related_writes_rolled_back_together(self):
+        """Une erreur après une première écriture annule toutes les écritures de l'action."""
+        def follow_then_fail():
+            UserFollows.objects.create(user=self.alice, followed_user=self.bob)
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            writes.run(follow_then_fail)
+        self.assertFalse(UserFollows.objects.exists())
+
+    def test_ticket_and_review_view_is_one_transaction(self):
+        """Création ticket + critique : si la critique échoue, le ticket n'est pas créé."""
+        self.client.force_login(self.alice)
+        data = {'title': "Dune", 'description': "-", 'headline': "H", 'body': "B", 'rating': 4}
+        with mock.patch.object(Review.objects, 'create', side_effect=OperationalError("disk I/O error")):
+            with self.assertRaises(OperationalError):
+                self.client.post(reverse('create_ticket_review'), data)
+        self.assertFalse(Ticket.objects.exists())
+
+        self.client.post(reverse('create_ticket_review'), data)
+        self.assertEqual(Review.objects.get().ticket, Ticket.objects.get())
+
+
+@override_settings(WRITE_QUEUE=True, WRITE_RETRIES=3, WRITE_BACKOFF=0.1, WRITE_BACKOFF_MAX=0.3)
+class WriteRetryTests(TransactionTestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+        sleep = mock.patch('LITReview.writes.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_locked_transaction_retried_with_backoff(self):
+        """Transaction rejouée après des attentes croissantes (plafonnées), la tentative refusée étant annulée."""
+        attempts = []
+
+        def follow():
+            attempts.append(UserFollows.objects.create(user=self.alice, followed_user=self.bob))
+            if len(attempts) < 4:
+                raise OperationalError("database is locked")
+            return attempts[-1]
+
+        follow = writes.run(follow)
+        self.assertEqual(len(attempts), 4)
+        self.assertEqual(list(UserFollows.objects.all()), [follow])
+        delays = [call.args[0] for call in self.sleep.call_args_list]
+        for delay, (low, high) in zip(delays, [(0.05, 0.1), (0.1, 0.2), (0.15, 0.3)], strict=True):
+            self.assertTrue(low <= delay <= high, delays)
+
+    def test_gives_up_after_retries(self):
+        """Au-delà de WRITE_RETRIES nouveaux essais, l'erreur est propagée ; les autres erreurs immédiatement."""
+        locked = mock.Mock(side_effect=OperationalError("database is locked"))
+        with self.assertRaises(OperationalError):
+            writes.run(locked)
+        self.assertEqual(locked.call_count, 4)
+
+        broken = mock.Mock(side_effect=OperationalError("no such table: x"))
+        with self.assertRaises(OperationalError):
+            writes.run(broken)
+        self.assertEqual(broken.call_count, 1)
+
+    def test_edit_and_delete_views_retried(self):
+        """Modification et suppression d'une critique, suppression du compte : rejouées sur « database is locked »."""
+        ticket = Ticket.objects.create(user=self.bob, title="Dune", description="-")
+        review = Review.objects.create(user=self.alice, ticket=ticket, headline="H", body="B", rating=2)
+        UserFollows.objects.create(user=self.alice, followed_user=self.bob)
+        self.client.force_login(self.alice)
+        locked_once = [OperationalError("database is locked"), None]
+
+        with mock.patch('LITReview.ticket_stats.review_changed', side_effect=locked_once):
+            self.client.post(reverse('edit_review', args=[review.id]), {'headline': "H2", 'body': "B", 'rating': 4})
+        self.assertEqual(Review.objects.get().headline, "H2")
+
+        with mock.patch('LITReview.ticket_stats.review_removed', side_effect=locked_once):
+            self.client.post(reverse('delete_review', args=[review.id]))
+        self.assertFalse(Review.objects.exists())
+
+        with mock.patch('LITReview.feed_cache.bump_versions', side_effect=locked_once):
+            self.client.post(reverse('delete_account'))
+        self.assertFalse(User.objects.filter(username='alice').exists())
@@ -0,0 +1,109 @@
+"""
+Denormalized review statistics of the tickets.
+
+Each Ticket carries review_count, rating_sum and last_reviewed_at so that the
+feed and posts pages can show "N critiques, moyenne 3.8" without aggregating
+Review rows (the counters come with the ticket, at no extra query).
+
+The counters are maintained by the Review signal handlers (signals.py) with
+F() expressions, i.e. a single atomic UPDATE computed by the database, so that
+concurrent reviews never overwrite each other:
+
+- review created: count + 1, sum + rating, last_reviewed_at = its date,
+- review edited: sum + (new rating - old rating),
+- review deleted: count - 1, sum - rating, last_reviewed_at recomputed by a
+  subquery on the review_ticket_time_idx index.
+
+Writes that bypass the signals (bulk_create, QuerySet.update / delete, raw SQL)
+make the counters drift: reconcile_ticket_stats (management command) repairs them.
+"""
+
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import feed_cache, fragments
+from .models import Ticket, Review
+
+BATCH_SIZE = 1000
+
+
+def _last_review_date(ticket_ref):
+    """Subquery of the date of the latest review of the ticket referenced by ticket_ref."""
+    return Subquery(
+        Review.objects.filter(ticket=ticket_ref).order_by('-time_created').values('time_created')[:1]
+    )
+
+
+def review_added(review):
+    """Counts a new review in the statistics of its ticket."""
+    Ticket.objects.filter(pk=review.ticket_id).update(
+        review_count=F('review_count') + 1,
+        rating_sum=F('rating_sum') + review.rating,
+        last_reviewed_at=review.time_created,
+    )
+
+
+def review_changed(review, old_rating):
+    """Applies the rating change of an edited review to its ticket."""
+    if review.rating != old_rating:
+        Ticket.objects.filter(pk=review.ticket_id).update(
+            rating_sum=F('rating_sum') + (review.rating - old_rating),
+        )
+
+
+def review_removed(ticket_id, rating):
+    """Removes a deleted review (of ticket_id, with rating) from the statistics of its ticket."""
+    Ticket.objects.filter(pk=ticket_id).update(
+        review_count=F('review_count') - 1,
+        rating_sum=F('rating_sum') - rating,
+        last_reviewed_at=_last_review_date(OuterRef('pk')),
+    )
+
+
+def actual_stats(tickets):
+    """
+    Annotates tickets with the statistics computed from the Review rows
+    (actual_count, actual_sum, actual_last), one correlated subquery each.
+    """
+    reviews = Review.objects.filter(ticket=OuterRef('pk')).order_by().values('ticket')
+    return tickets.annotate(
+        actual_count=Coalesce(
+            Subquery(reviews.annotate(n=Count('id')).values('n')), Value(0), output_field=IntegerField()
+        ),
+        actual_sum=Coalesce(
+            Subquery(reviews.annotate(s=Sum('rating')).values('s')), Value(0), output_field=IntegerField()
+        ),
+        actual_last=Subquery(reviews.annotate(m=Max('time_created')).values('m')),
+    )
+
+
+def reconcile(tickets=None, dry_run=False):
+    """
+    Compares the counters of tickets (every ticket by default) with the Review
+    rows and rewrites the ones that drifted. Returns the number of drifted
+    tickets (not rewritten when dry_run is True).
+    """
+    tickets = Ticket.objects.all() if tickets is None else tickets
+    rows = actual_stats(tickets.order_by('pk')).values_list(
+        'pk', 'review_count', 'rating_sum', 'last_reviewed_at', 'actual_count', 'actual_sum', 'actual_last'
+    )
+    drifted, batch = 0, []
+    for pk, count, total, last, actual_count, actual_sum, actual_last in rows.iterator(chunk_size=BATCH_SIZE):
+        if (count, total, last) == (actual_count, actual_sum, actual_last):
+            continue
+        drifted += 1
+        batch.append(Ticket(pk=pk, review_count=actual_count, rating_sum=actual_sum, last_reviewed_at=actual_last))
+        if len(batch) >= BATCH_SIZE:
+            _write(batch, dry_run)
+            batch = []
+    _write(batch, dry_run)
+    return drifted
+
+
+def _write(batch, dry_run):
+    """Writes the repaired counters and invalidates the snippets and the feeds showing the tickets."""
+    if batch and not dry_run:
+        Ticket.objects.bulk_update(batch, Ticket.STATS_FIELDS, batch_size=BATCH_SIZE)
+        pks = [ticket.pk for ticket in batch]
+        fragments.bump(Ticket, *pks)
+        feed_cache.bump_audiences(*Ticket.objects.filter(pk__in=pks).values_list('user', flat=True).distinct())
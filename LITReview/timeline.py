@@ -0,0 +1,197 @@
+"""
+Fan-out-on-write timeline for the LITReview 'flux' page.
+
+When settings.FEED_STRATEGY is 'write', every feed is materialized in the
+FeedEntry table so that reading a page is a single indexed range scan
+(see feed.timeline_keys). This module keeps the table in sync:
+
+- a new ticket is pushed to its author and to the followers of its author,
+- a new review is pushed, as an orphan review, to the readers of its author who
+  do not see the reviewed ticket (the others see it inside the ticket block),
+- a deleted ticket or review is removed from every feed,
+- a follow or block change between a user and another user rewrites, in the
+  feed of the user, only the entries involving the other user (their tickets,
+  their reviews and the reviews on their tickets: a review becomes an orphan,
+  or back, when the ticket it is on leaves or enters the feed). Several changes
+  of one operation (BlockedUser.block deletes the follows, then blocks) are
+  applied once, at the end of a batched() block.
+
+With the 'hybrid' strategy, the posts of popular authors (see
+feed.popular_author_ids) are only pushed to the feed of their author: the feed
+engine pulls them at read time for the followers, so that one post never turns
+into tens of thousands of writes. The author is recorded (PulledAuthor) before
+the first post that skips the fan-out, in the same transaction, and stays pulled
+when their number of followers drops: their posts are missing from the
+timelines of their followers until settle_authors pushes them.
+
+The handlers are connected in signals.py; rebuild_feed (management command)
+releases the authors who are no longer popular and rebuilds every feed from
+scratch.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from .models import UserFollows, BlockedUser, FeedEntry, PulledAuthor, Ticket, Review
+from .feed import read_time_keys, popular_author_ids, pulled_authors
+
+BATCH_SIZE = 1000
+
+# Inside batched(): (user id, other user id) relations changed, resynced at the end of the block
+_pending = contextvars.ContextVar('timeline_pending', default=None)
+
+
+def is_enabled():
+    """True when the FeedEntry timeline must be maintained."""
+    return settings.FEED_STRATEGY != 'read'
+
+
+def audience(author_id):
+    """
+    Queryset of the ids of the users whose feed shows the posts of author_id:
+    the author and the followers who have not blocked them.
+    """
+    return get_user_model().objects.filter(
+        Q(pk=author_id) | Q(pk__in=UserFollows.objects.filter(followed_user=author_id).values('user'))
+    ).exclude(
+        pk__in=BlockedUser.objects.filter(blocked_user=author_id).values('user')
+    ).values_list('pk', flat=True)
+
+
+def is_pulled(author_id):
+    """
+    True when the posts of author_id are pulled at read time instead of being
+    pushed; the author is then recorded as pulled (PulledAuthor).
+    """
+    if settings.FEED_STRATEGY != 'hybrid' or author_id not in popular_author_ids():
+        return False
+    PulledAuthor.objects.get_or_create(author_id=author_id)
+    return True
+
+
+def _push(owner_ids, kind, item_id, time_created):
+    """Adds the item to the feed of every owner, in batches."""
+    batch = []
+    for owner_id in owner_ids.iterator(chunk_size=BATCH_SIZE):
+        batch.append(FeedEntry(owner_id=owner_id, kind=kind, item_id=item_id, time_created=time_created))
+        if len(batch) >= BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def push_ticket(ticket):
+    """Pushes a new ticket to the feeds of its audience (only its author's if pulled)."""
+    owners = audience(ticket.user_id)
+    if is_pulled(ticket.user_id):
+        owners = owners.filter(pk=ticket.user_id)
+    _push(owners, FeedEntry.TICKET, ticket.id, ticket.time_created)
+
+
+def push_review(review):
+    """
+    Pushes a new review, as an orphan review, to the readers of its author who
+    cannot see the reviewed ticket (only its author if pulled).
+    """
+    ticket_author_id = review.ticket.user_id
+    owners = audience(review.user_id).exclude(pk__in=audience(ticket_author_id))
+    if is_pulled(review.user_id):
+        owners = owners.filter(pk=review.user_id)
+    _push(owners, FeedEntry.REVIEW, review.id, review.time_created)
+
+
+def remove_item(kind, item_id):
+    """Removes a deleted ticket or review from every feed."""
+    FeedEntry.objects.filter(kind=kind, item_id=item_id).delete()
+
+
+def rebuild_for(user):
+    """
+    Rebuilds the whole feed of user from the read-time query (without the posts
+    pulled at read time in 'hybrid' mode).
+    """
+    exclude_authors = pulled_authors(user) if settings.FEED_STRATEGY == 'hybrid' else None
+    keys = read_time_keys(user, exclude_authors=exclude_authors)
+    with transaction.atomic():
+        FeedEntry.objects.filter(owner=user).delete()
+        batch = []
+        for time_created, kind, item_id in keys.iterator(chunk_size=BATCH_SIZE):
+            batch.append(FeedEntry(owner=user, kind=kind, item_id=item_id, time_created=time_created))
+            if len(batch) >= BATCH_SIZE:
+                FeedEntry.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            FeedEntry.objects.bulk_create(batch)
+
+
+def resync_relation(user_id, other_id):
+    """
+    Rewrites the entries of the feed of user_id that depend on its relation with
+    other_id (follow or block added or removed): the tickets and reviews of
+    other_id and the reviews on their tickets. The cost depends on the activity
+    of other_id, not on the size of the feed.
+    """
+    user = get_user_model()(pk=user_id)
+    exclude_authors = pulled_authors(user) if settings.FEED_STRATEGY == 'hybrid' else None
+    keys = read_time_keys(user, exclude_authors=exclude_authors, involving=other_id)
+    involved = Q(kind=FeedEntry.TICKET, item_id__in=Ticket.objects.filter(user=other_id).values('pk')) | Q(
+        kind=FeedEntry.REVIEW,
+        item_id__in=Review.objects.filter(Q(user=other_id) | Q(ticket__user=other_id)).values('pk'),
+    )
+    with transaction.atomic():
+        FeedEntry.objects.filter(involved, owner=user_id).delete()
+        FeedEntry.objects.bulk_create(
+            [FeedEntry(owner_id=user_id, kind=kind, item_id=item_id, time_created=time_created)
+             for time_created, kind, item_id in keys.iterator(chunk_size=BATCH_SIZE)],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def relation_changed(user_id, other_id):
+    """Resyncs the feed of user_id after a change of its relation with other_id (deferred inside batched())."""
+    pending = _pending.get()
+    if pending is None:
+        resync_relation(user_id, other_id)
+    else:
+        pending.add((user_id, other_id))
+
+
+@contextmanager
+def batched():
+    """Applies the relation changes of the block once per (user, other user) pair, at its end."""
+    if _pending.get() is not None:
+        yield
+        return
+    pending = set()
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    for user_id, other_id in sorted(pending):
+        resync_relation(user_id, other_id)
+
+
+def settle_authors():
+    """
+    Records the popular authors as pulled ('hybrid'), so that a rebuild does not
+    push their posts, and stops pulling the recorded authors who are no longer
+    popular: their posts are pushed to the feeds of their followers
+    (resync_relation). Returns the number of authors released.
+    """
+    popular = popular_author_ids() if settings.FEED_STRATEGY == 'hybrid' else set()
+    PulledAuthor.objects.bulk_create([PulledAuthor(author_id=pk) for pk in popular], ignore_conflicts=True)
+    released = 0
+    for author_id in PulledAuthor.objects.exclude(author__in=popular).values_list('author', flat=True):
+        with transaction.atomic():
+            PulledAuthor.objects.filter(author=author_id).delete()
+            for user_id in audience(author_id).exclude(pk=author_id).iterator(chunk_size=BATCH_SIZE):
+                resync_relation(user_id, author_id)
+        released += 1
+    return released
@@ -0,0 +1,182 @@
+"""
+Chunked, resumable uploads of the ticket images.
+
+A multipart POST is buffered by Django (memory, then a temporary file) before
+TicketForm can look at it: a 50 MB file that will be rejected still costs the
+whole transfer. The upload endpoints (views.upload_start_view and
+views.upload_chunk_view) stream the image to settings.UPLOAD_TEMP_DIR instead:
+
+1. POST /uploads/ (filename, size): rejected at once above settings.UPLOAD_MAX_BYTES,
+   returns a token,
+2. PATCH /uploads/<token>/ with an Upload-Offset header and a chunk as body,
+   written to disk as it is read; the first bytes must be those of a supported
+   image format (JPEG, PNG, GIF, WebP), a chunk going past the announced size
+   is refused before being read,
+3. GET /uploads/<token>/ returns the offset to resume from after an interruption,
+4. the ticket form is posted with the token (hidden field upload_token) instead
+   of the file: the finished upload becomes the image of the ticket.
+
+Uploads are private to their user, and deleted once attached. gc_media deletes
+the ones left unfinished for settings.UPLOAD_EXPIRY seconds.
+"""
+
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+
+from .models import Upload
+
+CHUNK_SIZE = 64 * 1024
+
+# First bytes of the accepted formats -> MIME type
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+SNIFF_BYTES = 12
+
+
+class UploadError(Exception):
+    """Raised for a refused upload or chunk; status is the HTTP status of the response."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def sniff(head):
+    """MIME type of an image from its first bytes, None for an unsupported format."""
+    for signature, mime in SIGNATURES:
+        if head.startswith(signature):
+            return mime
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def path(upload):
+    """Path of the bytes received for upload."""
+    return os.path.join(settings.UPLOAD_TEMP_DIR, upload.token)
+
+
+def start(user, filename, size):
+    """Creates an upload of size bytes for user, refused above settings.UPLOAD_MAX_BYTES."""
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("Taille invalide.")
+    if size <= 0:
+        raise UploadError("Taille invalide.")
+    if size > settings.UPLOAD_MAX_BYTES:
+        raise UploadError(f"Image trop volumineuse (maximum {settings.UPLOAD_MAX_BYTES} octets).", status=413)
+    upload = Upload.objects.create(user=user, filename=os.path.basename(filename or 'image')[:255], size=size)
+    os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+    open(path(upload), 'wb').close()
+    return upload
+
+
+def append(upload, offset, stream, length):
+    """
+    Appends the chunk of length bytes read from stream at offset.
+
+    Refuses (before reading it) a chunk at another offset than the bytes already
+    received (409: the client resumes from upload.received) or going past the
+    announced size (413). The first chunk is refused (415) and the upload
+    deleted if it does not start like a supported image.
+    """
+    try:
+        offset, length = int(offset), int(length)
+    except (TypeError, ValueError):
+        raise UploadError("En-têtes Upload-Offset / Content-Length invalides.")
+    if offset != upload.received:
+        raise UploadError(f"Décalage attendu : {upload.received}.", status=409)
+    if length <= 0 or offset + length > upload.size:
+        raise UploadError("Le morceau dépasse la taille annoncée.", status=413)
+
+    written = 0
+    with open(path(upload), 'r+b') as file:
+        file.seek(offset)
+        while written < length:
+            data = stream.read(min(CHUNK_SIZE, length - written))
+            if not data:
+                break
+            if offset == 0 and written == 0 and sniff(data[:SNIFF_BYTES]) is None:
+                discard(upload)
+                raise UploadError("Format non pris en charge (JPEG, PNG, GIF ou WebP).", status=415)
+            file.write(data)
+            written += len(data)
+        file.truncate(offset + written)
+    # An interrupted chunk is kept: the client resumes after its last byte
+    upload.received = offset + written
+    upload.save(update_fields=['received', 'time_updated'])
+    if written < length:
+        raise UploadError("Morceau incomplet.", status=400)
+    return upload
+
+
+class StoredUpload(UploadedFile):
+    """A finished upload, seen by forms and storages as an uploaded file already on disk."""
+
+    def __init__(self, upload):
+        file = open(path(upload), 'rb')
+        content_type = sniff(file.read(SNIFF_BYTES))
+        file.seek(0)
+        super().__init__(file, upload.filename, content_type, upload.size)
+        self.upload = upload
+
+    def temporary_file_path(self):
+        return path(self.upload)
+
+
+def open_upload(user, token):
+    """The finished upload token of user as a StoredUpload, None if unknown, foreign or unfinished."""
+    upload = Upload.objects.filter(token=token, user=user).first()
+    if upload is None or not upload.is_complete or not os.path.exists(path(upload)):
+        return None
+    return StoredUpload(upload)
+
+
+def finish(stored):
+    """Releases a StoredUpload once attached to a ticket (the storage has its own copy)."""
+    stored.close()
+    discard(stored.upload)
+
+
+def discard(upload):
+    """Deletes upload and its bytes."""
+    try:
+        os.remove(path(upload))
+    except FileNotFoundError:
+        pass
+    if upload.pk:
+        upload.delete()
+
+
+def purge_expired():
+    """
+    Deletes the uploads not updated for settings.UPLOAD_EXPIRY seconds and the
+    files of UPLOAD_TEMP_DIR without upload. Returns (uploads, bytes) deleted.
+    """
+    limit = timezone.now() - timedelta(seconds=settings.UPLOAD_EXPIRY)
+    count = freed = 0
+    for upload in Upload.objects.filter(time_updated__lt=limit).iterator():
+        if os.path.exists(path(upload)):
+            freed += os.path.getsize(path(upload))
+        discard(upload)
+        count += 1
+    if os.path.isdir(settings.UPLOAD_TEMP_DIR):
+        with os.scandir(settings.UPLOAD_TEMP_DIR) as entries:
+            for entry in entries:
+                stat = entry.stat()
+                if entry.is_file() and stat.st_mtime < limit.timestamp() and not Upload.objects.filter(
+                    token=entry.name
+                ).exists():
+                    os.remove(entry.path)
+                    count += 1
+                    freed += stat.st_size
+    return count, freed
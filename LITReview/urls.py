@@ -25,6 +25,10 @@ urlpatterns = [
     path('review/create/', views.create_ticket_and_review_view, name='create_ticket_review'),
     path('ticket/<int:ticket_id>/review/', views.create_review_response_view, name='create_review_response'),
 
+    # ENVOI D'IMAGE PAR MORCEAUX (reprise possible) :
+    path('uploads/', views.upload_start_view, name='upload_start'),
+    path('uploads/<str:token>/', views.upload_chunk_view, name='upload_chunk'),
+
     # POSTS :
     path('posts/', views.user_posts_view, name='posts'),
     # Modifier / Supprimer tickets:
@@ -0,0 +1,38 @@
+"""
+Version tokens of the tickets and reviews.
+
+Ticket.time_updated and Review.time_updated (auto_now, indexed with the id) are
+set by every save(): creation and the edit views (edit_ticket_view,
+edit_review_view, admin). The token (id, time_updated) of an object therefore
+changes whenever its own content is edited, and serves as:
+
+- a cache key component (fragments.py),
+- a sync cursor: changed_since() returns the objects saved after a token, in
+  (time_updated, id) order, by a range scan of the *_updated_idx index; a
+  caller keeps the token of the last object received and asks for the next ones.
+
+The derived fields written by their own UPDATEs (review statistics, image
+variants) do not change time_updated: they have their own invalidation
+(fragments.py, feed_cache.py).
+"""
+
+from django.db.models import Q
+
+
+def version_token(obj):
+    """(id, time_updated) of a ticket or review."""
+    return obj.pk, obj.time_updated
+
+
+def changed_since(queryset, token=None):
+    """
+    Objects of queryset saved after token (all of them without token), oldest
+    first; slice the result to page through it.
+    """
+    if token is not None:
+        pk, time_updated = token
+        # time_updated >= ? bounds the index range; the OR only filters its first rows
+        queryset = queryset.filter(time_updated__gte=time_updated).filter(
+            Q(time_updated__gt=time_updated) | Q(pk__gt=pk)
+        )
+    return queryset.order_by('time_updated', 'pk')
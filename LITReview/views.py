@@ -1,14 +1,22 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Value, CharField
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods, require_POST
+from django.http import JsonResponse
+from django.urls import reverse
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Value
+from django.db.models.functions import Lower
 
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Q
-from itertools import chain
 
-from .models import UserFollows, BlockedUser, Ticket, Review
+from . import fragments, replica, uploads, writes
+from .models import UserFollows, BlockedUser, Ticket, Review, Upload
+from .feed import user_posts_keys, hydrate_posts
+from .feed_cache import cached_feed, feed_etag, feed_last_modified, feed_version
 from .forms import (
     SignUpForm, ProfileUpdateForm, LoginForm, FollowUserForm,
     BlockUserForm, TicketForm, ReviewForm, TicketReviewForm
@@ -119,7 +127,8 @@ def delete_account(request):
     if request.method == "POST":
         user = request.user
         logout(request)
-        user.delete()
+        # Fetched by each attempt: delete() clears the pk of the instance it deleted
+        writes.run(lambda: User.objects.get(pk=user.pk).delete())
         messages.success(request, "Votre compte a été supprimé avec succès.")
         return redirect('home')
     return render(request, 'auth/delete_account.html')
@@ -161,13 +170,13 @@ def subscriptions_view(request):
             if block_form.is_valid():
                 username_to_block = block_form.cleaned_data['username'].strip()
                 try:
-                    to_block = User.objects.get(username__iexact=username_to_block)
+                    to_block = User.objects.get(username__lower=Lower(Value(username_to_block)))
                     if to_block == user:
                         messages.error(request, "Tu ne peux pas te bloquer toi-même.")
                     elif BlockedUser.objects.filter(user=user, blocked_user=to_block).exists():
                         messages.warning(request, f"{to_block.username} est déjà bloqué.")
                     else:
-                        BlockedUser.block(user, to_block)
+                        writes.run(BlockedUser.block, user, to_block)
                         messages.success(request, f"{to_block.username} a été bloqué.")
                         return redirect('subscriptions')
                 except User.DoesNotExist:
@@ -177,7 +186,7 @@ def subscriptions_view(request):
             if form.is_valid():
                 username_to_follow = form.cleaned_data['username'].strip()
                 try:
-                    to_follow = User.objects.get(username__iexact=username_to_follow)
+                    to_follow = User.objects.get(username__lower=Lower(Value(username_to_follow)))
                     if to_follow == user:
                         messages.error(request, "Tu ne peux pas te suivre toi-même.")
                     elif BlockedUser.objects.filter(user=to_follow, blocked_user=user).exists():
@@ -187,23 +196,26 @@ def subscriptions_view(request):
                     elif UserFollows.objects.filter(user=user, followed_user=to_follow).exists():
                         messages.warning(request, f"Tu suis déjà {to_follow.username}.")
                     else:
-                        UserFollows.objects.create(user=user, followed_user=to_follow)
+                        writes.run(UserFollows.objects.create, user=user, followed_user=to_follow)
                         messages.success(request, f"Tu suis maintenant {to_follow.username}.")
                         return redirect('subscriptions')
                 except User.DoesNotExist:
                     messages.error(request, "Cet utilisateur n'existe pas.")
 
-    followed_users = UserFollows.objects.filter(user=user)
-    followers = UserFollows.objects.filter(followed_user=user)
-    blocked_users = BlockedUser.objects.filter(user=user)
-
-    return render(request, 'auth/subscriptions.html', {
-        'form': form,
-        'block_form': block_form,
-        'followed_users': followed_users,
-        'followers': followers,
-        'blocked_users': blocked_users
-    })
+    # Lists read from the replica (querysets evaluated by the template), when it holds
+    # the last follows and blocks of the user (bumped in the feed version)
+    with replica.reads(fresh_since=feed_version(user.id)):
+        followed_users = UserFollows.objects.filter(user=user)
+        followers = UserFollows.objects.filter(followed_user=user)
+        blocked_users = BlockedUser.objects.filter(user=user)
+
+        return render(request, 'auth/subscriptions.html', {
+            'form': form,
+            'block_form': block_form,
+            'followed_users': followed_users,
+            'followers': followers,
+            'blocked_users': blocked_users
+        })
 
 
 @login_required
@@ -225,7 +237,7 @@ def unfollow_view(request, user_id):
     """
     try:
         to_unfollow = User.objects.get(pk=user_id)
-        UserFollows.objects.filter(user=request.user, followed_user=to_unfollow).delete()
+        writes.run(UserFollows.objects.filter(user=request.user, followed_user=to_unfollow).delete)
         messages.success(request, f"Vous ne suivez plus {to_unfollow.username}.")
     except User.DoesNotExist:
         messages.error(request, "Utilisateur introuvable.")
@@ -252,7 +264,7 @@ def unblock_user_view(request, user_id):
         to_unblock = User.objects.get(pk=user_id)
         blocked_relation = BlockedUser.objects.filter(user=request.user, blocked_user=to_unblock)
         if blocked_relation.exists():
-            blocked_relation.delete()
+            writes.run(blocked_relation.delete)
             messages.success(request, f"{to_unblock.username} a été débloqué.")
         else:
             messages.info(request, f"{to_unblock.username} n'était pas bloqué.")
@@ -280,7 +292,7 @@ def block_from_follower_view(request, user_id):
     """
     try:
         to_block = User.objects.get(pk=user_id)
-        BlockedUser.block(request.user, to_block)
+        writes.run(BlockedUser.block, request.user, to_block)
         messages.success(request, f"{to_block.username} a été bloqué.")
     except User.DoesNotExist:
         messages.error(request, "Utilisateur introuvable.")
@@ -288,25 +300,28 @@ def block_from_follower_view(request, user_id):
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=feed_etag, last_modified_func=feed_last_modified)
 def user_posts_view(request):
     """
     Displays the authenticated user's own posts (tickets and reviews).
 
-    - Fetches all tickets and reviews created by the user.
-    - Annotates each object with a content_type for display logic.
-    - Combines and sorts posts in reverse chronological order.
+    - Merges the user's tickets and reviews in reverse chronological order with a
+      database UNION, paginated (?page=..., settings.POSTS_PAGE_SIZE posts per page).
+    - Loads only the posts of the current page, annotated with a content_type for display logic.
+    - Conditional GET: 304 Not Modified while the user's feed version is unchanged (see feed_cache).
+    - Snippets rendered from the fragment cache, loaded for the whole page at once (see fragments).
+    - Read from the replica when it holds the current feed version of the user (see replica).
 
     Template:
     - feed/posts.html
     """
-    tickets = Ticket.objects.filter(user=request.user).annotate(content_type=Value('TICKET', output_field=CharField()))
-    reviews = Review.objects.filter(user=request.user).annotate(content_type=Value('REVIEW', output_field=CharField()))
-    posts = sorted(
-        chain(tickets, reviews),
-        key=lambda post: post.time_created,
-        reverse=True
-    )
-    return render(request, 'feed/posts.html', {'posts': posts})
+    with replica.reads(fresh_since=feed_version(request.user.id)):
+        paginator = Paginator(user_posts_keys(request.user), settings.POSTS_PAGE_SIZE)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        posts = hydrate_posts(page_obj.object_list)
+        fragments.prefetch(posts)
+        return render(request, 'feed/posts.html', {'posts': posts, 'page_obj': page_obj})
 
 
 @login_required
@@ -321,11 +336,13 @@ def create_ticket_view(request):
     - feed/form_page.html
     """
     if request.method == 'POST':
-        form = TicketForm(request.POST, request.FILES)
+        form = TicketForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
-            ticket = form.save(commit=False)
-            ticket.user = request.user
-            ticket.save()
+            writes.run(Ticket.objects.create, user=request.user, **{
+                field: form.cleaned_data[field] for field in TicketForm.Meta.fields
+            })
+            if form.stored_upload:
+                uploads.finish(form.stored_upload)
             messages.success(request, "Le ticket a bien été créé.")
             return redirect('flux')
         else:
@@ -371,10 +388,9 @@ def create_review_response_view(request, ticket_id):
     if request.method == 'POST':
         form = ReviewForm(request.POST)
         if form.is_valid():
-            review = form.save(commit=False)
-            review.user = request.user
-            review.ticket = ticket
-            review.save()
+            writes.run(Review.objects.create, user=request.user, ticket=ticket, **{
+                field: form.cleaned_data[field] for field in ReviewForm.Meta.fields
+            })
             messages.success(request, "Votre critique a été publiée.")
             return redirect('flux')
     else:
@@ -409,28 +425,33 @@ def create_ticket_and_review_view(request):
     - To 'flux' after successful creation of both objects
     """
     if request.method == 'POST':
-        form = TicketReviewForm(request.POST, request.FILES)
+        form = TicketReviewForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
             similar_tickets = Ticket.objects.filter(
-                title__iexact=form.cleaned_data['title']
+                title__lower=Lower(Value(form.cleaned_data['title']))
             ).exclude(user=request.user)
             if similar_tickets.exists():
                 messages.info(request, "D'autres utilisateurs ont déjà demandé une critique sur ce livre.")
-            ticket = Ticket(
-                title=form.cleaned_data['title'],
-                description=form.cleaned_data['description'],
-                image=form.cleaned_data['image'],
-                user=request.user
-            )
-            ticket.save()
-            review = Review(
-                headline=form.cleaned_data['headline'],
-                body=form.cleaned_data['body'],
-                rating=form.cleaned_data['rating'],
-                user=request.user,
-                ticket=ticket
-            )
-            review.save()
+
+            def create_ticket_and_review():
+                # Ticket and review (and their signals) in one transaction
+                ticket = Ticket.objects.create(
+                    title=form.cleaned_data['title'],
+                    description=form.cleaned_data['description'],
+                    image=form.cleaned_data['image'],
+                    user=request.user
+                )
+                Review.objects.create(
+                    headline=form.cleaned_data['headline'],
+                    body=form.cleaned_data['body'],
+                    rating=form.cleaned_data['rating'],
+                    user=request.user,
+                    ticket=ticket
+                )
+
+            writes.run(create_ticket_and_review)
+            if form.stored_upload:
+                uploads.finish(form.stored_upload)
             messages.success(request, "Le ticket et la critique ont bien été créés.")
             return redirect('flux')
         else:
@@ -447,6 +468,8 @@ def create_ticket_and_review_view(request):
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=feed_etag, last_modified_func=feed_last_modified)
 def flux_view(request):
     """
     Vue flux LITReview :
@@ -454,42 +477,17 @@ def flux_view(request):
     - Affiche toutes les reviews sur ces tickets (hors bloqués)
     - Affiche les reviews orphelines faites par soi ou ses suivis (hors bloqués) sur tickets non visibles
     - Ordre antéchronologique
+    - Nombre de requêtes constant (voir feed.build_feed)
+    - Pagination par curseur (?cursor=...), settings.FEED_PAGE_SIZE éléments par page
+    - Pages mises en cache par utilisateur, invalidées par signaux (voir feed_cache)
+    - GET conditionnel (ETag / Last-Modified) : 304 tant que le flux n'a pas changé
+    - Snippets rendus depuis le cache de fragments (voir fragments), chargé en deux accès au cache
+    - Lu sur la réplique quand elle contient la version courante du flux (voir replica)
     """
-    user = request.user
-    followed_ids = set(UserFollows.objects.filter(user=user).values_list('followed_user', flat=True))
-    blocked_ids = set(BlockedUser.objects.filter(user=user).values_list('blocked_user', flat=True))
-    all_tickets = Ticket.objects.filter(
-        Q(user=user) | Q(user__in=followed_ids)
-    ).exclude(user__in=blocked_ids).order_by('-time_created')
-    ticket_blocks = []
-    for t in all_tickets:
-        reviews = t.review_set.exclude(user__in=blocked_ids).order_by('-time_created')
-        t.has_review_by_user = reviews.filter(user=user).exists()
-        ticket_blocks.append({
-            'kind': 'ticket_block',
-            'ticket': t,
-            'reviews': list(reviews),
-            'time_created': t.time_created,
-        })
-    visible_authors = (followed_ids | {user.id}) - blocked_ids
-    orphan_reviews = Review.objects.filter(
-        user__in=visible_authors
-    ).exclude(
-        ticket__in=all_tickets
-    ).exclude(
-        user__in=blocked_ids
-    ).order_by('-time_created')
-    orphan_items = [{
-        'kind': 'orphan_review',
-        'review': r,
-        'time_created': r.time_created,
-    } for r in orphan_reviews]
-    all_items = sorted(
-        ticket_blocks + orphan_items,
-        key=lambda it: it['time_created'],
-        reverse=True
-    )
-    return render(request, 'feed/flux.html', {'all_items': all_items})
+    with replica.reads(fresh_since=feed_version(request.user.id)):
+        all_items, next_cursor = cached_feed(request.user, cursor=request.GET.get('cursor'))
+        fragments.prefetch(fragments.feed_objects(all_items))
+        return render(request, 'feed/flux.html', {'all_items': all_items, 'next_cursor': next_cursor})
 
 
 @login_required
@@ -520,9 +518,11 @@ def edit_ticket_view(request, ticket_id):
     ticket = get_object_or_404(Ticket, pk=ticket_id, user=request.user)
     next_url = request.POST.get('next') or request.GET.get('next') or 'posts'
     if request.method == 'POST':
-        form = TicketForm(request.POST, request.FILES, instance=ticket)
+        form = TicketForm(request.POST, request.FILES, instance=ticket, user=request.user)
         if form.is_valid():
-            form.save()
+            writes.run(form.save)
+            if form.stored_upload:
+                uploads.finish(form.stored_upload)
             messages.success(request, "Votre ticket a été modifié avec succès !")
             return redirect(next_url)
         else:
@@ -563,7 +563,7 @@ def delete_ticket_view(request, ticket_id):
     ticket = get_object_or_404(Ticket, pk=ticket_id, user=request.user)
     next_url = request.GET.get('next') or 'posts'
     if request.method == "POST":
-        ticket.delete()
+        writes.run(Ticket.objects.filter(pk=ticket.pk).delete)
         messages.success(request, "Votre ticket a été supprimé avec succès !")
         return redirect(next_url)
     return render(request, 'feed/confirm_delete.html', {
@@ -602,7 +602,7 @@ def edit_review_view(request, review_id):
     if request.method == 'POST':
         form = ReviewForm(request.POST, instance=review)
         if form.is_valid():
-            form.save()
+            writes.run(form.save)
             messages.success(request, "Votre critique a été modifiée avec succès.")
             return redirect(next_url)
         else:
@@ -643,10 +643,60 @@ def delete_review_view(request, review_id):
     review = get_object_or_404(Review, pk=review_id, user=request.user)
     next_url = request.GET.get('next') or 'posts'
     if request.method == "POST":
-        review.delete()
+        writes.run(Review.objects.filter(pk=review.pk).delete)
         messages.success(request, "Votre critique a été supprimée avec succès.")
         return redirect(next_url)
     return render(request, 'feed/confirm_delete.html', {
         'object': review,
         'next': next_url,
     })
+
+
+@login_required
+@require_POST
+def upload_start_view(request):
+    """
+    Starts a chunked upload of a ticket image (see LITReview/uploads.py).
+
+    Behavior:
+    - POST (filename, size): refuses at once a file larger than settings.UPLOAD_MAX_BYTES (413).
+
+    Returns:
+    - JSON {'token', 'offset', 'url'}: the chunks are sent to url, starting at offset.
+    """
+    try:
+        upload = uploads.start(request.user, request.POST.get('filename'), request.POST.get('size'))
+    except uploads.UploadError as error:
+        return JsonResponse({'error': str(error)}, status=error.status)
+    return JsonResponse({
+        'token': upload.token,
+        'offset': 0,
+        'url': reverse('upload_chunk', args=[upload.token]),
+    }, status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'HEAD', 'PATCH'])
+def upload_chunk_view(request, token):
+    """
+    Receives the chunks of a chunked upload, or tells where to resume it.
+
+    Behavior:
+    - GET / HEAD: JSON {'offset', 'size', 'complete'} (offset of the next chunk).
+    - PATCH: the body is a chunk, written at the Upload-Offset header; it is
+      streamed to disk (never buffered in memory) and refused before being read
+      if it is at the wrong offset (409) or goes past the announced size (413).
+      A first chunk that is not a JPEG / PNG / GIF / WebP image is refused (415).
+
+    Access:
+    - Only the user who started the upload (404 otherwise).
+    """
+    upload = get_object_or_404(Upload, token=token, user=request.user)
+    if request.method == 'PATCH':
+        try:
+            uploads.append(
+                upload, request.headers.get('Upload-Offset'), request, request.headers.get('Content-Length'),
+            )
+        except uploads.UploadError as error:
+            return JsonResponse({'error': str(error), 'offset': upload.received}, status=error.status)
+    return JsonResponse({'offset': upload.received, 'size': upload.size, 'complete': upload.is_complete})
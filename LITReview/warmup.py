@@ -0,0 +1,61 @@
+"""
+Startup warm-up of the template cache.
+
+With the cached template loader (config/settings_production.py), a template is
+read and parsed from disk the first time it is used by a process, then kept
+compiled in memory. warm_templates() does that work when the process starts
+(config/wsgi.py, config/asgi.py, when settings.TEMPLATE_WARMUP is enabled)
+instead of during the first requests: every template under LITReview/templates
+is compiled, with the templates they extend or include by name (base.html and
+the feed/partials snippets of flux.html...).
+
+A server that forks its workers after loading the application (gunicorn
+--preload) compiles the templates once, in the parent process.
+"""
+
+import os
+
+from django.conf import settings
+from django.template import engines
+from django.template.loader_tags import ExtendsNode, IncludeNode
+
+TEMPLATE_DIR = settings.BASE_DIR / 'LITReview' / 'templates'
+
+
+def template_names(directory=TEMPLATE_DIR):
+    """Names (relative paths) of the templates of directory."""
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith(('.html', '.txt')):
+                yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+
+
+def _referenced(template):
+    """Names of the templates extended or included by template with a literal name."""
+    for node in template.nodelist.get_nodes_by_type((ExtendsNode, IncludeNode)):
+        expression = node.parent_name if isinstance(node, ExtendsNode) else node.template
+        if isinstance(expression.var, str):
+            yield expression.var
+
+
+def warm_templates(names=None):
+    """
+    Compiles the templates names (every template of LITReview/templates by
+    default) and, recursively, the ones they extend or include, in every Django
+    template engine. Returns the number of templates compiled.
+    """
+    names = list(template_names() if names is None else names)
+    count = 0
+    for engine in engines.all():
+        if not hasattr(engine, 'engine'):
+            # Not a Django template engine (Jinja2...)
+            continue
+        seen = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name not in seen:
+                seen.add(name)
+                stack.extend(_referenced(engine.get_template(name).template))
+        count += len(seen)
+    return count
@@ -0,0 +1,106 @@
+"""
+Serialized writes of the views (SQLite write queue).
+
+SQLite, even in WAL mode (sqlite.py), has a single writer at a time: the other
+writers wait for busy_timeout, and a transaction that has already read fails
+at once with "database is locked" when it tries to write after another writer
+committed. Under bursts of writes (reviews posted, users followed or blocked)
+from several server threads and processes, this ends in errors.
+
+run(func) executes func in one transaction (the writes done by func and by the
+signals it triggers: statistics, timeline, invalidations), so related writes
+commit together. With settings.WRITE_QUEUE:
+
+- the writes of a process are serialized by a lock, and the writes of the
+  processes sharing the database by an exclusive lock on a file next to it
+  ('<database>-lock', Unix only): writers queue up instead of competing for
+  the SQLite lock,
+- a transaction that still fails with "database is locked" (a write made
+  outside run(), a management command...) is rolled back and func is called
+  again, after an exponential backoff with jitter (WRITE_BACKOFF doubled on
+  each attempt, capped at WRITE_BACKOFF_MAX), WRITE_RETRIES times at most.
+
+func may thus be called more than once: it must build the objects it saves
+(not reuse instances saved by a failed attempt) and leave non-database side
+effects (messages, files to release) to the caller.
+
+Inside an enclosing transaction, run() only opens a savepoint: a failed
+statement cannot be retried there, and waiting for the write locks while
+holding the database lock could block another writer holding them.
+"""
+
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes serialized within the process only
+    fcntl = None
+
+_process_lock = threading.Lock()
+
+
+def is_locked_error(error):
+    """True if error is SQLite refusing a lock held by another connection."""
+    return isinstance(error, OperationalError) and 'locked' in str(error)
+
+
+def backoff(attempt):
+    """Seconds to wait before the attempt-th retry (0-based), with jitter."""
+    delay = min(settings.WRITE_BACKOFF_MAX, settings.WRITE_BACKOFF * 2 ** attempt)
+    return delay * random.uniform(0.5, 1)
+
+
+def lock_path(connection):
+    """Path of the file locked by the writers of the database of connection, None if not applicable."""
+    if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+        return None
+    return f"{connection.settings_dict['NAME']}-lock"
+
+
+class _SingleWriter:
+    """Context manager holding the process lock and, when available, the file lock of the database."""
+
+    def __init__(self, connection):
+        self.path = lock_path(connection) if fcntl else None
+        self.file = None
+
+    def __enter__(self):
+        _process_lock.acquire()
+        try:
+            if self.path:
+                self.file = open(self.path, 'a')
+                fcntl.flock(self.file, fcntl.LOCK_EX)
+        except BaseException:
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            # Closing the file releases the lock
+            self.file.close()
+            self.file = None
+        _process_lock.release()
+
+
+def run(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Calls func(*args, **kwargs) in one transaction, through the write queue; returns its result."""
+    connection = connections[using]
+    if not settings.WRITE_QUEUE or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            return func(*args, **kwargs)
+    attempt = 0
+    while True:
+        try:
+            with _SingleWriter(connection), transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if not is_locked_error(error) or attempt >= settings.WRITE_RETRIES:
+                raise
+        time.sleep(backoff(attempt))
+        attempt += 1
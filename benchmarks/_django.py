@@ -0,0 +1,62 @@
+"""
+Django bootstrap shared by the benchmark scripts.
+
+Each benchmark runs against a throwaway SQLite database created in a temporary
+directory (never against db.sqlite3), migrated from scratch.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup(**overrides):
+    """
+    Configures Django on a temporary database, applies the migrations and returns
+    the path of the database file. overrides are applied to django.conf.settings.
+    """
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+    import django
+    from django.conf import settings
+
+    db_path = Path(tempfile.mkdtemp(prefix='litreview-bench-')) / 'bench.sqlite3'
+    settings.DATABASES['default']['NAME'] = db_path
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def create_users(count, prefix='user'):
+    """Bulk-creates count users (unusable passwords, no hashing cost) and returns them."""
+    from django.contrib.auth.models import User
+    User.objects.bulk_create(
+        [User(username=f'{prefix}{i}', password='!') for i in range(count)], batch_size=500
+    )
+    return list(User.objects.filter(username__startswith=prefix).order_by('pk'))
+
+
+def percentile(values, pct):
+    """pct-th percentile (nearest rank) of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Timer:
+    """Context manager measuring elapsed wall time in milliseconds (timer.ms)."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000
@@ -0,0 +1,96 @@
+"""
+Requests per second on the 'flux' page, with and without persistent database
+connections.
+
+The requests go through the full WSGI handler (middleware, session, feed,
+template), as behind a server: request_started / request_finished close the
+database connection after each request (CONN_MAX_AGE = 0) or keep it open for
+the next request of the thread (CONN_MAX_AGE > 0, with CONN_HEALTH_CHECKS).
+--threads threads send --requests requests each, as a logged-in reader.
+
+Runs, with the feed cache on (most requests only read the session and the user)
+and off (feed queries on every request):
+- close:   CONN_MAX_AGE = 0, a connection (and the SQLite pragmas) per request,
+- persist: CONN_MAX_AGE = 60 with health checks, a connection per thread.
+
+Usage:
+    python -m benchmarks.connection_reuse [--requests 500] [--threads 1]
+"""
+
+import argparse
+import random
+import threading
+from statistics import mean
+
+from benchmarks._django import setup, create_users, percentile, Timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help="requests per thread and run")
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--authors', type=int, default=20)
+    parser.add_argument('--tickets', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    setup(DEBUG=False, ALLOWED_HOSTS=['testserver'], CONNECTION_STATS=True)
+    from django.conf import settings
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.core.cache import cache
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connections
+    from django.test import RequestFactory
+    from LITReview.models import Ticket, UserFollows
+
+    reader, *authors = create_users(args.authors + 1)
+    UserFollows.objects.bulk_create([UserFollows(user=reader, followed_user=a) for a in authors])
+    Ticket.objects.bulk_create(
+        [Ticket(user=rng.choice(authors), title=f"Livre {i}", description="-") for i in range(args.tickets)]
+    )
+    session = SessionStore()
+    session['_auth_user_id'] = str(reader.pk)
+    session['_auth_user_backend'] = 'django.contrib.auth.backends.ModelBackend'
+    session['_auth_user_hash'] = reader.get_session_auth_hash()
+    session.create()
+    cookie = f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+    handler = WSGIHandler()
+    environ = RequestFactory()._base_environ(PATH_INFO='/flux/', HTTP_COOKIE=cookie)
+
+    print(f"requests={args.requests} threads={args.threads} feed items={args.tickets}")
+    print()
+    print(f"{'run':<8} {'feed cache':>10} {'req/s':>8} {'mean ms':>8} {'p95 ms':>8} {'opened':>7}")
+    for feed_cache in (300, 0):
+        for label, max_age in (('close', 0), ('persist', 60)):
+            settings.FEED_CACHE_TIMEOUT = feed_cache
+            cache.clear()
+            connections.close_all()
+            for database in settings.DATABASES.values():
+                database.update(CONN_MAX_AGE=max_age, CONN_HEALTH_CHECKS=bool(max_age))
+            times, opened = [], []
+
+            def client():
+                for _ in range(args.requests):
+                    with Timer() as t:
+                        response = handler(dict(environ), lambda status, headers: None)
+                        b''.join(response)
+                        # Connections closed (or kept) as by the WSGI server
+                        response.close()
+                    assert response.status_code == 200, response.status_code
+                    times.append(t.ms)
+                    opened.append(int(response['X-DB-Connections-Opened']))
+                connections.close_all()
+
+            threads = [threading.Thread(target=client) for _ in range(args.threads)]
+            with Timer() as total:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            print(f"{label:<8} {'on' if feed_cache else 'off':>10} {len(times) * 1000 / total.ms:>8.0f} "
+                  f"{mean(times):>8.2f} {percentile(times, 95):>8.2f} {sum(opened):>7}")
+
+
+if __name__ == '__main__':
+    main()
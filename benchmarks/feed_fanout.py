@@ -0,0 +1,112 @@
+"""
+Write and read cost of the feed strategies on a synthetic power-law follow graph.
+
+Every user follows --follows other users, picked with a probability proportional
+to 1 / rank ** --alpha: a few authors get most of the followers, as on real
+social graphs. For each strategy ('read', 'write', 'hybrid') the script measures:
+
+- write: time and FeedEntry rows of Ticket.objects.create() (with the timeline
+  signals), for the most popular authors and for ordinary authors,
+- read: time of one feed page (feed.build_feed) for random readers.
+
+Usage:
+    python -m benchmarks.feed_fanout [--users 3000] [--follows 30] [--alpha 1.1] [--threshold 200]
+"""
+
+import argparse
+import random
+from statistics import mean
+
+from benchmarks._django import setup, create_users, percentile, Timer
+
+
+def build_graph(users, follows, alpha, rng):
+    """Follow pairs where the followee is drawn from a Zipf-like distribution."""
+    weights = [1 / (rank + 1) ** alpha for rank in range(len(users))]
+    pairs = set()
+    for follower in users:
+        for followee in rng.choices(users, weights=weights, k=follows):
+            if followee.pk != follower.pk:
+                pairs.add((follower.pk, followee.pk))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=3000)
+    parser.add_argument('--follows', type=int, default=30)
+    parser.add_argument('--alpha', type=float, default=1.1)
+    parser.add_argument('--threshold', type=int, default=200)
+    parser.add_argument('--posts', type=int, default=5, help="seeded tickets per user")
+    parser.add_argument('--writes', type=int, default=20, help="measured tickets per author group")
+    parser.add_argument('--reads', type=int, default=200, help="measured feed pages")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    setup(FEED_FANOUT_THRESHOLD=args.threshold)
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.db.models import Count
+    from LITReview import timeline
+    from LITReview.feed import build_feed
+    from LITReview.models import Ticket, UserFollows, FeedEntry, PulledAuthor
+
+    users = create_users(args.users)
+    UserFollows.objects.bulk_create(
+        [UserFollows(user_id=a, followed_user_id=b) for a, b in build_graph(users, args.follows, args.alpha, rng)],
+        batch_size=1000,
+    )
+    Ticket.objects.bulk_create(
+        [Ticket(user=u, title=f'Seed {i}', description='-') for u in users for i in range(args.posts)],
+        batch_size=1000,
+    )
+    counts = dict(
+        UserFollows.objects.values_list('followed_user').annotate(n=Count('id')).values_list('followed_user', 'n')
+    )
+    by_popularity = sorted(users, key=lambda u: counts.get(u.pk, 0), reverse=True)
+    popular = by_popularity[:args.writes]
+    ordinary = by_popularity[len(users) // 2:][:args.writes]
+    print(f"users={args.users} follows={UserFollows.objects.count()} "
+          f"max_followers={counts.get(popular[0].pk, 0)} "
+          f"median_followers={counts.get(by_popularity[len(users) // 2].pk, 0)} "
+          f"authors_over_threshold={sum(1 for n in counts.values() if n > args.threshold)}")
+    print()
+    print(f"{'strategy':<9} {'rebuild s':>9} {'write pop ms':>12} {'rows/pop':>9} "
+          f"{'write ord ms':>12} {'rows/ord':>9} {'read avg ms':>11} {'read p95 ms':>11}")
+
+    readers = rng.sample(users, min(args.reads, len(users)))
+    for strategy in ('read', 'write', 'hybrid'):
+        settings.FEED_STRATEGY = strategy
+        cache.clear()
+        FeedEntry.objects.all().delete()
+        PulledAuthor.objects.all().delete()
+        with Timer() as rebuild:
+            if timeline.is_enabled():
+                timeline.settle_authors()
+                for user in users:
+                    timeline.rebuild_for(user)
+
+        writes = {}
+        for label, authors in (('pop', popular), ('ord', ordinary)):
+            times, rows = [], []
+            for author in authors:
+                before = FeedEntry.objects.count()
+                with Timer() as t:
+                    Ticket.objects.create(user=author, title='Bench', description='-')
+                times.append(t.ms)
+                rows.append(FeedEntry.objects.count() - before)
+            writes[label] = (mean(times), mean(rows))
+
+        reads = []
+        for reader in readers:
+            with Timer() as t:
+                build_feed(reader)
+            reads.append(t.ms)
+
+        print(f"{strategy:<9} {rebuild.ms / 1000:>9.1f} {writes['pop'][0]:>12.2f} {writes['pop'][1]:>9.0f} "
+              f"{writes['ord'][0]:>12.2f} {writes['ord'][1]:>9.0f} {mean(reads):>11.2f} {percentile(reads, 95):>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
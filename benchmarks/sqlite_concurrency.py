@@ -0,0 +1,113 @@
+"""
+Read / write throughput of concurrent threads on SQLite, by connection setup.
+
+--readers threads load feed pages (feed.build_feed) of random users while
+--writers threads post reviews (Review.objects.create, with its signals:
+ticket statistics, snippet and feed versions), for --seconds seconds each run.
+Every thread has its own database connection, as the threads of a server.
+
+Runs:
+- defaults: rollback journal, SQLite defaults (bare 'sqlite3' backend),
+- tuned:    settings.SQLITE_PRAGMAS (LITReview/sqlite.py), WAL mode included.
+
+For each run: reads and writes per second, p95 / max latency of each, and
+writes that failed with "database is locked".
+
+Usage:
+    python -m benchmarks.sqlite_concurrency [--readers 4] [--writers 4] [--seconds 5]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from benchmarks._django import setup, create_users, percentile, Timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tickets', type=int, default=2000, help="seeded tickets")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    setup(FEED_CACHE_TIMEOUT=0, FRAGMENT_CACHE_TIMEOUT=0)
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.db import connection, connections, OperationalError
+    from LITReview.feed import build_feed
+    from LITReview.models import Ticket, Review, UserFollows
+    from LITReview.sqlite import current_pragmas
+
+    users = create_users(args.users)
+    UserFollows.objects.bulk_create(
+        [UserFollows(user=u, followed_user=f) for u in users for f in rng.sample(users, 20) if f != u],
+        batch_size=1000, ignore_conflicts=True,
+    )
+    Ticket.objects.bulk_create(
+        [Ticket(user=rng.choice(users), title=f"Livre {i}", description="-") for i in range(args.tickets)],
+        batch_size=1000,
+    )
+    ticket_ids = list(Ticket.objects.values_list('pk', flat=True))
+    user_ids = [u.pk for u in users]
+    tuned = dict(settings.SQLITE_PRAGMAS)
+    runs = [
+        ('defaults', {'journal_mode': 'DELETE'}),
+        ('tuned', tuned),
+    ]
+    print(f"users={args.users} tickets={args.tickets} readers={args.readers} writers={args.writers} "
+          f"seconds={args.seconds}")
+    print()
+    print(f"{'run':<9} {'journal':>8} {'reads/s':>8} {'p95 ms':>8} {'max ms':>8} "
+          f"{'writes/s':>9} {'p95 ms':>8} {'max ms':>8} {'locked':>7}")
+
+    for label, pragmas in runs:
+        # Changing the journal mode needs the only connection to the database
+        connections.close_all()
+        settings.SQLITE_PRAGMAS = pragmas
+        journal = current_pragmas(connection, ['journal_mode'])['journal_mode']
+        connections.close_all()
+
+        reads, writes, locked = [], [], []
+        deadline = time.monotonic() + args.seconds
+
+        def reader(seed):
+            thread_rng = random.Random(seed)
+            while time.monotonic() < deadline:
+                with Timer() as t:
+                    build_feed(User(pk=thread_rng.choice(user_ids)))
+                reads.append(t.ms)
+            connections.close_all()
+
+        def writer(seed):
+            thread_rng = random.Random(seed)
+            while time.monotonic() < deadline:
+                try:
+                    with Timer() as t:
+                        Review.objects.create(
+                            user_id=thread_rng.choice(user_ids), ticket_id=thread_rng.choice(ticket_ids),
+                            headline="Avis", body="Texte", rating=thread_rng.randint(0, 5),
+                        )
+                    writes.append(t.ms)
+                except OperationalError:
+                    locked.append(1)
+            connections.close_all()
+
+        threads = [threading.Thread(target=reader, args=(rng.random(),)) for _ in range(args.readers)]
+        threads += [threading.Thread(target=writer, args=(rng.random(),)) for _ in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print(f"{label:<9} {journal:>8} {len(reads) / args.seconds:>8.0f} {percentile(reads or [0], 95):>8.1f} "
+              f"{max(reads or [0]):>8.1f} {len(writes) / args.seconds:>9.0f} {percentile(writes or [0], 95):>8.1f} "
+              f"{max(writes or [0]):>8.1f} {len(locked):>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Render time of the 'flux' page per feed item, by template loading strategy.
+
+A reader follows --authors users who posted tickets, half of them reviewed; the
+feed page (--items items) is built once, then feed/flux.html is rendered with it
+(request context, base.html, snippets included per item):
+
+- uncached:      filesystem / app_directories loaders, templates read and parsed
+                 on every render (the include cache only lasts one render),
+- cached (cold): cached loader, the first render of the process parses everything,
+- cached (warm): cached loader after LITReview.warmup.warm_templates(),
+- + fragments:   as above, with the snippet fragment cache (fragments.py) warm.
+
+For each strategy: time of the first render of the process, mean and p95 of
+--renders renders, and mean time per feed item.
+
+Usage:
+    python -m benchmarks.template_render [--items 50] [--renders 200]
+"""
+
+import argparse
+import copy
+import random
+from statistics import mean
+
+from benchmarks._django import setup, create_users, percentile, Timer
+
+UNCACHED = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+CACHED = [('django.template.loaders.cached.Loader', UNCACHED)]
+
+
+def templates_setting(base, loaders):
+    return [{**base, 'APP_DIRS': False, 'OPTIONS': {**base['OPTIONS'], 'loaders': loaders}}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=50, help="feed items per page")
+    parser.add_argument('--authors', type=int, default=20)
+    parser.add_argument('--renders', type=int, default=200, help="measured renders per strategy")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    setup(DEBUG=False, FEED_CACHE_TIMEOUT=0, FRAGMENT_CACHE_TIMEOUT=0, FEED_PAGE_SIZE=args.items)
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory, override_settings
+    from LITReview import fragments
+    from LITReview.feed import build_feed
+    from LITReview.models import Ticket, Review, UserFollows
+    from LITReview.warmup import warm_templates
+
+    reader, *authors = create_users(args.authors + 1)
+    UserFollows.objects.bulk_create([UserFollows(user=reader, followed_user=a) for a in authors])
+    for i in range(args.items):
+        # Signals on: statistics, fragment versions, image markers as in production
+        ticket = Ticket.objects.create(user=rng.choice(authors), title=f"Livre {i}", description="Résumé\n" * 3)
+        if i % 2:
+            Review.objects.create(
+                user=rng.choice(authors), ticket=ticket, headline=f"Avis {i}", body="Texte\n" * 5,
+                rating=rng.randint(0, 5),
+            )
+    page, _ = build_feed(reader)
+    items = sum(2 if it['kind'] == 'ticket_block' and it['reviews'] else 1 for it in page)
+    request = RequestFactory().get('/flux/')
+    request.user = reader
+    print(f"feed items={len(page)} snippets={items} renders={args.renders}")
+    print()
+    print(f"{'strategy':<15} {'first ms':>9} {'mean ms':>9} {'p95 ms':>9} {'µs/item':>9}")
+
+    base = settings.TEMPLATES[0]
+    strategies = [
+        ('uncached', UNCACHED, False, 0),
+        ('cached (cold)', CACHED, False, 0),
+        ('cached (warm)', CACHED, True, 0),
+        ('+ fragments', CACHED, True, 3600),
+    ]
+    for label, loaders, warm, fragment_timeout in strategies:
+        cache.clear()
+        with override_settings(TEMPLATES=templates_setting(base, loaders), FRAGMENT_CACHE_TIMEOUT=fragment_timeout):
+            if warm:
+                warm_templates()
+
+            def render():
+                # Fresh objects on every request, as when the page comes from the feed cache
+                all_items = copy.deepcopy(page)
+                with Timer() as t:
+                    fragments.prefetch(fragments.feed_objects(all_items))
+                    render_to_string('feed/flux.html', {'all_items': all_items, 'next_cursor': None}, request)
+                return t.ms
+
+            first = render()
+            if fragment_timeout:
+                render()  # fills the fragment cache
+            times = [render() for _ in range(args.renders)]
+        print(f"{label:<15} {first:>9.2f} {mean(times):>9.2f} {percentile(times, 95):>9.2f} "
+              f"{mean(times) * 1000 / len(page):>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
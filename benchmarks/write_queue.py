@@ -0,0 +1,148 @@
+"""
+Throughput and tail latency of concurrent writers on SQLite, with and without
+the write queue (LITReview/writes.py).
+
+--processes worker processes of --threads threads each (as a multi-process
+server) repeat for --seconds seconds the writes of the views: a review posted
+(Review.objects.create, 50%), a user followed (UserFollows.objects.create,
+30%) or blocked (BlockedUser.block, 20%), all with their signals. Each thread
+acts as its own user, so the writes never conflict on unique constraints.
+
+Runs:
+- autocommit:  statements committed one by one (the views before writes.py),
+- transaction: writes.run() without WRITE_QUEUE (one transaction per action),
+- queue:       writes.run() with WRITE_QUEUE (serialized writers, retries).
+
+For each run: actions per second, p50 / p99 / max latency and actions failed
+with "database is locked". --busy-timeout lowers the SQLite lock wait
+(SQLITE_PRAGMAS) to show the failures of a saturated database.
+
+Usage:
+    python -m benchmarks.write_queue [--processes 4] [--threads 4] [--seconds 5] [--busy-timeout 5000]
+"""
+
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+from statistics import median
+
+from benchmarks._django import setup, create_users, percentile, Timer
+
+
+def worker(mode, seconds, thread_users, targets, ticket_ids, seed, results):
+    """Writer process: one thread per user of thread_users; puts (latencies, locked) on results."""
+    from django.db import connections, OperationalError
+    from LITReview import writes
+    from LITReview.models import Review, UserFollows, BlockedUser
+
+    def act(func, *args, **kwargs):
+        if mode == 'autocommit':
+            return func(*args, **kwargs)
+        return writes.run(func, *args, **kwargs)
+
+    latencies, locked = [], []
+    deadline = time.monotonic() + seconds
+
+    def thread(user_id, thread_seed):
+        rng = random.Random(thread_seed)
+        tickets = iter(rng.sample(ticket_ids, len(ticket_ids)))
+        follows = iter(targets['follow'])
+        blocks = iter(targets['block'])
+        while time.monotonic() < deadline:
+            kind = rng.random()
+            try:
+                with Timer() as t:
+                    if kind < 0.5:
+                        act(Review.objects.create, user_id=user_id, ticket_id=next(tickets),
+                            headline="Avis", body="Texte", rating=rng.randint(0, 5))
+                    elif kind < 0.8:
+                        act(UserFollows.objects.create, user_id=user_id, followed_user_id=next(follows))
+                    else:
+                        act(BlockedUser.block, _user(user_id), _user(next(blocks)))
+                latencies.append(t.ms)
+            except OperationalError:
+                locked.append(1)
+            except StopIteration:
+                break
+        connections.close_all()
+
+    threads = [threading.Thread(target=thread, args=(user_id, seed + i)) for i, user_id in enumerate(thread_users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put((latencies, len(locked)))
+
+
+def _user(pk):
+    from django.contrib.auth.models import User
+    return User(pk=pk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4, help="writer threads per process")
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--tickets', type=int, default=5000, help="seeded tickets")
+    parser.add_argument('--busy-timeout', type=int, default=None, help="SQLite busy_timeout (ms)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    setup(FEED_CACHE_TIMEOUT=0, FRAGMENT_CACHE_TIMEOUT=0)
+    from django.conf import settings
+    from django.db import connections
+    from LITReview.models import Ticket
+
+    if args.busy_timeout is not None:
+        settings.SQLITE_PRAGMAS = {**settings.SQLITE_PRAGMAS, 'busy_timeout': args.busy_timeout}
+    writers = args.processes * args.threads
+    runs = ['autocommit', 'transaction', 'queue']
+    # A user per writer and per run; users to follow and users to block, common to all writers
+    targets = create_users(2000, prefix='target')
+    follow_ids, block_ids = [u.pk for u in targets[:1000]], [u.pk for u in targets[1000:]]
+    users = create_users(writers * len(runs), prefix='writer')
+    authors = create_users(50, prefix='author')
+    Ticket.objects.bulk_create(
+        [Ticket(user=rng.choice(authors), title=f"Livre {i}", description="-") for i in range(args.tickets)],
+        batch_size=1000,
+    )
+    ticket_ids = list(Ticket.objects.values_list('pk', flat=True))
+    print(f"processes={args.processes} threads={args.threads} seconds={args.seconds} "
+          f"busy_timeout={settings.SQLITE_PRAGMAS.get('busy_timeout')}")
+    print()
+    print(f"{'run':<12} {'actions/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>9} {'locked':>7}")
+
+    context = multiprocessing.get_context('fork')
+    for index, mode in enumerate(runs):
+        settings.WRITE_QUEUE = mode == 'queue'
+        # No connection inherited by the worker processes
+        connections.close_all()
+        run_users = [u.pk for u in users[index * writers:(index + 1) * writers]]
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(
+                mode, args.seconds, run_users[p * args.threads:(p + 1) * args.threads],
+                {'follow': follow_ids, 'block': block_ids}, ticket_ids, args.seed + p * 100, results,
+            ))
+            for p in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        latencies, locked = [], 0
+        for _ in processes:
+            process_latencies, process_locked = results.get()
+            latencies += process_latencies
+            locked += process_locked
+        for process in processes:
+            process.join()
+        latencies = latencies or [0]
+        print(f"{mode:<12} {len(latencies) / args.seconds:>10.0f} {median(latencies):>8.1f} "
+              f"{percentile(latencies, 99):>8.1f} {max(latencies):>9.1f} {locked:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Compile les templates au démarrage plutôt qu'aux premières requêtes (config/settings_production.py)
+if settings.TEMPLATE_WARMUP:
+    from LITReview.warmup import warm_templates
+    warm_templates()
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -40,6 +42,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Compression gzip des pages HTML (avant tout middleware qui lit ou modifie le contenu de la réponse)
+    'LITReview.middleware.HtmlGZipMiddleware',
+    # Connexions à la base ouvertes par requête / par processus, en en-têtes (LITReview/connection_stats.py)
+    'LITReview.middleware.ConnectionStatsMiddleware',
     # Détecter la langue de l'utilisateur et appliquer les fichiers traduits
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -50,6 +56,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.locale.LocaleMiddleware',  # Ajout, dossier racine projet stockage traductions.
     # django-admin makemessages -l fr
+    # Lectures depuis le primaire pendant REPLICA_STICKY_SECONDS après une écriture (LITReview/replica.py)
+    'LITReview.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -65,24 +73,104 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'LITReview.context_processors.version_static',
             ],
         },
     },
 ]
 
+# Compilation de tous les templates au démarrage du serveur (config/wsgi.py, config/asgi.py, LITReview/warmup.py) ;
+# activée par config/settings_production.py avec le chargeur de templates en cache
+TEMPLATE_WARMUP = False
+
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# Moteur choisi par l'environnement : DJANGO_DB_ENGINE = 'sqlite' (défaut, fichier db.sqlite3) ou 'postgresql'
+# (paquet psycopg : requirements-postgresql.txt) avec DJANGO_DB_NAME, DJANGO_DB_USER, DJANGO_DB_PASSWORD,
+# DJANGO_DB_HOST, DJANGO_DB_PORT ;
+# `python manage.py test` crée puis supprime une base de test jetable sur le même serveur.
+# Connexions fermées à la fin de chaque requête (CONN_MAX_AGE = 0) : le serveur de développement crée un thread
+# par requête, une connexion persistante n'y serait jamais réutilisée ; connexions persistantes en production
+# (config/settings_production.py)
+DATABASE_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite')
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'litreview'),
+            'USER': os.environ.get('DJANGO_DB_USER', ''),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', ''),
+            'PORT': os.environ.get('DJANGO_DB_PORT', ''),
+            'CONN_MAX_AGE': 0,
+            # Derrière un pooler en mode transaction (DJANGO_DB_POOLER=transaction, PgBouncer) : pas de curseurs
+            # côté serveur, .iterator() lit alors tout le résultat avant de le découper
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DJANGO_DB_POOLER') == 'transaction',
+        }
+    }
+elif DATABASE_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': 0,
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DJANGO_DB_ENGINE: 'sqlite' or 'postgresql' expected, not {DATABASE_ENGINE!r}")
+
+# Réplique en lecture (LITReview/replica.py) : le flux, les posts et les listes d'abonnements y sont lus quand elle
+# est à jour, sauf pendant REPLICA_STICKY_SECONDS après une écriture du même client.
+# SQLite : copie de la base ouverte en lecture seule, mise à jour par `python manage.py sync_replica [--interval s]`.
+# PostgreSQL : serveur répliqué DJANGO_DB_REPLICA_HOST (retard inconnu : lectures sans exigence de fraîcheur)
+if DATABASE_ENGINE == 'postgresql':
+    if os.environ.get('DJANGO_DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['DJANGO_DB_REPLICA_HOST'],
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES['replica'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': (BASE_DIR / 'db.replica.sqlite3').as_uri() + '?mode=ro',
+        'CONN_MAX_AGE': 0,
+        'TEST': {'MIRROR': 'default'},
     }
+DATABASE_ROUTERS = ['LITReview.replica.ReplicaRouter']
+REPLICA_DATABASE = 'replica'  # None = tout sur 'default'
+REPLICA_STICKY_SECONDS = 10
+# Âge maximal (secondes) d'une copie SQLite servie ; au-delà (sync_replica arrêté), tout est lu sur le primaire
+REPLICA_MAX_AGE = 60
+
+# En-têtes X-DB-Connections-Opened / X-DB-Connections-Total (LITReview/middleware.py) : connexions ouvertes
+# pendant la requête et depuis le démarrage du processus
+CONNECTION_STATS = DEBUG
+
+# Réglages appliqués à chaque nouvelle connexion SQLite (LITReview/sqlite.py) : journal WAL (les lectures
+# n'attendent plus les écritures), fsync aux checkpoints seulement, attente d'un verrou avant
+# « database is locked » (ms), lecture par mmap (octets), cache de pages (négatif : Kio), tables temporaires
+# en mémoire ; {} = réglages par défaut de SQLite
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -16 * 1024,
+    'temp_store': 'MEMORY',
 }
 
+# Écritures des vues (LITReview/writes.py) : une transaction par action, sérialisées entre les threads et les
+# processus (verrou sur le fichier '<base>-lock') ; une transaction refusée (« database is locked ») est rejouée
+# jusqu'à WRITE_RETRIES fois après une attente exponentielle (secondes) ; False = transaction seule
+# (PostgreSQL : écritures concurrentes, pas de file)
+WRITE_QUEUE = DATABASE_ENGINE == 'sqlite'
+WRITE_RETRIES = 5
+WRITE_BACKOFF = 0.05
+WRITE_BACKOFF_MAX = 1.0
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -119,9 +207,26 @@ LOCALE_PATHS = [
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
-VERSION_STATIC = "1.0.3"
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'LITReview' / 'static']
+# `python manage.py collectstatic` : copie dans STATIC_ROOT et écrit les variantes .gz (et .br si le paquet
+# brotli est installé) des fichiers texte (LITReview/compression.py)
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'LITReview.storage.CompressedStaticFilesStorage'},
+}
+
+# Feuilles de style regroupées et minifiées par `python manage.py build_assets` (LITReview/assets.py),
+# dans l'ordre des cascades ; le fichier produit (nom haché selon le contenu) et le manifeste sont écrits
+# dans ce sous-dossier du premier dossier de STATICFILES_DIRS
+ASSET_BUNDLES = {
+    'css/site.css': [
+        'css/base.css', 'css/home.css', 'css/form.css', 'css/profile.css', 'css/sign_up.css',
+        'css/subscriptions.css', 'css/posts.css', 'css/flux.css', 'css/snippets.css', 'css/divers.css',
+    ],
+}
+ASSETS_BUILD_DIR = 'dist'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -130,5 +235,67 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Ajout mdp oublié
 
+# Flux : nombre d'éléments (blocs ticket ou critiques orphelines) par page
+FEED_PAGE_SIZE = 20
+# Flux : 'read' = calculé à la lecture (abonnements / blocages),
+# 'write' = timeline FeedEntry remplie à l'écriture (fan-out), lue en un seul parcours d'index.
+# 'hybrid' = comme 'write', sauf les auteurs populaires (plus de FEED_FANOUT_THRESHOLD abonnés),
+# dont les posts sont lus à la demande puis fusionnés avec la timeline.
+# Avant de passer à 'write' / 'hybrid' (ou de changer le seuil) : python manage.py rebuild_feed
+FEED_STRATEGY = 'read'
+FEED_FANOUT_THRESHOLD = 1000
+FEED_POPULAR_AUTHORS_TIMEOUT = 60  # secondes
+# Posts : nombre de publications (tickets et critiques) par page
+POSTS_PAGE_SIZE = 20
+# Flux : durée de cache d'une page (secondes, 0 = pas de cache), invalidée par signaux à chaque écriture
+FEED_CACHE_TIMEOUT = 300
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Mémoire locale par processus ; pour partager le cache entre processus sans service externe :
+# 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': BASE_DIR / 'cache'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cache des snippets de tickets et critiques (LITReview/fragments.py) : durée de vie (secondes) d'un fragment
+# rendu ; invalidé par signaux à chaque modification, 0 = désactivé
+FRAGMENT_CACHE_TIMEOUT = 24 * 3600
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Fichiers statiques et médias servis par Django (LITReview/serving.py : variantes précompressées, ETag,
+# Cache-Control immutable pour les fichiers nommés selon leur contenu, requêtes Range) ;
+# False derrière un serveur frontal qui sert /static/ et /media/ lui-même
+SERVE_FILES = DEBUG
+
+# Variantes des images de tickets (LITReview/images.py) : largeurs en pixels (affichage à 120px, écrans 2x / 3x),
+# formats du plus efficace au plus compatible (le dernier sert de <img> de repli) et qualité d'encodage
+IMAGE_VARIANT_WIDTHS = (120, 240, 360)
+IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+IMAGE_VARIANT_QUALITY = 80
+
+# Traitement des images hors requête (LITReview/media_queue.py) : True (config/settings_production.py) = file
+# d'attente en base consommée par `python manage.py process_media`, qui doit tourner (sinon les nouvelles images
+# restent en attente, espace réservé affiché) ; False = traitement dans la requête, sans worker
+MEDIA_QUEUE = False
+MEDIA_WORKERS = None  # processus du pool (None : nombre de CPU)
+MEDIA_JOB_TIMEOUT = 600  # secondes avant de relancer un job resté 'running' (worker arrêté)
+# Au-delà, l'image n'est pas décodée (bombe de décompression)
+IMAGE_MAX_PIXELS = 40_000_000
+
+# Stockage adressé par contenu des images (LITReview/storage.py) : sous-dossier de MEDIA_ROOT des blobs
+MEDIA_BLOB_DIR = 'blobs'
+
+# `python manage.py gc_media` : âge minimal (secondes) d'un fichier non référencé avant suppression,
+# pour ne pas supprimer un envoi dont le ticket n'est pas encore enregistré
+MEDIA_GC_GRACE = 24 * 3600
+
+# Envoi des images par morceaux (LITReview/uploads.py) : taille maximale, taille des morceaux envoyés par le
+# navigateur, dossier des envois en cours (hors MEDIA_ROOT) et durée de vie d'un envoi inachevé (secondes)
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_TEMP_DIR = BASE_DIR / 'uploads'
+UPLOAD_EXPIRY = 24 * 3600
@@ -0,0 +1,77 @@
+"""
+Production settings: DJANGO_SETTINGS_MODULE=config.settings_production
+
+Same as config/settings.py, except:
+- DEBUG off, secret key and allowed hosts read from the environment,
+- templates compiled once per process by the cached loader, all of them at
+  startup (TEMPLATE_WARMUP, LITReview/warmup.py),
+- static and media files left to the front server (SERVE_FILES),
+- ticket images processed off-request by a process_media worker (MEDIA_QUEUE),
+- larger SQLite page cache and memory map, longer lock wait (SQLITE_PRAGMAS),
+- persistent database connections, checked before reuse (CONN_MAX_AGE,
+  CONN_HEALTH_CHECKS; DJANGO_CONN_MAX_AGE in the environment),
+- a cache shared by the server processes (file-based, DJANGO_CACHE_DIR): the
+  feed versions, ETags and fragment versions bumped by the process that handled
+  a write are seen by all the others.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, SQLITE_PRAGMAS, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
+
+# Chargeur en cache explicite (APP_DIRS incompatible avec 'loaders') : chaque template est lu et compilé une
+# seule fois par processus, puis rendu depuis la mémoire
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+TEMPLATE_WARMUP = True
+
+# /static/ (après build_assets et collectstatic) et /media/ servis par le serveur frontal
+SERVE_FILES = False
+
+# Images traitées hors requête : au moins un worker `python manage.py process_media` doit tourner
+MEDIA_QUEUE = True
+
+# Plusieurs processus serveur écrivent dans la même base : attente plus longue d'un verrou, cache et mmap plus grands
+SQLITE_PRAGMAS = {
+    **SQLITE_PRAGMAS,
+    'busy_timeout': 10000,
+    'mmap_size': 1024 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+}
+
+# Connexions persistantes : chaque thread du serveur garde sa connexion (déjà configurée par les pragmas) entre les
+# requêtes pendant CONN_MAX_AGE secondes, vérifiée au début de chaque requête qui la réutilise (CONN_HEALTH_CHECKS)
+DATABASES = {
+    alias: {**database, 'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 60)), 'CONN_HEALTH_CHECKS': True}
+    for alias, database in DATABASES.items()
+}
+CONNECTION_STATS = False
+
+# Cache partagé par les processus serveur (un LocMemCache par processus garderait les versions du flux et des
+# fragments d'avant une écriture traitée par un autre processus : pages périmées et 304 sans fin) ; répertoire
+# commun à tous les processus, sur un disque local. MAX_ENTRIES : au-delà, un tiers des entrées est supprimé
+# (une version supprimée est recréée : invalidation seulement)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    }
+}
@@ -15,11 +15,14 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+import re
+
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 
 from django.conf import settings
-from django.conf.urls.static import static
+
+from LITReview import serving
 
 
 urlpatterns = [
@@ -27,5 +30,9 @@ urlpatterns = [
     path('', include('LITReview.urls')),  # Inclut les URLs de l'application LITReview
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.SERVE_FILES:
+    # Sous runserver, /static/ est intercepté par staticfiles sauf avec --nostatic
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serving.static_view),
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serving.media_view),
+    ]
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Compile les templates au démarrage plutôt qu'aux premières requêtes (config/settings_production.py)
+if settings.TEMPLATE_WARMUP:
+    from LITReview.warmup import warm_templates
+    warm_templates()